@@ -0,0 +1,14 @@
+CREATE TABLE IF NOT EXISTS partialseries(
+        patchsource_id INTEGER,
+        seriesid TEXT,
+        position INTEGER,
+        patch TEXT,
+        PRIMARY KEY(patchsource_id, seriesid, position),
+        FOREIGN KEY(patchsource_id) REFERENCES patchsource(id)
+);
+
+CREATE TABLE IF NOT EXISTS lastseenpatch(
+        patchsource_id INTEGER PRIMARY KEY,
+        patch_id INTEGER,
+        FOREIGN KEY(patchsource_id) REFERENCES patchsource(id)
+);
@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS incompleteseries(
+        patchsource_id INTEGER,
+        series_id INTEGER,
+        PRIMARY KEY(patchsource_id, series_id),
+        FOREIGN KEY(patchsource_id) REFERENCES patchsource(id)
+);
@@ -16,17 +16,26 @@ import logging
 import os
 import re
 import subprocess
+import threading
 import time
 
 import sktm.db
 import sktm.jenkins
-from sktm.misc import TestResult, JobType
+import sktm.notify
+from sktm.misc import TestResult, JobType, parallel_map
 import sktm.patchwork
 
+# Interval between polls of all pending builds, in seconds, without a build
+# notification listener
+POLL_INTERVAL = 60
+# Maximum number of Patchwork projects to check in parallel
+PROJECT_WORKERS = 8
+
 
 # TODO This is no longer just a watcher. Rename/refactor/describe accordingly.
 class watcher(object):
-    def __init__(self, jenkins_project, dbpath, patch_filter, makeopts=None):
+    def __init__(self, jenkins_project, dbpath, patch_filter, makeopts=None,
+                 build_workers=1, project_workers=PROJECT_WORKERS):
         """
         Initialize a "watcher".
 
@@ -43,6 +52,10 @@ class watcher(object):
                                 All other exit codes are reserved.
             makeopts:           Extra arguments to pass to "make" when
                                 building.
+            build_workers:      Maximum number of Jenkins builds to submit
+                                in parallel, per Patchwork interface.
+            project_workers:    Maximum number of Patchwork interfaces to
+                                check in parallel.
         """
         # FIXME Clarify/fix member variable names
         # Database instance
@@ -53,6 +66,10 @@ class watcher(object):
         self.patch_filter = patch_filter
         # Extra arguments to pass to "make"
         self.makeopts = makeopts
+        # Maximum number of Jenkins builds to submit in parallel
+        self.build_workers = build_workers
+        # Maximum number of Patchwork interfaces to check in parallel
+        self.project_workers = project_workers
         # List of pending Jenkins builds, each one represented by a 3-tuple
         # containing:
         # * Build type (JobType)
@@ -61,6 +78,19 @@ class watcher(object):
         self.pj = list()
         # List of Patchwork interfaces
         self.pw = list()
+        # Lock serializing access to the database and the list of pending
+        # builds from Patchwork checking threads
+        self.lock = threading.RLock()
+        # List of descriptions of Patchwork projects which failed to be
+        # checked by the last check_patchwork() call
+        self.failed_pw = list()
+        # Patch message cache shared by the Patchwork interfaces, so every
+        # patch mbox is retrieved at most once per run
+        self.message_cache = sktm.patchwork.MessageCache()
+        # Listener of finished build notifications, set by listen() call
+        self.listener = None
+        # Interval between polls of all pending builds with the listener
+        self.poll_interval = POLL_INTERVAL
         # Baseline-related attributes, set by set_baseline() call
         self.baserepo = None
         self.baseref = None
@@ -82,13 +112,54 @@ class watcher(object):
         self.cfgurl = cfgurl
         self.force_enqueue_job = force
 
+    def listen(self, port, poll_interval=sktm.notify.DEFAULT_POLL_INTERVAL,
+               address=sktm.notify.DEFAULT_ADDRESS):
+        """
+        Start accepting notifications of finished Jenkins builds, so their
+        results are processed as soon as they're notified, and all pending
+        builds are polled only as a fallback.
+
+        Args:
+            port:           The port to listen for notifications on.
+            poll_interval:  Interval between polls of all pending builds, in
+                            seconds.
+            address:        The address to listen for notifications on, an
+                            empty string for all addresses.
+        """
+        self.listener = sktm.notify.NotificationListener(port, self.jk.name,
+                                                         address)
+        self.poll_interval = poll_interval
+
+    def __stop_listening(self):
+        """Stop accepting notifications of finished builds, if accepting."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
     def cleanup(self):
         for (pjt, bid, _) in self.pj:
             logging.warning("Quiting before job completion: %d/%d", bid, pjt)
+        self.__stop_listening()
+        self.flush_patch_checks()
+
+    def flush_patch_checks(self):
+        """
+        Wait for patch checks queued by all Patchwork interfaces to be
+        posted.
+        """
+        for cpw in self.pw:
+            cpw.flush_patch_checks()
 
     # FIXME Pass patchwork type via arguments, or pass a whole interface
     def add_pw(self, baseurl, pname, lpatch=None, restapi=False, apikey=None,
-               skip=[]):
+               skip=[], session=None,
+               workers=sktm.patchwork.DEFAULT_WORKERS,
+               per_page=sktm.patchwork.DEFAULT_PER_PAGE,
+               max_pages=sktm.patchwork.DEFAULT_MAX_PAGES,
+               discovery=sktm.patchwork.DISCOVERY_PATCHES,
+               series_mbox=False,
+               check_workers=sktm.patchwork.DEFAULT_CHECK_WORKERS,
+               rpc_gzip_threshold=None):
         """
         Add a Patchwork interface with specified parameters.
 
@@ -102,10 +173,29 @@ class watcher(object):
             apikey:         Patchwork REST API authentication token.
             skip:           List of additional regex patterns to skip in patch
                             names, case insensitive.
+            session:        Patchwork HTTP session (PatchworkSession) to use,
+                            or None to use the shared default one.
+            workers:        Maximum number of threads to retrieve Patchwork
+                            objects with, in parallel.
+            per_page:       Number of objects to request per page of REST
+                            API lists.
+            max_pages:      Maximum number of REST API list pages to retrieve
+                            per list.
+            discovery:      REST API new series discovery mode, one of
+                            sktm.patchwork.DISCOVERY_CHOICES.
+            series_mbox:    True if REST API patch headers should be
+                            retrieved with a single mbox per series.
+            check_workers:  Maximum number of threads to post REST API patch
+                            checks with, in parallel.
+            rpc_gzip_threshold: Minimum size of XML RPC request bodies to
+                                gzip, in bytes, or None to never gzip
+                                requests.
         """
         if restapi:
             pw = sktm.patchwork.PatchworkV2Project(
-                baseurl, pname, lpatch, apikey, skip
+                baseurl, pname, lpatch, apikey, skip, session, workers,
+                per_page, max_pages, discovery, series_mbox, check_workers,
+                message_cache=self.message_cache
             )
 
             if lpatch is None:
@@ -119,9 +209,16 @@ class watcher(object):
                                     "please provide initial patch id" %
                                     (baseurl, pname))
                 pw.since = since
+
+            if discovery == sktm.patchwork.DISCOVERY_SERIES:
+                # Check series left incomplete by previous runs again
+                pw.set_incomplete_series(
+                    self.db.get_incomplete_series(baseurl, pw.project_id)
+                )
         else:
             pw = sktm.patchwork.PatchworkV1Project(
-                baseurl, pname, lpatch, skip
+                baseurl, pname, lpatch, skip, session, workers,
+                rpc_gzip_threshold, message_cache=self.message_cache
             )
 
             if lpatch is None:
@@ -129,12 +226,18 @@ class watcher(object):
                                                          pw.project_id)
                 lppatch = self.db.get_last_pending_patch(baseurl,
                                                          pw.project_id)
-                lpatch = max(lcpatch, lppatch)
+                lspatch = self.db.get_last_seen_patch(baseurl, pw.project_id)
+                lpatch = max(lcpatch, lppatch, lspatch)
                 if lpatch is None:
                     raise Exception("%s project: %s was never tested before, "
                                     "please provide initial patch id" %
                                     (baseurl, pname))
                 pw.lastpatch = lpatch
+
+            # Continue assembling series left incomplete by previous runs
+            pw.set_partial_series(
+                self.db.get_partial_series(baseurl, pw.project_id)
+            )
         self.pw.append(pw)
 
     def get_commit_hash(self, repo, ref):
@@ -177,7 +280,8 @@ class watcher(object):
         which shouldn't be tested at all.
 
         Args:
-            series_summary_list:  The list of summaries of series to filter.
+            series_summary_list:  An iterable of summaries of series to
+                                  filter. It is only iterated once.
         Returns:
             A tuple of series summary lists:
                 - series ready for testing,
@@ -186,8 +290,9 @@ class watcher(object):
         ready = []
         dropped = []
 
-        if self.patch_filter:
-            for series_summary in series_summary_list:
+        for series_summary in series_summary_list:
+            logging.info("new series: %s", series_summary.get_obj_url_list())
+            if self.patch_filter:
                 argv = [self.patch_filter]
                 if series_summary.cover_letter:
                     argv += ["--cover",
@@ -210,8 +315,8 @@ class watcher(object):
                 else:
                     raise Exception("Filter command %s returned "
                                     "invalid status %d" % (cmd, status))
-        else:
-            ready += series_summary_list
+            else:
+                ready.append(series_summary)
 
         return ready, dropped
 
@@ -226,29 +331,190 @@ class watcher(object):
         Returns: Patch info tuple (patch_id, patch_name, patch_url, baseurl,
                                    project_id, patch_date).
         """
-        match = re.match(r'(.*)/patch/(\d+)$', patch_url)
-        if not match:
-            raise Exception('Malformed patch url: %s' % patch_url)
+        return self.get_patch_info_list_from_urls(interface, [patch_url])[0]
 
-        baseurl = match.group(1)
-        patch_id = int(match.group(2))
-        patch = interface.get_patch_by_id(patch_id)
-        logging.info('patch: [%d] %s', patch_id, patch.get('name'))
+    def get_patch_info_list_from_urls(self, interface, patch_url_list):
+        """
+        Retrieve patch info tuples for a list of patch URLs, looking the
+        patches up in batches.
 
-        if isinstance(interface, sktm.patchwork.PatchworkV2Project):
-            project_id = int(patch.get('project').get('id'))
-        else:
-            project_id = int(patch.get('project_id'))
+        Args:
+            interface:      Interface of the Patchwork project the patches
+                            belong to.
+            patch_url_list: List of URLs of the patches to retrieve info
+                            tuples for.
 
-        return (patch_id, patch.get('name'), patch_url, baseurl, project_id,
-                patch.get('date').replace(' ', 'T'))
+        Returns: List of patch info tuples (patch_id, patch_name, patch_url,
+                 baseurl, project_id, patch_date), in the order of the URLs.
+        """
+        baseurl_list = list()
+        patch_id_list = list()
+        for patch_url in patch_url_list:
+            match = re.match(r'(.*)/patch/(\d+)$', patch_url)
+            if not match:
+                raise Exception('Malformed patch url: %s' % patch_url)
+            baseurl_list.append(match.group(1))
+            patch_id_list.append(int(match.group(2)))
+
+        patch_list = interface.get_patches_by_id(patch_id_list)
+
+        patch_info_list = list()
+        for patch_url, baseurl, patch_id, patch in zip(patch_url_list,
+                                                       baseurl_list,
+                                                       patch_id_list,
+                                                       patch_list):
+            logging.info('patch: [%d] %s', patch_id, patch.get('name'))
+
+            if isinstance(interface, sktm.patchwork.PatchworkV2Project):
+                project_id = int(patch.get('project').get('id'))
+            else:
+                project_id = int(patch.get('project_id'))
+
+            patch_info_list.append((patch_id, patch.get('name'), patch_url,
+                                    baseurl, project_id,
+                                    patch.get('date').replace(' ', 'T')))
+
+        return patch_info_list
+
+    def __check_project(self, cpw, stablecommit):
+        """
+        Submit and register Jenkins builds for new and expired pending series
+        of a single Patchwork interface. Builds are submitted in parallel, up
+        to self.build_workers at once. Can be called from multiple threads
+        for different interfaces, database and pending build list access is
+        serialized with self.lock.
+
+        Args:
+            cpw:            The Patchwork interface to check.
+            stablecommit:   The commit hash of the baseline to test on.
+        """
+        series_list = list()
+        # Get series summaries for all patches the Patchwork interface
+        # hasn't seen yet
+        series_ready, series_dropped = \
+            self.filter_patchsets(cpw.get_new_patchsets())
+        for series in series_ready:
+            logging.info("ready series: %s", series.get_obj_url_list())
+        for series in series_dropped:
+            logging.info("dropped series: %s", series.get_obj_url_list())
+
+            # Retrieve all data and save dropped patches in the DB
+            patches = self.get_patch_info_list_from_urls(
+                cpw, series.get_patch_url_list()
+            )
+
+            with self.lock:
+                self.db.commit_series(patches)
+
+        series_list += series_ready
+        # Add series summaries for all patches staying pending for
+        # longer than 12 hours
+        with self.lock:
+            expired_list = self.db.get_expired_pending_patches(cpw.baseurl,
+                                                               cpw.project_id,
+                                                               43200)
+        series_list += cpw.get_patchsets(expired_list)
+        # Submit Jenkins builds for the series in parallel
+        buildid_list = parallel_map(
+            lambda series: self.__submit_series(series, stablecommit),
+            series_list, self.build_workers
+        )
+        with self.lock:
+            for series, buildid in zip(series_list, buildid_list):
+                # Remember successfully submitted builds
+                if buildid is not None:
+                    self.pj.append((JobType.PATCHWORK, buildid, cpw))
+
+                # (Re-)add the series' patches to the "pending" list, so
+                # series which failed to be submitted are retried, once
+                # expired
+                self.db.set_patchset_pending(cpw.baseurl, cpw.project_id,
+                                             series.get_patch_info_list())
+
+        failed = buildid_list.count(None)
+        if failed:
+            logging.error("failed submitting %d of %d series, left pending",
+                          failed, len(series_list))
+
+        with self.lock:
+            if isinstance(cpw, sktm.patchwork.PatchworkV1Project):
+                # Save incomplete series for the next run
+                self.db.set_partial_series(cpw.baseurl, cpw.project_id,
+                                           cpw.lastpatch,
+                                           cpw.get_partial_series())
+            elif cpw.discovery == sktm.patchwork.DISCOVERY_SERIES:
+                # Save IDs of series still incomplete for the next run
+                self.db.set_incomplete_series(cpw.baseurl, cpw.project_id,
+                                              cpw.get_incomplete_series())
+
+    def __submit_series(self, series, stablecommit):
+        """
+        Submit a Jenkins build for a series, logging any failure instead of
+        raising an exception. Can be called from multiple threads.
+
+        Args:
+            series:         The summary of the series to submit
+                            (sktm.patchwork.SeriesSummary).
+            stablecommit:   The commit hash of the baseline to test on.
+
+        Returns:
+            The submitted build number, or None if submitting failed.
+        """
+        url_list = series.get_patch_url_list()
+        try:
+            buildid = self.jk.build(baserepo=self.baserepo,
+                                    ref=stablecommit,
+                                    baseconfig=self.cfgurl,
+                                    message_id=series.message_id,
+                                    subject=series.subject,
+                                    emails=series.email_addr_set,
+                                    patch_url_list=url_list,
+                                    makeopts=self.makeopts)
+        except Exception:
+            logging.exception("failed submitting series: %s", url_list)
+            return None
+
+        logging.info("submitted message ID: %s", series.message_id)
+        logging.info("submitted subject: %s", series.subject)
+        logging.info("submitted emails: %s", series.email_addr_set)
+        logging.info("submitted series: %s", url_list)
+        return buildid
+
+    def __check_project_isolated(self, cpw, stablecommit):
+        """
+        Check a single Patchwork interface, see __check_project(), logging
+        any failure instead of raising an exception.
+
+        Args:
+            cpw:            The Patchwork interface to check.
+            stablecommit:   The commit hash of the baseline to test on.
+
+        Returns:
+            True if the interface was checked successfully, False otherwise.
+        """
+        try:
+            self.__check_project(cpw, stablecommit)
+            return True
+        except Exception:
+            logging.exception("failed checking %s project %d",
+                              cpw.baseurl, cpw.project_id)
+            return False
 
     def check_patchwork(self):
         """
         Submit and register Jenkins builds for series which appeared in
         Patchwork instances after their last processed patches, and for
         series which are comprised of patches added to the "pending" list
-        in the database, more than 12 hours ago.
+        in the database, more than 12 hours ago. Patchwork interfaces are
+        checked in parallel, up to self.project_workers at once, each one
+        from retrieving its series to recording them as pending, so a slow
+        interface doesn't delay the others. A failure checking one interface
+        doesn't prevent checking the others, or processing builds submitted
+        for them.
+
+        Returns:
+            The list of descriptions of Patchwork projects which failed to
+            be checked, also stored in self.failed_pw.
         """
         stablecommit = self.db.get_stable(self.baserepo)
         if not stablecommit:
@@ -256,63 +522,45 @@ class watcher(object):
                             self.baserepo)
 
         logging.info("stable commit for %s is %s", self.baserepo, stablecommit)
-        # For every Patchwork interface
-        for cpw in self.pw:
-            series_list = list()
-            # Get series summaries for all patches the Patchwork interface
-            # hasn't seen yet
-            new_series = cpw.get_new_patchsets()
-            for series in new_series:
-                logging.info("new series: %s", series.get_obj_url_list())
-            series_ready, series_dropped = self.filter_patchsets(new_series)
-            for series in series_ready:
-                logging.info("ready series: %s", series.get_obj_url_list())
-            for series in series_dropped:
-                logging.info("dropped series: %s", series.get_obj_url_list())
-
-                # Retrieve all data and save dropped patches in the DB
-                patches = []
-                for patch_url in series.get_patch_url_list():
-                    patches.append(self.get_patch_info_from_url(cpw,
-                                                                patch_url))
-
-                self.db.commit_series(patches)
-
-            series_list += series_ready
-            # Add series summaries for all patches staying pending for
-            # longer than 12 hours
-            series_list += cpw.get_patchsets(
-                self.db.get_expired_pending_patches(cpw.baseurl,
-                                                    cpw.project_id,
-                                                    43200)
-            )
-            # For each series summary
-            for series in series_list:
-                # Submit and remember a Jenkins build for the series
-                url_list = series.get_patch_url_list()
-                self.pj.append((JobType.PATCHWORK,
-                                self.jk.build(
-                                    baserepo=self.baserepo,
-                                    ref=stablecommit,
-                                    baseconfig=self.cfgurl,
-                                    message_id=series.message_id,
-                                    subject=series.subject,
-                                    emails=series.email_addr_set,
-                                    patch_url_list=url_list,
-                                    makeopts=self.makeopts),
-                                cpw))
-                logging.info("submitted message ID: %s", series.message_id)
-                logging.info("submitted subject: %s", series.subject)
-                logging.info("submitted emails: %s", series.email_addr_set)
-                logging.info("submitted series: %s", url_list)
-
-                # (Re-)add the series' patches to the "pending" list
-                self.db.set_patchset_pending(cpw.baseurl, cpw.project_id,
-                                             series.get_patch_info_list())
+        result_list = parallel_map(
+            lambda cpw: self.__check_project_isolated(cpw, stablecommit),
+            self.pw, self.project_workers
+        )
+        logging.info("patch message cache: %d hits, %d misses",
+                     self.message_cache.hits, self.message_cache.misses)
+
+        self.failed_pw = ["%s project %d" % (cpw.baseurl, cpw.project_id)
+                          for cpw, result in zip(self.pw, result_list)
+                          if not result]
+        if self.failed_pw:
+            logging.error("failed checking %d of %d Patchwork projects: %s",
+                          len(self.failed_pw), len(result_list),
+                          ", ".join(self.failed_pw))
+        return self.failed_pw
+
+    def check_pending(self, finished_set=None):
+        """
+        Check completion of pending Jenkins builds with a single batch
+        request, and process results of the completed ones.
 
-    def check_pending(self):
-        for (pjt, bid, cpw) in self.pj:
-            if self.jk.is_build_complete(bid):
+        Args:
+            finished_set:   A set of IDs of builds notified as finished, to
+                            check completion of instead of all pending
+                            builds, or None to check all. Notifications are
+                            not authenticated, so completion is still
+                            confirmed with Jenkins, and IDs of builds which
+                            are not pending are ignored.
+        """
+        bid_list = [bid for (_, bid, _) in self.pj]
+        if finished_set is not None:
+            ignored_set = finished_set.difference(bid_list)
+            if ignored_set:
+                logging.info("ignoring notified builds not pending: %s",
+                             sorted(ignored_set))
+            bid_list = [bid for bid in bid_list if bid in finished_set]
+        completion_dict = self.jk.get_build_completion(bid_list)
+        for (pjt, bid, cpw) in list(self.pj):
+            if completion_dict.get(bid):
                 bres = self.jk.get_result(bid)
                 rurl = self.jk.get_result_url(bid)
                 basehash = self.jk.get_base_hash(bid)
@@ -336,22 +584,40 @@ class watcher(object):
                         bid
                     )
                 elif pjt == JobType.PATCHWORK:
-                    patches = list()
-
                     patch_url_list = self.jk.get_patch_url_list(bid)
-                    for patch_url in patch_url_list:
-                        patches.append(self.get_patch_info_from_url(cpw,
-                                                                    patch_url))
+                    patches = self.get_patch_info_list_from_urls(
+                        cpw, patch_url_list
+                    )
 
                     self.db.commit_tested(patches)
                 else:
                     raise Exception("Unknown job type: %d" % pjt)
 
     def wait_for_pending(self):
+        """
+        Wait for all pending Jenkins builds to complete, processing their
+        results. Builds are polled every POLL_INTERVAL seconds, or, if
+        listening for notifications, results of notified builds are
+        processed as they arrive, and all builds are polled every
+        self.poll_interval seconds.
+        """
         self.check_pending()
+        poll_time = time.time()
         while self.pj:
             logging.debug("waiting for jobs to complete. %d remaining",
                           len(self.pj))
-            time.sleep(60)
+            if self.listener is None:
+                time.sleep(POLL_INTERVAL)
+            else:
+                finished_set = self.listener.wait(
+                    max(poll_time + self.poll_interval - time.time(), 0)
+                )
+                if finished_set:
+                    self.check_pending(finished_set)
+                if time.time() < poll_time + self.poll_interval:
+                    continue
             self.check_pending()
+            poll_time = time.time()
         logging.info("no more pending jobs")
+        self.__stop_listening()
+        self.flush_patch_checks()
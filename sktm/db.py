@@ -13,6 +13,7 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
 from __future__ import print_function
+import json
 import logging
 import os
 import sqlite3
@@ -26,8 +27,11 @@ class SktDb(object):
         if not os.path.isfile(db):
             self.__createdb(db)
 
-        self.conn = sqlite3.connect(db)
+        # Allow use from multiple threads, which have to serialize access,
+        # as the watcher does with its lock
+        self.conn = sqlite3.connect(db, check_same_thread=False)
         self.cur = self.conn.cursor()
+        self.__create_missing_tables()
 
     def __del__(self):
         self.conn.close()
@@ -89,6 +93,35 @@ class SktDb(object):
         cur.close()
         conn.close()
 
+    def __create_missing_tables(self):
+        """
+        Create tables added after the database was created, so databases
+        created by older versions keep working without manual migration.
+        """
+        self.cur.executescript("""
+                CREATE TABLE IF NOT EXISTS partialseries(
+                  patchsource_id INTEGER,
+                  seriesid TEXT,
+                  position INTEGER,
+                  patch TEXT,
+                  PRIMARY KEY(patchsource_id, seriesid, position),
+                  FOREIGN KEY(patchsource_id) REFERENCES patchsource(id)
+                );
+
+                CREATE TABLE IF NOT EXISTS lastseenpatch(
+                  patchsource_id INTEGER PRIMARY KEY,
+                  patch_id INTEGER,
+                  FOREIGN KEY(patchsource_id) REFERENCES patchsource(id)
+                );
+
+                CREATE TABLE IF NOT EXISTS incompleteseries(
+                  patchsource_id INTEGER,
+                  series_id INTEGER,
+                  PRIMARY KEY(patchsource_id, series_id),
+                  FOREIGN KEY(patchsource_id) REFERENCES patchsource(id)
+                );""")
+        self.conn.commit()
+
     def __create_repoid(self, baserepo):
         """Create a repoid for a git repo URL.
 
@@ -239,6 +272,131 @@ class SktDb(object):
 
         return result[0]
 
+    def get_last_seen_patch(self, baseurl, project_id):
+        """Get the maximum ID of patches seen while assembling series.
+
+        Args:
+            baseurl:    Base URL of the Patchwork instance.
+            project_id: Project ID in Patchwork.
+
+        """
+        sourceid = self.__get_sourceid(baseurl, project_id)
+
+        self.cur.execute('SELECT patch_id FROM lastseenpatch WHERE '
+                         'patchsource_id = ?',
+                         (sourceid,))
+        result = self.cur.fetchone()
+
+        if not result:
+            return None
+
+        return result[0]
+
+    def get_partial_series(self, baseurl, project_id):
+        """
+        Get the patches of partially assembled series, saved with
+        set_partial_series().
+
+        Args:
+            baseurl:    Base URL of the Patchwork instance.
+            project_id: Project ID in Patchwork.
+
+        Returns:
+            List of tuples, each containing a series ID, a patch position in
+            the series (zero for cover letters), and a patch object
+            dictionary.
+        """
+        sourceid = self.__get_sourceid(baseurl, project_id)
+
+        self.cur.execute('SELECT seriesid, position, patch '
+                         'FROM partialseries WHERE '
+                         'patchsource_id = ? '
+                         'ORDER BY seriesid, position',
+                         (sourceid,))
+
+        return [(seriesid, position, json.loads(patch))
+                for (seriesid, position, patch) in self.cur.fetchall()]
+
+    def set_partial_series(self, baseurl, project_id, last_patch_id,
+                           partial_series):
+        """
+        Replace the saved patches of partially assembled series and the
+        maximum ID of patches seen while assembling them.
+
+        Args:
+            baseurl:        Base URL of the Patchwork instance.
+            project_id:     Project ID in Patchwork.
+            last_patch_id:  Maximum ID of patches seen.
+            partial_series: List of tuples, each containing a series ID, a
+                            patch position in the series (zero for cover
+                            letters), and a patch object dictionary.
+
+        """
+        sourceid = self.__get_sourceid(baseurl, project_id)
+
+        logging.debug("saving %d patches of partial series for %s (%d)",
+                      len(partial_series), baseurl, project_id)
+        self.cur.execute('DELETE FROM partialseries WHERE '
+                         'patchsource_id = ?',
+                         (sourceid,))
+        self.cur.executemany('INSERT OR REPLACE INTO '
+                             'partialseries(patchsource_id, seriesid, '
+                             'position, patch) '
+                             'VALUES(?, ?, ?, ?)',
+                             [(sourceid, seriesid, position,
+                               json.dumps(patch))
+                              for (seriesid, position, patch)
+                              in partial_series])
+        self.cur.execute('INSERT OR REPLACE INTO '
+                         'lastseenpatch(patchsource_id, patch_id) '
+                         'VALUES(?, ?)',
+                         (sourceid, last_patch_id))
+        self.conn.commit()
+
+    def get_incomplete_series(self, baseurl, project_id):
+        """
+        Get the IDs of series found incomplete when listed, saved with
+        set_incomplete_series().
+
+        Args:
+            baseurl:    Base URL of the Patchwork instance.
+            project_id: Project ID in Patchwork.
+
+        Returns:
+            A sorted list of series IDs.
+        """
+        sourceid = self.__get_sourceid(baseurl, project_id)
+
+        self.cur.execute('SELECT series_id FROM incompleteseries WHERE '
+                         'patchsource_id = ? '
+                         'ORDER BY series_id',
+                         (sourceid,))
+
+        return [series_id for (series_id,) in self.cur.fetchall()]
+
+    def set_incomplete_series(self, baseurl, project_id, series_id_list):
+        """
+        Replace the saved IDs of series found incomplete when listed.
+
+        Args:
+            baseurl:        Base URL of the Patchwork instance.
+            project_id:     Project ID in Patchwork.
+            series_id_list: List of series IDs.
+        """
+        sourceid = self.__get_sourceid(baseurl, project_id)
+
+        logging.debug("saving %d incomplete series for %s (%d)",
+                      len(series_id_list), baseurl, project_id)
+        self.cur.execute('DELETE FROM incompleteseries WHERE '
+                         'patchsource_id = ?',
+                         (sourceid,))
+        self.cur.executemany('INSERT OR REPLACE INTO '
+                             'incompleteseries(patchsource_id, series_id) '
+                             'VALUES(?, ?)',
+                             [(sourceid, series_id)
+                              for series_id in series_id_list])
+        self.conn.commit()
+
     def get_expired_pending_patches(self, baseurl, project_id, exptime=86400):
         """
         Get a list of IDs of patches set as pending for longer than the
@@ -12,6 +12,7 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
+from __future__ import print_function
 import argparse
 import ConfigParser
 import logging
@@ -22,7 +23,12 @@ import sys
 from contextlib import contextmanager
 import sktm.reporter
 import sktm
+import sktm.fakepatchwork
+import sktm.httpcache
 import sktm.jenkins
+import sktm.notify
+import sktm.patchwork
+import sktm.ratelimit
 
 
 DEFAULT_REPORT_INTRO = os.path.join(
@@ -35,6 +41,64 @@ DEFAULT_REPORT_FOOTER = os.path.join(
 )
 
 DEFAULT_JENKINS_RETRY_COUNT = 30
+DEFAULT_JENKINS_WORKERS = 4
+
+
+def add_pw_tuning_arguments(parser):
+    """
+    Add arguments tuning Patchwork access to a command line parser.
+
+    Args:
+        parser: The parser to add the arguments to.
+    """
+    parser.add_argument("--pw-pool-size", type=int,
+                        help="Maximum number of keep-alive "
+                        "connections to keep per Patchwork host, "
+                        "default to %d" %
+                        sktm.patchwork.DEFAULT_POOL_SIZE)
+    parser.add_argument("--pw-timeout", type=float,
+                        help="Patchwork request timeout in seconds, "
+                        "default to %d" %
+                        sktm.patchwork.DEFAULT_TIMEOUT)
+    parser.add_argument("--pw-workers", type=int,
+                        help="Maximum number of threads to "
+                        "retrieve Patchwork series and patches "
+                        "with, default to %d" %
+                        sktm.patchwork.DEFAULT_WORKERS)
+    parser.add_argument("--pw-per-page", type=int,
+                        help="Number of objects to request per "
+                        "page of REST API lists, default to %d" %
+                        sktm.patchwork.DEFAULT_PER_PAGE)
+    parser.add_argument("--pw-max-pages", type=int,
+                        help="Maximum number of REST API list pages "
+                        "to retrieve per run, default to %d" %
+                        sktm.patchwork.DEFAULT_MAX_PAGES)
+    parser.add_argument("--pw-discovery",
+                        choices=sktm.patchwork.DISCOVERY_CHOICES,
+                        help="REST API new series discovery mode: "
+                        "list new patches and retrieve their "
+                        "series, or list new series directly, "
+                        "default to %s" %
+                        sktm.patchwork.DISCOVERY_PATCHES)
+    parser.add_argument("--pw-series-mbox", action="store_true",
+                        default=None,
+                        help="Retrieve REST API patch headers "
+                        "with a single mbox per series")
+    parser.add_argument("--pw-check-workers", type=int,
+                        help="Maximum number of threads to post "
+                        "REST API patch checks with, default to %d" %
+                        sktm.patchwork.DEFAULT_CHECK_WORKERS)
+    parser.add_argument("--pw-rpc-gzip-threshold", type=int,
+                        help="Minimum size of XML RPC requests to "
+                        "gzip, in bytes, default to no gzipping")
+    parser.add_argument("--pw-rate", type=float,
+                        help="Maximum sustained rate of requests "
+                        "per Patchwork host, requests per second, "
+                        "default to zero, i.e. no rate limit")
+    parser.add_argument("--pw-max-concurrency", type=int,
+                        help="Maximum number of concurrent "
+                        "requests per Patchwork host, default to %d" %
+                        sktm.ratelimit.DEFAULT_MAX_CONCURRENCY)
 
 
 def setup_parser():
@@ -61,6 +125,23 @@ def setup_parser():
                         help="Counter to retry Jenkins, default to %d" %
                         DEFAULT_JENKINS_RETRY_COUNT)
     parser.add_argument("--jjname", help="Jenkins job name")
+    parser.add_argument("--jworkers", type=int,
+                        help="Maximum number of Jenkins builds to submit in "
+                        "parallel, default to %d" % DEFAULT_JENKINS_WORKERS)
+    parser.add_argument("--project-workers", type=int,
+                        help="Maximum number of Patchwork projects to check "
+                        "in parallel, default to %d" % sktm.PROJECT_WORKERS)
+    parser.add_argument("--notify-port", type=int,
+                        help="Port to listen for Jenkins build completion "
+                        "notifications on, default to not listening")
+    parser.add_argument("--notify-address",
+                        help="Address to listen for Jenkins build completion "
+                        "notifications on, default to all addresses")
+    parser.add_argument("--notify-poll-interval", type=int,
+                        help="Interval between polls of all pending Jenkins "
+                        "builds while listening for notifications, in "
+                        "seconds, default to %d" %
+                        sktm.notify.DEFAULT_POLL_INTERVAL)
     parser.add_argument("--makeopts", help="Specify options for make")
     parser.add_argument("--cfgurl", type=str, help="Kernel config URL")
 
@@ -127,6 +208,14 @@ def setup_parser():
     parser_patchwork.add_argument('--skip', nargs='+', default=[],
                                   help='Patterns of patch names which should '
                                   'be skipped for testing, case insensitive')
+    add_pw_tuning_arguments(parser_patchwork)
+    parser_patchwork.add_argument("--pw-cache", type=str,
+                                  help="Path to a file to cache Patchwork "
+                                  "responses in between runs")
+    parser_patchwork.add_argument("--pw-cache-size", type=int,
+                                  help="Maximum size of cached Patchwork "
+                                  "responses in MiB, default to %d" %
+                                  (sktm.httpcache.DEFAULT_MAX_SIZE >> 20))
     parser_patchwork.set_defaults(func=cmd_patchwork)
 
     parser_testinfo = subparsers.add_parser("testinfo")
@@ -139,6 +228,36 @@ def setup_parser():
                                help='Directory of assets to report.')
     parser_report.set_defaults(func=cmd_report)
 
+    # Benchmarking of Patchwork interfaces against a fake Patchwork
+    parser_benchmark = subparsers.add_parser('benchmark')
+    parser_benchmark.add_argument("--restapi", help="Use REST API",
+                                  action="store_true", default=False)
+    parser_benchmark.add_argument("--projects", type=int,
+                                  default=sktm.fakepatchwork.DEFAULT_PROJECTS,
+                                  help="Number of projects to synthesize, "
+                                  "default to %(default)d")
+    parser_benchmark.add_argument("--series", type=int,
+                                  default=sktm.fakepatchwork.DEFAULT_SERIES,
+                                  help="Number of series to synthesize per "
+                                  "project, default to %(default)d")
+    parser_benchmark.add_argument("--patches", type=int,
+                                  default=sktm.fakepatchwork.DEFAULT_PATCHES,
+                                  help="Number of patches per series, "
+                                  "default to %(default)d")
+    parser_benchmark.add_argument("--patch-size", type=int,
+                                  default=sktm.fakepatchwork.
+                                  DEFAULT_PATCH_SIZE,
+                                  help="Approximate size of patch mboxes "
+                                  "in bytes, default to %(default)d")
+    parser_benchmark.add_argument("--latency", type=float, default=0,
+                                  help="Time to delay every response by, in "
+                                  "seconds, default to %(default)s")
+    parser_benchmark.add_argument("--error-rate", type=float, default=0,
+                                  help="Probability of failing a request, "
+                                  "from 0 to 1, default to %(default)s")
+    add_pw_tuning_arguments(parser_benchmark)
+    parser_benchmark.set_defaults(func=cmd_benchmark)
+
     return parser
 
 
@@ -165,13 +284,53 @@ def cmd_baseline(sw, cfg):
     sw.enqueue_baseline_job()
 
 
+def make_pw_limiter(cfg):
+    """
+    Create a Patchwork request rate limiter according to the configuration.
+    Concurrency is always limited and adapted, and the rate is limited only
+    if specified.
+
+    Args:
+        cfg:    The configuration dictionary.
+
+    Returns:
+        The rate limiter (sktm.ratelimit.RateLimiter).
+    """
+    return sktm.ratelimit.RateLimiter(
+        cfg.get('pw_rate'),
+        max(sktm.ratelimit.DEFAULT_BURST, int(cfg.get('pw_rate'))),
+        cfg.get('pw_max_concurrency')
+    )
+
+
 def cmd_patchwork(sw, cfg):
     logging.info("checking patchwork: %s [%s]", cfg.get("baseurl"),
                  cfg.get("project"))
     sw.set_baseline(cfg.get("repo"), cfgurl=cfg.get("cfgurl"))
+    cache = None
+    if cfg.get('pw_cache'):
+        cache = sktm.httpcache.HttpCache(
+            os.path.expanduser(cfg.get('pw_cache')),
+            cfg.get('pw_cache_size') << 20
+        )
+    limiter = make_pw_limiter(cfg)
+    session = sktm.patchwork.PatchworkSession(cfg.get('pw_pool_size'),
+                                              cfg.get('pw_timeout'),
+                                              cache, limiter)
     sw.add_pw(cfg.get("baseurl"), cfg.get("project"), cfg.get("lastpatch"),
-              cfg.get('restapi'), cfg.get("apikey"), cfg.get('skip'))
+              cfg.get('restapi'), cfg.get("apikey"), cfg.get('skip'),
+              session, cfg.get('pw_workers'), cfg.get('pw_per_page'),
+              cfg.get('pw_max_pages'), cfg.get('pw_discovery'),
+              cfg.get('pw_series_mbox'), cfg.get('pw_check_workers'),
+              cfg.get('pw_rpc_gzip_threshold'))
     sw.check_patchwork()
+    for host, stats in sorted(limiter.get_stats().items()):
+        logging.info("%s requests: %d, overloads: %d, concurrency "
+                     "limit: %d (decreased %d times), average latency: "
+                     "%.3fs, waited for limits: %.1fs",
+                     host, stats['requests'], stats['overloads'],
+                     stats['concurrency'], stats['decreases'],
+                     stats['latency'], stats['wait_time'])
 
 
 def cmd_testinfo(sw, cfg):
@@ -191,6 +350,48 @@ def cmd_report(cfg):
     report.send_report()
 
 
+def cmd_benchmark(cfg):
+    server = sktm.fakepatchwork.FakePatchwork(cfg.get('projects'),
+                                              cfg.get('series'),
+                                              cfg.get('patches'),
+                                              cfg.get('patch_size'),
+                                              cfg.get('latency'),
+                                              cfg.get('error_rate'))
+
+    def make_interface(project):
+        # Use a new session per interface, as every sktm run does
+        session = sktm.patchwork.PatchworkSession(cfg.get('pw_pool_size'),
+                                                  cfg.get('pw_timeout'),
+                                                  None, make_pw_limiter(cfg))
+        if cfg.get('restapi'):
+            pw = sktm.patchwork.PatchworkV2Project(
+                server.baseurl, project, None, None, [], session,
+                cfg.get('pw_workers'), cfg.get('pw_per_page'),
+                cfg.get('pw_max_pages'), cfg.get('pw_discovery'),
+                cfg.get('pw_series_mbox'), cfg.get('pw_check_workers')
+            )
+            pw.since = server.epoch
+        else:
+            pw = sktm.patchwork.PatchworkV1Project(
+                server.baseurl, project, 0, [], session,
+                cfg.get('pw_workers'), cfg.get('pw_rpc_gzip_threshold')
+            )
+        return pw
+
+    try:
+        result_list = sktm.fakepatchwork.benchmark(server, make_interface)
+    finally:
+        server.stop()
+
+    for result in result_list:
+        print("%(phase)s: %(series)d series, %(failures)d projects failed, "
+              "%(requests)d requests (%(errors)d failed), "
+              "%(request_bytes)d bytes sent, %(response_bytes)d bytes "
+              "received, %(wall_time).3fs, process peak memory so far "
+              "(cumulative, incl. fake server) %(process_peak_memory)d KiB"
+              % result)
+
+
 def load_config(args):
     """
     Load sktm configuration from the command line and the configuration file.
@@ -225,6 +426,81 @@ def load_config(args):
     else:
         cfg['jretry'] = int(cfg.get('jretry'))
 
+    if not cfg.get('jworkers'):
+        cfg['jworkers'] = DEFAULT_JENKINS_WORKERS
+    else:
+        cfg['jworkers'] = int(cfg.get('jworkers'))
+
+    if not cfg.get('project_workers'):
+        cfg['project_workers'] = sktm.PROJECT_WORKERS
+    else:
+        cfg['project_workers'] = int(cfg.get('project_workers'))
+
+    if cfg.get('notify_port') is not None:
+        cfg['notify_port'] = int(cfg.get('notify_port'))
+
+    if cfg.get('notify_address') is None:
+        cfg['notify_address'] = sktm.notify.DEFAULT_ADDRESS
+
+    if not cfg.get('notify_poll_interval'):
+        cfg['notify_poll_interval'] = sktm.notify.DEFAULT_POLL_INTERVAL
+    else:
+        cfg['notify_poll_interval'] = int(cfg.get('notify_poll_interval'))
+
+    if not cfg.get('pw_pool_size'):
+        cfg['pw_pool_size'] = sktm.patchwork.DEFAULT_POOL_SIZE
+    else:
+        cfg['pw_pool_size'] = int(cfg.get('pw_pool_size'))
+
+    if not cfg.get('pw_timeout'):
+        cfg['pw_timeout'] = sktm.patchwork.DEFAULT_TIMEOUT
+    else:
+        cfg['pw_timeout'] = float(cfg.get('pw_timeout'))
+
+    if not cfg.get('pw_workers'):
+        cfg['pw_workers'] = sktm.patchwork.DEFAULT_WORKERS
+    else:
+        cfg['pw_workers'] = int(cfg.get('pw_workers'))
+
+    if not cfg.get('pw_per_page'):
+        cfg['pw_per_page'] = sktm.patchwork.DEFAULT_PER_PAGE
+    else:
+        cfg['pw_per_page'] = int(cfg.get('pw_per_page'))
+
+    if not cfg.get('pw_max_pages'):
+        cfg['pw_max_pages'] = sktm.patchwork.DEFAULT_MAX_PAGES
+    else:
+        cfg['pw_max_pages'] = int(cfg.get('pw_max_pages'))
+
+    if not cfg.get('pw_discovery'):
+        cfg['pw_discovery'] = sktm.patchwork.DISCOVERY_PATCHES
+
+    cfg['pw_series_mbox'] = \
+        str(cfg.get('pw_series_mbox')).lower() in ('true', 'yes', 'on', '1')
+
+    if not cfg.get('pw_check_workers'):
+        cfg['pw_check_workers'] = sktm.patchwork.DEFAULT_CHECK_WORKERS
+    else:
+        cfg['pw_check_workers'] = int(cfg.get('pw_check_workers'))
+
+    if cfg.get('pw_rpc_gzip_threshold') is not None:
+        cfg['pw_rpc_gzip_threshold'] = int(cfg.get('pw_rpc_gzip_threshold'))
+
+    if cfg.get('pw_rate') is None:
+        cfg['pw_rate'] = 0
+    else:
+        cfg['pw_rate'] = float(cfg.get('pw_rate'))
+
+    if not cfg.get('pw_max_concurrency'):
+        cfg['pw_max_concurrency'] = sktm.ratelimit.DEFAULT_MAX_CONCURRENCY
+    else:
+        cfg['pw_max_concurrency'] = int(cfg.get('pw_max_concurrency'))
+
+    if not cfg.get('pw_cache_size'):
+        cfg['pw_cache_size'] = sktm.httpcache.DEFAULT_MAX_SIZE >> 20
+    else:
+        cfg['pw_cache_size'] = int(cfg.get('pw_cache_size'))
+
     return cfg
 
 
@@ -260,8 +536,8 @@ def do_main(args):
     cfg = load_config(args)
     logging.debug("cfg=%s", cfg)
 
-    if args.func == cmd_report:
-        cmd_report(cfg)
+    if args.func in (cmd_report, cmd_benchmark):
+        args.func(cfg)
     else:
         jenkins_project = sktm.jenkins.JenkinsProject(cfg.get("jjname"),
                                                       cfg.get("jurl"),
@@ -270,7 +546,11 @@ def do_main(args):
                                                       cfg.get("jretry"))
 
         sw = sktm.watcher(jenkins_project, cfg.get("db"),
-                          cfg.get("filter"), cfg.get("makeopts"))
+                          cfg.get("filter"), cfg.get("makeopts"),
+                          cfg.get("jworkers"), cfg.get("project_workers"))
+        if cfg.get("notify_port") is not None:
+            sw.listen(cfg.get("notify_port"), cfg.get("notify_poll_interval"),
+                      cfg.get("notify_address"))
 
         args.func(sw, cfg)
         try:
@@ -279,6 +559,12 @@ def do_main(args):
             logging.info("Quitting...")
             sw.cleanup()
 
+        # Report projects which failed to be checked once builds submitted
+        # for the others are processed
+        if sw.failed_pw:
+            sys.exit("Failed checking Patchwork projects: %s" %
+                     ", ".join(sw.failed_pw))
+
 
 if __name__ == '__main__':
     main()
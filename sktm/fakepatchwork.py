@@ -0,0 +1,750 @@
+# Copyright (c) 2018 Red Hat, Inc. All rights reserved. This copyrighted
+# material is made available to anyone wishing to use, modify, copy, or
+# redistribute it subject to the terms and conditions of the GNU General
+# Public License v.2 or later.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import BaseHTTPServer
+import datetime
+import json
+import logging
+import random
+import re
+import resource
+import SimpleXMLRPCServer
+import socket
+import SocketServer
+import threading
+import time
+import urllib
+import urlparse
+import xmlrpclib
+
+import dateutil.parser
+
+
+# Default number of synthesized projects
+DEFAULT_PROJECTS = 1
+# Default number of synthesized series per project
+DEFAULT_SERIES = 100
+# Default number of patches per synthesized series
+DEFAULT_PATCHES = 3
+# Default approximate size of synthesized patch mboxes, in bytes
+DEFAULT_PATCH_SIZE = 4096
+
+# Date of the first synthesized patch
+FIRST_DATE = datetime.datetime(2018, 1, 1)
+# Interval between dates of consecutive synthesized patches
+DATE_STEP = datetime.timedelta(minutes=1)
+# Format of patch dates returned by XML RPC
+RPC_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Names of the benchmark phases, in order of execution
+PHASES = ['get_new_patchsets', 'get_patchsets']
+
+
+class FakePatchworkHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    A request handler of the fake Patchwork server (FakePatchwork).
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Buffer responses, so headers and body are sent together
+    wbufsize = -1
+
+    def setup(self):
+        """
+        Disable Nagle's algorithm, so the last part of responses larger than
+        the buffer isn't delayed until the client acknowledges the rest.
+        """
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY,
+                                   True)
+
+    def log_message(self, *args):
+        """Log requests at debug level only."""
+        logging.debug("fake patchwork: " + args[0], *args[1:])
+
+    def __send(self, status_code, content, content_type='application/json',
+               headers=None):
+        """
+        Send a response and account for it.
+
+        Args:
+            status_code:    The response status code.
+            content:        The response body string.
+            content_type:   The response Content-Type.
+            headers:        A dictionary of additional response headers, or
+                            None.
+        """
+        self.send_response(status_code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+        self.server.account(len(content))
+
+    def __begin(self, body=''):
+        """
+        Account for a received request, delay it by the configured latency,
+        and respond with an error, if the server decides to fail it.
+
+        Args:
+            body:   The request body string.
+
+        Returns:
+            True if the request should be handled, False if it was failed.
+        """
+        self.server.account_request(len(body))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.should_fail():
+            self.__send(503, 'Service Unavailable', 'text/plain')
+            return False
+        return True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve REST API objects and mboxes."""
+        if not self.__begin():
+            return
+
+        url = urlparse.urlsplit(self.path)
+        query = dict((name, value_list[-1]) for name, value_list in
+                     urlparse.parse_qs(url.query).items())
+        result = self.server.get(url.path.rstrip('/'), query)
+        if result is None:
+            self.__send(404, json.dumps({'detail': 'Not found.'}))
+        elif isinstance(result, str):
+            self.__send(200, result, 'application/mbox')
+        else:
+            data, link = result
+            self.__send(200, json.dumps(data), headers={'Link': link}
+                        if link else None)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Serve XML RPC calls and accept REST API patch checks."""
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not self.__begin(body):
+            return
+
+        path = urlparse.urlsplit(self.path).path
+        if path == '/xmlrpc/':
+            if self.headers.get('Content-Encoding') == 'gzip':
+                body = xmlrpclib.gzip_decode(body)
+            self.__send(200, self.server.dispatch(body), 'text/xml')
+        elif re.match(r'^/api/patches/\d+/checks/?$', path):
+            self.__send(201, body)
+        else:
+            self.__send(404, json.dumps({'detail': 'Not found.'}))
+
+
+class FakePatchwork(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer,
+                    SimpleXMLRPCServer.SimpleXMLRPCDispatcher):
+    """
+    A self-contained fake Patchwork server, serving synthesized projects,
+    series and patches over both the REST API and the XML RPC interface,
+    from a thread, with configurable latency and error rate. Counts requests
+    and transferred bytes, so Patchwork client changes can be measured
+    without touching production instances.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, projects=DEFAULT_PROJECTS, series=DEFAULT_SERIES,
+                 patches=DEFAULT_PATCHES, patch_size=DEFAULT_PATCH_SIZE,
+                 latency=0, error_rate=0, seed=0):
+        """
+        Synthesize Patchwork objects and start serving them on a free local
+        port.
+
+        Args:
+            projects:   Number of projects to synthesize.
+            series:     Number of series to synthesize per project.
+            patches:    Number of patches per series.
+            patch_size: Approximate size of patch mboxes, in bytes.
+            latency:    Time to delay every response by, in seconds.
+            error_rate: Probability of failing a request with "503 Service
+                        Unavailable", from 0 to 1.
+            seed:       Seed of the random failure generator.
+        """
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+                                           FakePatchworkHandler)
+        SimpleXMLRPCServer.SimpleXMLRPCDispatcher.__init__(self,
+                                                           allow_none=True,
+                                                           encoding=None)
+        self.register_function(self.__pw_rpc_version, 'pw_rpc_version')
+        self.register_function(self.__project_list, 'project_list')
+        self.register_function(self.__patch_list, 'patch_list')
+        self.register_function(self.__patch_get, 'patch_get')
+        self.register_multicall_functions()
+
+        self.baseurl = 'http://127.0.0.1:%d' % self.server_address[1]
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        # Lock protecting the random generator and the counters
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+        # Date to start looking for new patches from, preceding all patches
+        self.epoch = (FIRST_DATE - DATE_STEP).isoformat()
+        self.project_list = [{'id': pid,
+                              'linkname': 'project%d' % pid,
+                              'name': 'Project %d' % pid}
+                             for pid in range(1, projects + 1)]
+        # Lists of series and patch dictionaries, in order of their IDs,
+        # which start with one
+        self.series_list = list()
+        self.patch_list = list()
+        for _ in range(series):
+            for project in self.project_list:
+                self.__add_series(project, patches)
+        self.body = self.__make_body(patch_size)
+
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        logging.info("fake patchwork serving %d projects, %d series, "
+                     "%d patches at %s", len(self.project_list),
+                     len(self.series_list), len(self.patch_list),
+                     self.baseurl)
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self.shutdown()
+        self.server_close()
+
+    def __add_series(self, project, patches):
+        """
+        Synthesize a series and its patches.
+
+        Args:
+            project:    The dictionary of the project to add the series to.
+            patches:    Number of patches in the series.
+        """
+        sid = len(self.series_list) + 1
+        series = {'id': sid,
+                  'project_id': project['id'],
+                  'name': 'Series %d of %s' % (sid, project['linkname']),
+                  'patch_ids': list()}
+        for position in range(1, patches + 1):
+            pid = len(self.patch_list) + 1
+            if patches > 1:
+                prefix = '[PATCH %d/%d]' % (position, patches)
+            else:
+                prefix = '[PATCH]'
+            self.patch_list.append({
+                'id': pid,
+                'project_id': project['id'],
+                'series_id': sid,
+                'name': '%s %s, part %d' % (prefix, series['name'], position),
+                'date': FIRST_DATE + DATE_STEP * (pid - 1),
+                'msgid': '<%d.%d.%d@fakepatchwork>' % (project['id'], sid,
+                                                       position),
+                'submitter_id': sid % 10 + 1,
+            })
+            series['patch_ids'].append(pid)
+        series['date'] = self.patch_list[series['patch_ids'][0] - 1]['date']
+        self.series_list.append(series)
+
+    @staticmethod
+    def __make_body(patch_size):
+        """
+        Synthesize a patch message body of approximately the specified size.
+
+        Args:
+            patch_size: The body size, in bytes.
+
+        Returns:
+            The body string.
+        """
+        line_list = ['---', ' fake.c | 1 +', '',
+                     'diff --git a/fake.c b/fake.c', '--- a/fake.c',
+                     '+++ b/fake.c', '@@ -1,0 +1,1 @@']
+        size = sum(len(line) + 1 for line in line_list)
+        while size < patch_size:
+            line_list.append('+' + 'x' * 71)
+            size += 73
+        return '\n'.join(line_list) + '\n'
+
+    def reset_stats(self):
+        """Reset the request and byte counters."""
+        with self.lock:
+            self.requests = 0
+            self.errors = 0
+            self.request_bytes = 0
+            self.response_bytes = 0
+
+    def get_stats(self):
+        """
+        Get the request and byte counters.
+
+        Returns:
+            A dictionary with numbers of requests, failed requests, request
+            body bytes and response body bytes.
+        """
+        with self.lock:
+            return {'requests': self.requests,
+                    'errors': self.errors,
+                    'request_bytes': self.request_bytes,
+                    'response_bytes': self.response_bytes}
+
+    def account_request(self, size):
+        """
+        Account for a received request.
+
+        Args:
+            size:   The request body size, in bytes.
+        """
+        with self.lock:
+            self.requests += 1
+            self.request_bytes += size
+
+    def account(self, size):
+        """
+        Account for a sent response.
+
+        Args:
+            size:   The response body size, in bytes.
+        """
+        with self.lock:
+            self.response_bytes += size
+
+    def should_fail(self):
+        """
+        Decide if a request should be failed, according to the error rate.
+
+        Returns:
+            True if the request should be failed, False otherwise.
+        """
+        with self.lock:
+            if self.random.random() < self.error_rate:
+                self.errors += 1
+                return True
+            return False
+
+    def dispatch(self, body):
+        """
+        Dispatch an XML RPC request.
+
+        Args:
+            body:   The XML RPC request body.
+
+        Returns:
+            The XML RPC response body.
+        """
+        return self._marshaled_dispatch(body)
+
+    def get_project_patch_ids(self, project_id):
+        """
+        Get IDs of all patches of a project.
+
+        Args:
+            project_id: The ID of the project.
+
+        Returns:
+            The list of patch IDs, in order.
+        """
+        return [patch['id'] for patch in self.patch_list
+                if patch['project_id'] == project_id]
+
+    def __get_object(self, object_list, oid):
+        """
+        Get an object by ID from a list of objects ordered by ID.
+
+        Args:
+            object_list:    The list of objects.
+            oid:            The object ID, a string or an integer.
+
+        Returns:
+            The object dictionary, or None if not found.
+        """
+        oid = int(oid)
+        if 1 <= oid <= len(object_list):
+            return object_list[oid - 1]
+        return None
+
+    def __url(self, *part_tuple):
+        """
+        Make an absolute URL with the specified path parts.
+
+        Args:
+            *part_tuple:    Path parts to join with slashes.
+
+        Returns:
+            The URL, ending with a slash.
+        """
+        return '/'.join((self.baseurl,) + tuple(str(part)
+                                                for part in part_tuple)) + '/'
+
+    def __rest_project(self, project):
+        """Get the REST representation of a project."""
+        return {'id': project['id'],
+                'url': self.__url('api', 'projects', project['id']),
+                'name': project['name'],
+                'link_name': project['linkname'],
+                'list_id': '%s.example.com' % project['linkname'],
+                'list_email': '%s@example.com' % project['linkname']}
+
+    def __rest_series_ref(self, series):
+        """Get the REST representation of a series embedded in a patch."""
+        return {'id': series['id'],
+                'url': self.__url('api', 'series', series['id']),
+                'name': series['name'],
+                'date': series['date'].isoformat(),
+                'version': 1,
+                'mbox': self.__url('series', series['id'], 'mbox')}
+
+    def __rest_patch_ref(self, patch):
+        """Get the REST representation of a patch embedded in a series."""
+        return {'id': patch['id'],
+                'url': self.__url('api', 'patches', patch['id']),
+                'name': patch['name'],
+                'date': patch['date'].isoformat(),
+                'msgid': patch['msgid'],
+                'mbox': self.__url('patch', patch['id'], 'mbox')}
+
+    def __rest_patch(self, patch):
+        """Get the REST representation of a patch."""
+        data = self.__rest_patch_ref(patch)
+        data.update({
+            'project': self.__rest_project(
+                self.project_list[patch['project_id'] - 1]
+            ),
+            'submitter': {'id': patch['submitter_id'],
+                          'name': 'Submitter %d' % patch['submitter_id'],
+                          'email': 'submitter%d@example.com' %
+                                   patch['submitter_id']},
+            'state': 'new',
+            'archived': False,
+            'check': 'pending',
+            'checks': self.__url('api', 'patches', patch['id'], 'checks'),
+            'series': [self.__rest_series_ref(
+                self.series_list[patch['series_id'] - 1]
+            )],
+        })
+        return data
+
+    def __rest_series(self, series):
+        """Get the REST representation of a series."""
+        data = self.__rest_series_ref(series)
+        data.update({
+            'project': self.__rest_project(
+                self.project_list[series['project_id'] - 1]
+            ),
+            'total': len(series['patch_ids']),
+            'received_total': len(series['patch_ids']),
+            'received_all': True,
+            'cover_letter': None,
+            'patches': [self.__rest_patch_ref(self.patch_list[pid - 1])
+                        for pid in series['patch_ids']],
+        })
+        return data
+
+    def __get_page(self, path, query, object_list, to_rest):
+        """
+        Get a page of a REST object list, filtered by project and date.
+
+        Args:
+            path:           The list URL path.
+            query:          The dictionary of query parameters.
+            object_list:    The list of objects to filter and paginate.
+            to_rest:        The function converting an object to its REST
+                            representation.
+
+        Returns:
+            A tuple containing the list of REST object representations on
+            the page, and the Link header value pointing to the next page,
+            or None if it's the last one.
+        """
+        if query.get('project'):
+            project_id = int(query['project'])
+            object_list = [obj for obj in object_list
+                           if obj['project_id'] == project_id]
+        if query.get('since'):
+            since = dateutil.parser.parse(query['since']).replace(tzinfo=None)
+            object_list = [obj for obj in object_list
+                           if obj['date'] >= since]
+        if query.get('before'):
+            before = dateutil.parser.parse(
+                query['before']
+            ).replace(tzinfo=None)
+            object_list = [obj for obj in object_list
+                           if obj['date'] < before]
+
+        per_page = int(query.get('per_page', 30))
+        page = int(query.get('page', 1))
+        start = (page - 1) * per_page
+        link = None
+        if start + per_page < len(object_list):
+            link = '<%s%s?%s>; rel="next"' % (
+                self.baseurl, path,
+                urllib.urlencode(sorted(dict(query, page=page + 1).items()))
+            )
+        return ([to_rest(obj)
+                 for obj in object_list[start:start + per_page]], link)
+
+    def __get_mbox(self, patch_id_list):
+        """
+        Get an mbox with messages of the specified patches.
+
+        Args:
+            patch_id_list:  List of IDs of the patches.
+
+        Returns:
+            The mbox string.
+        """
+        message_list = list()
+        for pid in patch_id_list:
+            patch = self.patch_list[pid - 1]
+            project = self.project_list[patch['project_id'] - 1]
+            message_list.append(
+                'From patchwork Mon Sep 17 00:00:00 2001\n'
+                'From: Submitter %(submitter)d '
+                '<submitter%(submitter)d@example.com>\n'
+                'To: %(project)s@example.com\n'
+                'Cc: reviewer@example.com\n'
+                'Date: %(date)s\n'
+                'Message-ID: %(msgid)s\n'
+                'Subject: %(name)s\n'
+                'X-Patchwork-Id: %(id)d\n'
+                '\n'
+                '%(body)s\n' % {
+                    'submitter': patch['submitter_id'],
+                    'project': project['linkname'],
+                    'date': patch['date'].strftime(
+                        '%a, %d %b %Y %H:%M:%S +0000'
+                    ),
+                    'msgid': patch['msgid'],
+                    'name': patch['name'],
+                    'id': pid,
+                    'body': self.body,
+                }
+            )
+        return ''.join(message_list)
+
+    def get(self, path, query):
+        """
+        Get the response to a GET request.
+
+        Args:
+            path:   The request URL path, without the trailing slash.
+            query:  The dictionary of query parameters.
+
+        Returns:
+            A tuple containing the JSON data and the Link header value (or
+            None) for REST API requests, an mbox string for mbox requests, or
+            None if nothing is found at the path.
+        """
+        if path == '/api':
+            return ({'projects': self.__url('api', 'projects'),
+                     'patches': self.__url('api', 'patches'),
+                     'series': self.__url('api', 'series')}, None)
+        if path == '/api/patches':
+            return self.__get_page(path, query, self.patch_list,
+                                   self.__rest_patch)
+        if path == '/api/series':
+            return self.__get_page(path, query, self.series_list,
+                                   self.__rest_series)
+
+        match = re.match(r'^/api/projects/([^/]+)$', path)
+        if match:
+            for project in self.project_list:
+                if match.group(1) in (str(project['id']),
+                                      project['linkname']):
+                    return (self.__rest_project(project), None)
+            return None
+        match = re.match(r'^/api/patches/(\d+)$', path)
+        if match:
+            patch = self.__get_object(self.patch_list, match.group(1))
+            return patch and (self.__rest_patch(patch), None)
+        match = re.match(r'^/api/series/(\d+)$', path)
+        if match:
+            series = self.__get_object(self.series_list, match.group(1))
+            return series and (self.__rest_series(series), None)
+        match = re.match(r'^/patch/(\d+)/mbox$', path)
+        if match:
+            patch = self.__get_object(self.patch_list, match.group(1))
+            return patch and self.__get_mbox([patch['id']])
+        match = re.match(r'^/series/(\d+)/mbox$', path)
+        if match:
+            series = self.__get_object(self.series_list, match.group(1))
+            return series and self.__get_mbox(series['patch_ids'])
+        return None
+
+    def __rpc_patch(self, patch):
+        """Get the XML RPC representation of a patch."""
+        return {'id': patch['id'],
+                'name': patch['name'],
+                'date': patch['date'].strftime(RPC_DATE_FORMAT),
+                'msgid': patch['msgid'],
+                'project_id': patch['project_id'],
+                'project': self.project_list[patch['project_id'] - 1]['name'],
+                'submitter_id': patch['submitter_id'],
+                'submitter': 'Submitter %d' % patch['submitter_id'],
+                'state_id': 1,
+                'state': 'New',
+                'archived': False,
+                'filename': 'fake.patch',
+                'commit_ref': '',
+                'hash': ''}
+
+    @staticmethod
+    def __pw_rpc_version():
+        """Return the XML RPC interface version."""
+        return [1, 3, 0]
+
+    def __project_list(self, search_str='', max_count=0):
+        """
+        List projects with link names containing a string.
+
+        Args:
+            search_str: The string to look for in project link names.
+            max_count:  Maximum number of projects to return, zero for all.
+
+        Returns:
+            The list of project dictionaries.
+        """
+        project_list = [dict(project) for project in self.project_list
+                        if search_str.lower() in project['linkname'].lower()]
+        if max_count > 0:
+            project_list = project_list[:max_count]
+        return project_list
+
+    def __patch_get(self, patch_id):
+        """
+        Get a patch by ID.
+
+        Args:
+            patch_id:   The ID of the patch.
+
+        Returns:
+            The patch dictionary, or an empty dictionary if not found.
+        """
+        patch = self.__get_object(self.patch_list, patch_id)
+        return self.__rpc_patch(patch) if patch else {}
+
+    def __patch_list(self, filt=None):
+        """
+        List patches matching a filter, in order of their dates.
+
+        Args:
+            filt:   The filter dictionary, mapping "<field>[__<operation>]"
+                    to values, where field is "id", "project_id",
+                    "submitter_id", or "date", and operation is "gt", "lt",
+                    or "in". A "max_count" key limits the number of patches
+                    to return: the first ones if positive, the last ones if
+                    negative.
+
+        Returns:
+            The list of patch dictionaries.
+        """
+        filt = dict(filt or {})
+        max_count = filt.pop('max_count', 0)
+        patch_list = self.patch_list
+        for key, value in filt.items():
+            field, _, operation = key.partition('__')
+            if field not in ('id', 'project_id', 'submitter_id', 'date'):
+                raise Exception('Unknown patch filter field %s' % field)
+            if field == 'date':
+                if operation == 'in':
+                    value = [dateutil.parser.parse(item) for item in value]
+                else:
+                    value = dateutil.parser.parse(value)
+            if operation == '':
+                patch_list = [patch for patch in patch_list
+                              if patch[field] == value]
+            elif operation == 'gt':
+                patch_list = [patch for patch in patch_list
+                              if patch[field] > value]
+            elif operation == 'lt':
+                patch_list = [patch for patch in patch_list
+                              if patch[field] < value]
+            elif operation == 'in':
+                patch_list = [patch for patch in patch_list
+                              if patch[field] in value]
+            else:
+                raise Exception('Unknown patch filter operation %s' %
+                                operation)
+
+        patch_list = sorted(patch_list, key=lambda patch: patch['date'])
+        if max_count > 0:
+            patch_list = patch_list[:max_count]
+        elif max_count < 0:
+            patch_list = patch_list[max_count:]
+        return [self.__rpc_patch(patch) for patch in patch_list]
+
+
+def get_peak_memory():
+    """
+    Get the peak resident set size of the current process.
+
+    Returns:
+        The peak resident set size, in KiB.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def benchmark(server, make_interface):
+    """
+    Run Patchwork interfaces against a fake Patchwork server: retrieve new
+    series of every project with get_new_patchsets() and then all series of
+    every project by patch IDs with get_patchsets(), and measure each phase.
+    Failures to retrieve series of a project are logged and counted.
+
+    Args:
+        server:         The fake Patchwork server (FakePatchwork).
+        make_interface: A function accepting a project link name and
+                        returning a new Patchwork interface
+                        (sktm.patchwork.PatchworkProject) for it, with its
+                        own patch message cache, ready to retrieve all its
+                        patches as new ones.
+
+    Returns:
+        A list of dictionaries with measurements of each phase: the phase
+        name, numbers of series retrieved and of projects failed, numbers of
+        requests, failed requests, request and response body bytes, wall
+        time in seconds, and the peak resident set size of the whole
+        process so far, in KiB. The latter includes the fake server and all
+        the phases before, so it never decreases from phase to phase.
+    """
+    result_list = list()
+    for phase in PHASES:
+        server.reset_stats()
+        series_count = 0
+        failures = 0
+        start = time.time()
+        for project in server.project_list:
+            try:
+                pw = make_interface(project['linkname'])
+                if phase == 'get_new_patchsets':
+                    series_list = list(pw.get_new_patchsets())
+                else:
+                    series_list = pw.get_patchsets(
+                        server.get_project_patch_ids(project['id'])
+                    )
+                series_count += len(series_list)
+            except Exception:
+                logging.exception("%s failed for %s", phase,
+                                  project['linkname'])
+                failures += 1
+
+        result = server.get_stats()
+        result.update(phase=phase,
+                      series=series_count,
+                      failures=failures,
+                      wall_time=time.time() - start,
+                      process_peak_memory=get_peak_memory())
+        result_list.append(result)
+
+    return result_list
@@ -0,0 +1,182 @@
+# Copyright (c) 2018 Red Hat, Inc. All rights reserved. This copyrighted
+# material is made available to anyone wishing to use, modify, copy, or
+# redistribute it subject to the terms and conditions of the GNU General
+# Public License v.2 or later.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+# Default maximum total size of cached response bodies, in bytes
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Names of response headers to store along with cached response bodies
+STORED_HEADERS = ['Content-Type', 'ETag', 'Last-Modified', 'Link']
+
+# Maximum number of cache hits to delay updating access times of, in the
+# database, until the next stored response
+MAX_PENDING_ATIMES = 1000
+
+
+class HttpCache(object):
+    """
+    A persistent cache of HTTP response bodies, keyed by URL, stored in an
+    SQLite database. The least recently used responses are evicted once the
+    total size of cached bodies exceeds the limit. Safe to use from multiple
+    threads.
+    """
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+        """
+        Initialize an HTTP cache, creating the database, if necessary.
+
+        Args:
+            path:       Path to the cache database file.
+            max_size:   Maximum total size of cached response bodies, in
+                        bytes.
+        """
+        self.max_size = max_size
+        # Number of lookups which found a cached response
+        self.hits = 0
+        # Number of lookups which didn't find a cached response
+        self.misses = 0
+        # Access times of cached responses not yet updated in the database,
+        # by URL
+        self.pending_atimes = dict()
+        # Lock serializing access to the database, the counters, and the
+        # pending access times
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.text_factory = str
+        self.cur = self.conn.cursor()
+        self.cur.execute("""
+                CREATE TABLE IF NOT EXISTS response(
+                  url TEXT PRIMARY KEY,
+                  headers TEXT,
+                  content BLOB,
+                  size INTEGER,
+                  atime REAL
+                )""")
+        self.cur.execute('CREATE INDEX IF NOT EXISTS response_atime '
+                         'ON response(atime)')
+        self.conn.commit()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """
+        Update access times of responses found since the last update, and
+        close the database. The cache cannot be used afterwards.
+        """
+        with self.lock:
+            if self.conn is None:
+                return
+            self.__update_atimes()
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+    def __update_atimes(self):
+        """
+        Update access times of responses found since the last update in the
+        database, without committing. Must be called with the lock held.
+        """
+        self.cur.executemany('UPDATE response SET atime = ? WHERE url = ?',
+                             [(atime, url) for (url, atime)
+                              in self.pending_atimes.items()])
+        self.pending_atimes.clear()
+
+    def get(self, url):
+        """
+        Look up a cached response, marking it as most recently used. Access
+        times are updated in the database in batches, along with the next
+        stored response, once MAX_PENDING_ATIMES are pending, or when the
+        cache is closed.
+
+        Args:
+            url:    The URL the response was retrieved from.
+
+        Returns:
+            A tuple containing the response body and a dictionary of stored
+            response headers, or None if the response is not cached.
+        """
+        with self.lock:
+            self.cur.execute('SELECT headers, content FROM response '
+                             'WHERE url = ?',
+                             (url,))
+            result = self.cur.fetchone()
+            if not result:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.pending_atimes[url] = time.time()
+            if len(self.pending_atimes) >= MAX_PENDING_ATIMES:
+                self.__update_atimes()
+                self.conn.commit()
+
+        return (str(result[1]), json.loads(result[0]))
+
+    def put(self, url, content, headers):
+        """
+        Add a response to the cache, replacing any response cached for the
+        same URL, and evicting the least recently used responses, if the
+        cache is full.
+
+        Args:
+            url:        The URL the response was retrieved from.
+            content:    The response body string.
+            headers:    A dictionary-like object with response headers.
+                        Only the headers listed in STORED_HEADERS are stored.
+        """
+        stored_headers = dict((name, headers.get(name))
+                              for name in STORED_HEADERS
+                              if headers.get(name) is not None)
+        with self.lock:
+            # Evict according to the latest access times
+            self.pending_atimes.pop(url, None)
+            self.__update_atimes()
+            self.cur.execute('INSERT OR REPLACE INTO '
+                             'response(url, headers, content, size, atime) '
+                             'VALUES(?, ?, ?, ?, ?)',
+                             (url, json.dumps(stored_headers),
+                              sqlite3.Binary(content), len(content),
+                              time.time()))
+            self.__evict()
+            self.conn.commit()
+
+    def __evict(self):
+        """
+        Remove the least recently used responses until the total size of
+        cached response bodies fits the limit. Must be called with the lock
+        held.
+        """
+        self.cur.execute('SELECT TOTAL(size) FROM response')
+        total_size = self.cur.fetchone()[0]
+        if total_size <= self.max_size:
+            return
+
+        self.cur.execute('SELECT url, size FROM response ORDER BY atime')
+        evict_list = list()
+        for (url, size) in self.cur.fetchall():
+            if total_size <= self.max_size:
+                break
+            evict_list.append((url,))
+            total_size -= size
+
+        logging.debug("evicting %d responses from HTTP cache",
+                      len(evict_list))
+        self.cur.executemany('DELETE FROM response WHERE url = ?', evict_list)
@@ -12,14 +12,119 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
+import collections
+import copy
 import json
 import logging
+import threading
 import time
+import urllib
 
 import jenkinsapi
 
 from sktm.misc import TestResult, join_with_slash
 
+# Maximum number of completed build snapshots to keep
+SNAPSHOT_CACHE_SIZE = 256
+# Seconds to wait between polls of a queued build
+QUEUE_POLL_INTERVAL = 1
+# Minimum number of the most recent builds to retrieve statuses of, when
+# checking completion of builds
+POLL_WINDOW_MIN = 100
+# Maximum number of builds Jenkins returns in the job's "builds" property,
+# whatever range is requested. The "allBuilds" property has to be used to
+# retrieve more, but is more expensive to produce.
+BUILDS_PROPERTY_MAX = 100
+
+
+class BuildSnapshot(object):
+    """
+    An immutable snapshot of a completed Jenkins build: its URL, status and
+    the steps of its resultset. Step outputs are parsed as JSON once, when
+    first needed, and copies of them are returned.
+    """
+
+    def __init__(self, buildid, url, status, step_list):
+        """
+        Initialize a build snapshot.
+
+        Args:
+            buildid:    Jenkins build ID.
+            url:        URL of the web representation of the build.
+            status:     Build status string, e.g. "SUCCESS" or "UNSTABLE".
+            step_list:  List of tuples, each containing a name of a
+                        resultset step and a dictionary of the step result
+                        values, or None if the build has no resultset.
+        """
+        self.buildid = buildid
+        self.url = url
+        self.status = status
+        self.step_list = step_list
+        # Dictionary of parsed step outputs, by step index
+        self.cfg_dict = dict()
+        # Lock protecting the dictionary of parsed step outputs
+        self.lock = threading.Lock()
+
+    def __get_step_index_list(self, stepname):
+        """
+        Get indexes of resultset steps matching the specified name.
+
+        Args:
+            stepname:   A path matching test steps in the result.
+
+        Returns:
+            The list of step indexes.
+
+        Raises:
+            Exception if the build has no resultset.
+        """
+        if self.step_list is None:
+            raise Exception("No results for build %d (%s)" %
+                            (self.buildid, self.status))
+
+        return [index for index, (name, _) in enumerate(self.step_list)
+                if name == stepname]
+
+    def get_data_list(self, stepname, key):
+        """
+        Get a list of values of a resultset key, for all steps matching the
+        specified name.
+
+        Args:
+            stepname:   A path matching test steps in the result, which
+                        resultset should be accessed.
+            key:        Name of the resultset key to retrieve value of.
+
+        Returns:
+            The list of key values.
+        """
+        return [self.step_list[index][1][key]
+                for index in self.__get_step_index_list(stepname)]
+
+    def get_cfg_list(self, stepname):
+        """
+        Get a list of JSON-formatted outputs of all steps matching the
+        specified name, parsed.
+
+        Args:
+            stepname:   A path matching test steps in the result, which output
+                        should be parsed as JSON.
+
+        Returns:
+            The list of parsed outputs, copied, so callers can't modify the
+            snapshot.
+        """
+        cfg_list = list()
+        for index in self.__get_step_index_list(stepname):
+            with self.lock:
+                if index not in self.cfg_dict:
+                    stdout = self.step_list[index][1]["stdout"]
+                    logging.debug("stdout=%s", stdout)
+                    self.cfg_dict[index] = json.loads(stdout)
+                cfg_list.append(copy.deepcopy(self.cfg_dict[index]))
+
+        return cfg_list
+
 
 class JenkinsProject(object):
     """Jenkins project interface"""
@@ -44,9 +149,20 @@ class JenkinsProject(object):
         # Initialize Jenkins server interface
         # TODO Add support for CSRF protection
         self.server = jenkinsapi.jenkins.Jenkins(url, username, password)
+        # Lock serializing job lookups, which lazily retrieve and cache the
+        # list of jobs in the server interface
+        self.server_lock = threading.Lock()
 
         self.retry_cnt = retry_cnt
 
+        # Snapshots of completed builds (BuildSnapshot), by build ID, in
+        # order of creation
+        self.snapshot_dict = collections.OrderedDict()
+        # Lock protecting the snapshot dictionary
+        self.snapshot_lock = threading.Lock()
+        # Next build number of the job, as of the last completion check
+        self.next_build_number = 0
+
     def __call_server_method(self, method, interval, *args):
         """
         Call method of self.server. Retry Jenkins self.retry_cnt times
@@ -75,10 +191,8 @@ class JenkinsProject(object):
         raise exc
 
     def __get_job(self, interval=60):
-        return self.__call_server_method("get_job", interval, self.name)
-
-    def __build_job(self, params, interval=60):
-        self.__call_server_method("build_job", interval, self.name, params)
+        with self.server_lock:
+            return self.__call_server_method("get_job", interval, self.name)
 
     def __base_server_url(self, interval=60):
         return self.__call_server_method("base_server_url", interval)
@@ -114,25 +228,83 @@ class JenkinsProject(object):
     def __get_build(self, job, buildid, interval=60):
         return self.__get_job_prop(job, "get_build", interval, buildid)
 
-    def __get_build_ids(self, job, interval=60):
-        return self.__get_job_prop(job, "get_build_ids", interval)
+    def __invoke(self, job, params, interval=60):
+        return self.__get_job_prop(job, "invoke", interval, None, False,
+                                   params)
 
-    def __get_last_build(self, job, interval=60):
-        return self.__get_job_prop(job, "get_last_build", interval)
+    def __wait_for_build_number(self, queue_item, interval=10):
+        """
+        Wait for a queued build to start, polling only its queue item.
 
-    def __get_next_build_number(self, job, interval=60):
-        return self.__get_job_prop(job, "get_next_build_number", interval)
+        Args:
+            queue_item: The queue item (jenkinsapi.queue.QueueItem) returned
+                        when triggering the build.
+            interval:   Seconds to sleep before retrying failed polls.
+
+        Returns:
+            The number of the started build.
+
+        Raises:
+            Exception if the build was cancelled while queued.
+        """
+        while True:
+            data = self.__get_job_prop(queue_item, "poll", interval,
+                                       "cancelled,why,executable[number]")
+            if data.get("cancelled"):
+                raise Exception("Queued build %s was cancelled" %
+                                queue_item.baseurl)
+            executable = data.get("executable")
+            if executable and executable.get("number") is not None:
+                return executable["number"]
+            logging.debug("waiting for queued build %s: %s",
+                          queue_item.baseurl, data.get("why"))
+            time.sleep(QUEUE_POLL_INTERVAL)
 
     def _wait_and_get_build(self, buildid):
         job = self.__get_job()
         build = self.__get_build(job, buildid)
-        build.block_until_complete(delay=60)
+        # Only running builds have no result
+        if build.get_status() is None:
+            build.block_until_complete(delay=60)
 
-        # call self.__get_build() again to ensure we have the results
-        build = self.__get_build(job, buildid)
+            # call self.__get_build() again to ensure we have the results
+            build = self.__get_build(job, buildid)
 
         return build
 
+    def __get_snapshot(self, buildid):
+        """
+        Get the snapshot of the specified completed build, retrieving the
+        build and its resultset only once. Wait for the build to complete,
+        if it hasn't yet.
+
+        Args:
+            buildid:    Jenkins build ID.
+
+        Returns:
+            The build snapshot (BuildSnapshot).
+        """
+        with self.snapshot_lock:
+            snapshot = self.snapshot_dict.get(buildid)
+        if snapshot is not None:
+            return snapshot
+
+        build = self._wait_and_get_build(buildid)
+        step_list = None
+        if build.has_resultset():
+            step_list = [(name, dict(value.__dict__))
+                         for (name, value) in
+                         build.get_resultset().iteritems()]
+        snapshot = BuildSnapshot(buildid, build.baseurl, build.get_status(),
+                                 step_list)
+
+        with self.snapshot_lock:
+            self.snapshot_dict[buildid] = snapshot
+            while len(self.snapshot_dict) > SNAPSHOT_CACHE_SIZE:
+                self.snapshot_dict.popitem(last=False)
+
+        return snapshot
+
     def __get_data_list(self, buildid, stepname, key):
         """
         Get a list of values of a build resultset key, for all steps matching
@@ -148,18 +320,7 @@ class JenkinsProject(object):
         Returns:
             The list of key values.
         """
-        value_list = []
-        build = self._wait_and_get_build(buildid)
-
-        if not build.has_resultset():
-            raise Exception("No results for build %d (%s)" %
-                            (buildid, build.get_status()))
-
-        for (result_key, value) in build.get_resultset().iteritems():
-            if result_key == stepname:
-                value_list.append(value.__dict__[key])
-
-        return value_list
+        return self.__get_snapshot(buildid).get_data_list(stepname, key)
 
     def __get_cfg_data_list(self, buildid, stepname,
                             cfgkey, default=None):
@@ -181,13 +342,8 @@ class JenkinsProject(object):
             The list of key values, with defaults for steps where they were
             not found.
         """
-        value_list = []
-        for stdout in self.__get_data_list(buildid, stepname, "stdout"):
-            logging.debug("stdout=%s", stdout)
-            cfg = json.loads(stdout)
-            value_list.append(cfg.get(cfgkey, default))
-
-        return value_list
+        return [cfg.get(cfgkey, default)
+                for cfg in self.__get_snapshot(buildid).get_cfg_list(stepname)]
 
     def __get_cfg_data_uniform(self, buildid, stepname,
                                cfgkey, default=None):
@@ -304,17 +460,16 @@ class JenkinsProject(object):
 
     def get_result_url(self, buildid):
         """
-        Get the URL of the web representation of the specified build of the
-        specified Jenkins project.
+        Get the URL of the web representation of the specified completed
+        build. Wait for the build to complete, if it hasn't yet.
 
         Args:
-            jobname:    Jenkins project name.
             buildid:    Jenkins build ID.
 
         Result:
             The URL of the build result.
         """
-        return join_with_slash(self.__base_server_url(), "job", str(buildid))
+        return self.__get_snapshot(buildid).url
 
     def get_result(self, buildid):
         """
@@ -328,9 +483,9 @@ class JenkinsProject(object):
         Return:
             The build result code (TestResult).
         """
-        build = self._wait_and_get_build(buildid)
+        snapshot = self.__get_snapshot(buildid)
 
-        bstatus = build.get_status()
+        bstatus = snapshot.status
         logging.info("build_status=%s", bstatus)
 
         if bstatus == "SUCCESS":
@@ -344,7 +499,7 @@ class JenkinsProject(object):
                 ("skt.cmd_console_check", TestResult.TRACE_FOUND)
             ]
             for (step, failure_result) in step_failure_result_list:
-                if set(self.__get_data_list(buildid, step, "status")) & \
+                if set(snapshot.get_data_list(step, "status")) & \
                         set(["FAILED", "REGRESSION"]):
                     return failure_result
             logging.warning("Build status is \"%s\", "
@@ -359,7 +514,9 @@ class JenkinsProject(object):
               message_id=None, subject=None, emails=set(), patch_url_list=[],
               makeopts=None):
         """
-        Submit a build of a patch series.
+        Submit a build of a patch series. Can be called from multiple
+        threads: the job lookup is serialized, while triggering the build
+        and waiting for its number use objects private to the call.
 
         Args:
             baserepo:        Baseline Git repo URL.
@@ -407,11 +564,10 @@ class JenkinsProject(object):
 
         logging.debug(params)
         job = self.__get_job()
-        expected_id = self.__get_next_build_number(job)
-        self.__build_job(params)
-        build = self.find_build(params, expected_id)
-        logging.info("submitted build: %s", build)
-        return build.get_number()
+        queue_item = self.__invoke(job, params)
+        buildid = self.__wait_for_build_number(queue_item)
+        logging.info("submitted build: %s #%d", self.name, buildid)
+        return buildid
 
     def is_build_complete(self, buildid):
         """
@@ -428,39 +584,72 @@ class JenkinsProject(object):
 
         return not build.is_running()
 
-    def _params_eq(self, build, params):
-        try:
-            build_params = build.get_actions()["parameters"]
-        except (AttributeError, KeyError):
-            return False
+    def __get_recent_builds(self, count, interval=60):
+        """
+        Retrieve numbers and statuses of the most recent builds of the job,
+        along with the job's next build number, with a single request.
 
-        for build_param in build_params:
-            if (build_param["name"] in params
-                    and build_param["value"] != params[build_param["name"]]):
-                return False
+        Args:
+            count:      Number of the most recent builds to retrieve.
+            interval:   Seconds to sleep before retrying.
 
-        return True
+        Returns:
+            The job JSON data, with "nextBuildNumber" and "builds" keys, the
+            latter being a list of build dictionaries with "number",
+            "building" and "result" keys, newest builds first.
+        """
+        if count > BUILDS_PROPERTY_MAX:
+            prop = "allBuilds"
+        else:
+            prop = "builds"
+        url = join_with_slash(self.__base_server_url(), "job",
+                              urllib.quote(self.name), "api/json")
+        tree = "nextBuildNumber,%s[number,building,result]{0,%d}" % \
+            (prop, count)
+        response = self.__get_job_prop(self.server.requester,
+                                       "get_and_confirm_status", interval,
+                                       url, {"tree": tree})
+        data = response.json()
+        if prop != "builds":
+            data["builds"] = data.pop(prop, [])
+        return data
+
+    def get_build_completion(self, buildid_list):
+        """
+        Check if builds are complete. Statuses of all the recent builds of
+        the job are retrieved at once, usually with a single request, and
+        builds not found among them are checked one by one.
 
-    def find_build(self, params, eid=None):
-        job = self.__get_job()
-        lbuild = None
+        Args:
+            buildid_list:   List of Jenkins build IDs to check.
 
-        while not lbuild:
-            try:
-                lbuild = job.get_last_build()
-            except jenkinsapi.custom_exceptions.NoBuildData:
-                time.sleep(1)
-
-        if eid is not None:
-            while lbuild.get_number() < eid:
-                time.sleep(1)
-                lbuild = self.__get_last_build(job, 10)
-        if self._params_eq(lbuild, params):
-            return lbuild
-
-        # slowpath
-        for bid in self.__get_build_ids(job):
-            build = self.__get_build(job, bid)
-            if self._params_eq(build, params):
-                return build
-        return None
+        Return:
+            A dictionary of completion flags (True if the build is complete,
+            False if not), by build ID.
+        """
+        if not buildid_list:
+            return dict()
+
+        min_id = min(buildid_list)
+        count = max(POLL_WINDOW_MIN, self.next_build_number - min_id)
+        data = self.__get_recent_builds(count)
+        build_list = data.get("builds", [])
+        if len(build_list) >= count and build_list[-1]["number"] > min_id:
+            # The job went further since the last check, extend the window
+            count = data.get("nextBuildNumber") - min_id
+            data = self.__get_recent_builds(count)
+            build_list = data.get("builds", [])
+        self.next_build_number = data.get("nextBuildNumber", 0)
+
+        building_dict = dict((build["number"], build["building"])
+                             for build in build_list)
+        completion_dict = dict()
+        for buildid in buildid_list:
+            if buildid in building_dict:
+                completion_dict[buildid] = not building_dict[buildid]
+            else:
+                logging.debug("build %d not found among recent builds",
+                              buildid)
+                completion_dict[buildid] = self.is_build_complete(buildid)
+
+        return completion_dict
@@ -12,6 +12,9 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
+import sys
+import threading
+
 import enum
 
 
@@ -49,3 +52,56 @@ def join_with_slash(base, *suffix_tuple):
         parts.append(arg.strip('/'))
     ending = '/' if arg.endswith('/') else ''
     return '/'.join(parts) + ending
+
+
+def parallel_map(func, item_list, workers=1):
+    """
+    Call a function for each item in a list, using up to the specified
+    number of threads, and collect the results.
+
+    Args:
+        func:       The function to call with each item as the argument.
+        item_list:  An iterable of items to call the function for.
+        workers:    Maximum number of threads to call the function in. The
+                    function is called in the current thread, one item after
+                    another, if this is one or less.
+
+    Returns:
+        The list of function results, in the order of the items.
+    """
+    item_list = list(item_list)
+    if workers <= 1 or len(item_list) <= 1:
+        return [func(item) for item in item_list]
+
+    result_list = [None] * len(item_list)
+    # Iterator of indexes of items left to call the function for
+    index_iter = iter(range(len(item_list)))
+    # Information on the first exception raised by the function, if any
+    exc_info_list = list()
+    # Lock protecting the iterator and the exception information
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                index = None if exc_info_list else next(index_iter, None)
+            if index is None:
+                return
+            try:
+                result_list[index] = func(item_list[index])
+            except Exception:
+                with lock:
+                    exc_info_list.append(sys.exc_info())
+
+    # Use plain threads, as joining a Python 2 ThreadPool takes up to 0.1s
+    thread_list = [threading.Thread(target=work)
+                   for _ in range(min(workers, len(item_list)))]
+    for thread in thread_list:
+        thread.daemon = True
+        thread.start()
+    for thread in thread_list:
+        thread.join()
+
+    if exc_info_list:
+        raise exc_info_list[0][0], exc_info_list[0][1], exc_info_list[0][2]
+    return result_list
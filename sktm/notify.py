@@ -0,0 +1,180 @@
+# Copyright (c) 2018 Red Hat, Inc. All rights reserved. This copyrighted
+# material is made available to anyone wishing to use, modify, copy, or
+# redistribute it subject to the terms and conditions of the GNU General
+# Public License v.2 or later.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import BaseHTTPServer
+import json
+import logging
+import SocketServer
+import threading
+
+# Default interval between polls of all pending builds, in seconds, when
+# build completion notifications are received
+DEFAULT_POLL_INTERVAL = 600
+
+# Default address to listen for build notifications on, all addresses
+DEFAULT_ADDRESS = ''
+
+# Jenkins Notification plugin build phases signifying the build is finished
+FINISHED_PHASES = ['COMPLETED', 'FINALIZED']
+
+
+class NotificationHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    A request handler of the build notification listener
+    (NotificationListener).
+    """
+
+    def log_message(self, *args):
+        """Log requests at debug level only."""
+        logging.debug("notification listener: " + args[0], *args[1:])
+
+    def __send(self, status_code, message):
+        """
+        Send a plain text response.
+
+        Args:
+            status_code:    The response status code.
+            message:        The response body string.
+        """
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(message)))
+        self.end_headers()
+        self.wfile.write(message)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Accept a build notification."""
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            data = json.loads(body)
+            buildid, phase, name = parse_notification(data)
+        except (ValueError, TypeError, KeyError, AttributeError) as exc:
+            logging.warning("invalid build notification from %s: %s",
+                            self.client_address[0], exc)
+            self.__send(400, 'Invalid notification\n')
+            return
+
+        self.server.notify(buildid, phase, name)
+        self.__send(200, 'OK\n')
+
+
+def parse_notification(data):
+    """
+    Parse a build notification, either in the Jenkins Notification plugin
+    JSON format, i.e. {"name": <job name>, "build": {"number": <build
+    number>, "phase": <build phase>, ...}, ...}, or in a simple format, i.e.
+    {"number": <build number>}, optionally with a "name" key, for
+    notifications sent when builds are finished.
+
+    Args:
+        data:   The notification JSON data.
+
+    Returns:
+        A tuple containing the build number, the build phase, and the job
+        name, or None, if not specified.
+    """
+    if 'build' in data:
+        return (int(data['build']['number']),
+                data['build'].get('phase', FINISHED_PHASES[-1]),
+                data.get('name'))
+
+    return (int(data['number']), FINISHED_PHASES[-1], data.get('name'))
+
+
+class NotificationListener(SocketServer.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    """
+    An HTTP listener accepting notifications of finished Jenkins builds,
+    posted to any path, e.g. by the Jenkins Notification plugin, or by the
+    job itself. Notifications are served from a thread, and are collected
+    until retrieved with wait().
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port, jobname=None, address=DEFAULT_ADDRESS):
+        """
+        Start listening for build notifications.
+
+        Args:
+            port:       The port to listen on, zero to pick a free one.
+            jobname:    The name of the Jenkins job to accept notifications
+                        for, or None to accept notifications for any job.
+                        Notifications without a job name are always
+                        accepted.
+            address:    The address to listen on, all addresses by default.
+        """
+        BaseHTTPServer.HTTPServer.__init__(self, (address, port),
+                                           NotificationHandler)
+        self.port = self.server_address[1]
+        self.jobname = jobname
+        # Set of numbers of finished builds not retrieved yet
+        self.finished_set = set()
+        # Condition protecting the set, signalled when it's added to
+        self.cond = threading.Condition()
+
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        logging.info("listening for build notifications on port %d",
+                     self.port)
+
+    def stop(self):
+        """Stop listening and release the port."""
+        self.shutdown()
+        self.server_close()
+
+    def notify(self, buildid, phase, name=None):
+        """
+        Register a build notification, waking up wait(), if the build is
+        finished.
+
+        Args:
+            buildid:    The build number.
+            phase:      The build phase, one of the Jenkins Notification
+                        plugin phases, e.g. "STARTED" or "FINALIZED".
+            name:       The name of the job the build belongs to, or None if
+                        unknown.
+        """
+        if name is not None and self.jobname is not None and \
+                name != self.jobname:
+            logging.debug("ignoring notification for %s build %d",
+                          name, buildid)
+            return
+        if phase not in FINISHED_PHASES:
+            logging.debug("ignoring build %d phase %s", buildid, phase)
+            return
+
+        logging.info("build %d finished", buildid)
+        with self.cond:
+            self.finished_set.add(buildid)
+            self.cond.notify_all()
+
+    def wait(self, timeout):
+        """
+        Wait for notifications of finished builds, and retrieve them.
+
+        Args:
+            timeout:    Maximum time to wait, in seconds.
+
+        Returns:
+            The set of numbers of builds notified as finished since the last
+            call, empty if none were notified before the timeout.
+        """
+        with self.cond:
+            if not self.finished_set:
+                self.cond.wait(timeout)
+            finished_set = self.finished_set
+            self.finished_set = set()
+        return finished_set
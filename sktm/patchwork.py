@@ -13,19 +13,30 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
 from __future__ import print_function
+import collections
 import datetime
 import email
 import email.header
+import email.parser
+import itertools
 import json
 import logging
 import re
+import threading
+import time
 import urllib
+import urlparse
 import xmlrpclib
 
 import dateutil.parser
 import requests
+import requests.adapters
+import requests.models
+import requests.structures
 
-from sktm.misc import TestResult, join_with_slash
+from multiprocessing.pool import ThreadPool
+
+from sktm.misc import TestResult, join_with_slash, parallel_map
 
 
 SKIP_PATTERNS = [
@@ -42,6 +53,65 @@ PW_CHECK_CHOICES = {'pending': 0,
                     'warning': 2,
                     'fail': 3}
 
+# Maximum number of parsed patch messages kept in the message cache
+MESSAGE_CACHE_SIZE = 1024
+
+# Default maximum number of keep-alive connections pooled per Patchwork host
+DEFAULT_POOL_SIZE = 10
+
+# Default timeout for Patchwork HTTP requests, in seconds
+DEFAULT_TIMEOUT = 60
+
+# Default number of threads to retrieve Patchwork objects with
+DEFAULT_WORKERS = 1
+
+# Maximum size of an mbox response body to read to the end after retrieving
+# its headers, so the connection can be reused. Connections are closed for
+# larger bodies, or bodies of unknown size, instead.
+MAX_DRAIN_SIZE = 64 * 1024
+
+# HTTP cache modes: don't use the cache, serve cached responses after
+# revalidating them with the server, or serve cached responses directly
+CACHE_NONE = None
+CACHE_REVALIDATE = 'revalidate'
+CACHE_IMMUTABLE = 'immutable'
+
+# Default number of objects to request per page of Patchwork REST lists
+DEFAULT_PER_PAGE = 100
+
+# Default maximum number of Patchwork REST list pages to retrieve per list
+DEFAULT_MAX_PAGES = 1000
+
+# Maximum number of patches to request with a single XML RPC patch list query,
+# or to look up with a single XML RPC multicall
+PATCH_BATCH_SIZE = 100
+
+# New series discovery modes of Patchwork REST interfaces: list new patches
+# and retrieve each series they belong to, or list new series directly
+DISCOVERY_PATCHES = 'patches'
+DISCOVERY_SERIES = 'series'
+DISCOVERY_CHOICES = [DISCOVERY_PATCHES, DISCOVERY_SERIES]
+
+# Maximum age of incomplete series kept for the next run, i.e. maximum time
+# between the date of their last patch (XML RPC), or their own date (REST
+# API series listing), and the date of the last patch seen
+SERIES_MAX_AGE = datetime.timedelta(days=14)
+# Maximum number of incomplete series kept for the next run
+SERIES_MAX_COUNT = 1000
+
+# Default maximum number of threads posting patch checks in parallel
+DEFAULT_CHECK_WORKERS = 8
+
+# Number of times to retry posting a patch check after a transient failure,
+# and the delay before the first retry in seconds, doubled with each retry
+CHECK_RETRY_COUNT = 3
+CHECK_RETRY_DELAY = 1
+
+# Default number of threads of a Patchwork call executor, and the default
+# maximum number of calls submitted to it and not yet completed
+DEFAULT_EXECUTOR_WORKERS = 16
+DEFAULT_EXECUTOR_LIMIT = 64
+
 
 class ObjectSummary(object):
     """A summary of an mbox-based Patchwork object"""
@@ -88,6 +158,57 @@ class ObjectSummary(object):
         return join_with_slash(self.url, self.mbox_sfx)
 
 
+class PatchRecord(object):
+    """
+    A compact record of an XML RPC patch object, keeping only the fields
+    needed to assemble and summarize series.
+    """
+    __slots__ = ('id', 'name', 'date', 'msgid', 'submitter_id', 'headers')
+
+    def __init__(self, patch):
+        """
+        Initialize a patch record.
+
+        Args:
+            patch:  An XML RPC patch object, or a dictionary returned by
+                    to_dict().
+        """
+        # pylint: disable=invalid-name
+        self.id = patch.get("id")
+        self.name = patch.get("name")
+        self.date = patch.get("date")
+        self.msgid = patch.get("msgid")
+        self.submitter_id = patch.get("submitter_id")
+        # Original e-mail headers, provided by the RH fork only
+        self.headers = patch.get("headers") or \
+            patch.get("root_comment", {}).get("headers")
+
+    def get(self, name, default=None):
+        """
+        Get a field value, like from an XML RPC patch object.
+
+        Args:
+            name:       The field name.
+            default:    The value to return if the field is not set.
+
+        Returns:
+            The field value, or the default.
+        """
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+    def to_dict(self):
+        """
+        Convert the record to a dictionary, which can be used to create the
+        record again.
+
+        Returns:
+            A dictionary of the set fields.
+        """
+        return dict((name, getattr(self, name)) for name in self.__slots__
+                    if getattr(self, name) is not None)
+
+
 class SeriesSummary(object):
     """A series summary"""
 
@@ -223,6 +344,314 @@ class SeriesSummary(object):
 # TODO Move common code to a common parent class
 
 
+class MessageCache(object):
+    """
+    A bounded cache of parsed patch messages, keyed by the mbox URL and
+    whether only the headers were parsed. Safe to use from multiple threads.
+    """
+
+    def __init__(self, max_size=MESSAGE_CACHE_SIZE):
+        """
+        Initialize a message cache.
+
+        Args:
+            max_size:   Maximum number of messages to keep. The least
+                        recently used messages are evicted first.
+        """
+        self.max_size = max_size
+        # Cached email objects, ordered from least to most recently used
+        self.messages = collections.OrderedDict()
+        # Number of lookups which found a cached message
+        self.hits = 0
+        # Number of lookups which didn't find a cached message
+        self.misses = 0
+        # Lock serializing access to the messages and the counters
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Look up a cached message, marking it as most recently used.
+
+        Args:
+            key:    The key of the message.
+
+        Returns:
+            The cached email object, or None if it's not cached.
+        """
+        with self.lock:
+            message = self.messages.pop(key, None)
+            if message is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.messages[key] = message
+            return message
+
+    def put(self, key, message):
+        """
+        Add a message to the cache, evicting the least recently used
+        messages if the cache is full.
+
+        Args:
+            key:        The key of the message.
+            message:    The email object to cache.
+        """
+        with self.lock:
+            self.messages.pop(key, None)
+            self.messages[key] = message
+            while len(self.messages) > self.max_size:
+                self.messages.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached messages and reset the counters."""
+        with self.lock:
+            self.messages.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class PatchworkSession(requests.Session):
+    """
+    An HTTP session keeping pooled keep-alive connections to Patchwork
+    hosts, applying a default timeout to all requests, and optionally
+    caching responses persistently, and limiting request rate and
+    concurrency per host.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 cache=None, limiter=None):
+        """
+        Initialize a Patchwork HTTP session.
+
+        Args:
+            pool_size:  Maximum number of connections to keep open to each
+                        host.
+            timeout:    Timeout for requests not specifying their own, in
+                        seconds.
+            cache:      The HTTP cache (sktm.httpcache.HttpCache) to store
+                        responses in, or None to disable caching.
+            limiter:    The rate limiter (sktm.ratelimit.RateLimiter) to
+                        pass requests through, or None to disable limiting.
+        """
+        super(PatchworkSession, self).__init__()
+        self.timeout = timeout
+        self.cache = cache
+        self.limiter = limiter
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request, applying the default timeout, if none is specified,
+        and waiting for the rate limiter, if any. Accepts the same arguments
+        as requests.Session.request().
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        if self.limiter is None:
+            return super(PatchworkSession, self).request(method, url,
+                                                         **kwargs)
+
+        host_limit = self.limiter.get_host_limit(urlparse.urlsplit(url)[1])
+        host_limit.acquire()
+        status_code = None
+        retry_after = None
+        start = time.time()
+        try:
+            response = super(PatchworkSession, self).request(method, url,
+                                                             **kwargs)
+            status_code = response.status_code
+            retry_after = response.headers.get('Retry-After', '')
+            return response
+        finally:
+            host_limit.release(status_code, time.time() - start,
+                               int(retry_after)
+                               if retry_after and retry_after.isdigit()
+                               else None)
+
+    @staticmethod
+    def __make_response(url, cached):
+        """
+        Create a response object from a cached response.
+
+        Args:
+            url:    The URL the response was retrieved from.
+            cached: A tuple containing the response body and a dictionary of
+                    response headers, as returned by the cache.
+
+        Returns:
+            The created requests.Response object.
+        """
+        content, headers = cached
+        response = requests.models.Response()
+        response.url = url
+        response.status_code = requests.codes.ok
+        response.headers = requests.structures.CaseInsensitiveDict(headers)
+        # pylint: disable=protected-access
+        response._content = content
+        return response
+
+    def get(self, url, cache_mode=CACHE_NONE, **kwargs):
+        """
+        Send a GET request, using the cache according to the specified mode,
+        if the session has a cache. Accepts the same arguments as
+        requests.Session.get(), plus the cache mode.
+
+        Args:
+            url:        The URL to retrieve.
+            cache_mode: CACHE_NONE to bypass the cache, CACHE_REVALIDATE to
+                        serve a cached response only if the server confirms
+                        it's unchanged, using its ETag and Last-Modified
+                        headers, or CACHE_IMMUTABLE to serve a cached response
+                        without contacting the server.
+
+        Returns:
+            The requests.Response object.
+        """
+        if self.cache is None or cache_mode is CACHE_NONE:
+            return super(PatchworkSession, self).get(url, **kwargs)
+
+        cached = self.cache.get(url)
+        if cached is not None:
+            if cache_mode == CACHE_IMMUTABLE:
+                return self.__make_response(url, cached)
+
+            headers = dict(kwargs.pop('headers', None) or {})
+            if cached[1].get('ETag'):
+                headers['If-None-Match'] = cached[1]['ETag']
+            if cached[1].get('Last-Modified'):
+                headers['If-Modified-Since'] = cached[1]['Last-Modified']
+            kwargs['headers'] = headers
+
+        response = super(PatchworkSession, self).get(url, **kwargs)
+
+        if response.status_code == requests.codes.not_modified and cached:
+            logging.debug("%s not modified, using cached response", url)
+            return self.__make_response(url, cached)
+
+        if response.status_code == requests.codes.ok and \
+                (cache_mode == CACHE_IMMUTABLE or
+                 response.headers.get('ETag') or
+                 response.headers.get('Last-Modified')):
+            self.cache.put(url, response.content, response.headers)
+
+        return response
+
+    def get_mail_headers(self, url):
+        """
+        Retrieve the header block of an e-mail message, or of the first
+        message of an mbox, without reading the rest of the response, unless
+        it's small. Header blocks are cached as immutable, if the session
+        has a cache.
+
+        Args:
+            url:    The URL of the message or mbox to retrieve headers of.
+
+        Returns:
+            The header block string, without the terminating empty line.
+
+        Raises:
+            requests.exceptions.RequestException (and subexceptions) in case
+            of requests exceptions, Exception in case of unexpected return
+            code.
+        """
+        cache_url = url + '#headers'
+        if self.cache is not None:
+            cached = self.cache.get(cache_url)
+            if cached is not None:
+                return cached[0]
+
+        response = self.get(url, stream=True)
+        try:
+            if response.status_code != requests.codes.ok:
+                raise Exception('Failed to retrieve %s, returned %d' %
+                                (url, response.status_code))
+
+            line_list = list()
+            for line in response.iter_lines():
+                if not line.strip():
+                    break
+                line_list.append(line)
+
+            # Read the rest of a small body to keep the connection
+            length = response.headers.get('Content-Length')
+            if length and length.isdigit() and \
+                    int(length) <= MAX_DRAIN_SIZE:
+                for _ in response.iter_content(MAX_DRAIN_SIZE):
+                    pass
+        finally:
+            response.close()
+
+        headers = '\n'.join(line_list) + '\n'
+        if self.cache is not None:
+            self.cache.put(cache_url, headers, {})
+        return headers
+
+    def get_mbox_headers(self, url):
+        """
+        Retrieve header blocks of all messages in an mbox, reading the
+        response as a stream and discarding message bodies.
+
+        Args:
+            url:    The URL of the mbox to retrieve headers of.
+
+        Returns:
+            A list of header block strings, in the order of the messages.
+
+        Raises:
+            requests.exceptions.RequestException (and subexceptions) in case
+            of requests exceptions, Exception in case of unexpected return
+            code.
+        """
+        response = self.get(url, stream=True)
+        try:
+            if response.status_code != requests.codes.ok:
+                raise Exception('Failed to retrieve %s, returned %d' %
+                                (url, response.status_code))
+
+            return list(iter_mbox_headers(response.iter_lines()))
+        finally:
+            response.close()
+
+
+def iter_mbox_headers(line_iter):
+    """
+    Extract header blocks of messages in an mbox, skipping message bodies.
+    Messages are expected to be separated by "From " lines, with any "From "
+    at the start of body lines escaped, as Patchwork does.
+
+    Args:
+        line_iter:  An iterable of mbox lines, without line terminators.
+
+    Returns:
+        A generator of message header block strings, without the "From "
+        separator lines and the empty lines terminating the headers.
+    """
+    line_list = None
+    in_headers = True
+    prev_line = ''
+    for line in line_iter:
+        if line.startswith('From ') and not prev_line.strip():
+            # A new message starts
+            if in_headers and line_list:
+                yield '\n'.join(line_list) + '\n'
+            line_list = list()
+            in_headers = True
+        elif in_headers:
+            if line.strip():
+                if line_list is None:
+                    line_list = list()
+                line_list.append(line)
+            elif line_list:
+                yield '\n'.join(line_list) + '\n'
+                in_headers = False
+        prev_line = line
+
+    if in_headers and line_list:
+        yield '\n'.join(line_list) + '\n'
+
+
 def stringify(value):
     """Convert any value to a str object
 
@@ -236,6 +665,68 @@ def stringify(value):
     return str(value)
 
 
+class SessionTransport(xmlrpclib.Transport):
+    """
+    An XML RPC transport sending requests through a PatchworkSession,
+    reusing its keep-alive connections, timeout, and rate limits. Responses
+    are accepted gzip-encoded, and requests can be gzip-encoded too.
+    """
+
+    def __init__(self, session, scheme, encode_threshold=None):
+        """
+        Initialize a session transport.
+
+        Args:
+            session:            The PatchworkSession to send requests with.
+            scheme:             The URL scheme to send requests with, "http"
+                                or "https".
+            encode_threshold:   Minimum size of request bodies to gzip, in
+                                bytes, or None to never gzip requests.
+        """
+        xmlrpclib.Transport.__init__(self)
+        self.session = session
+        self.scheme = scheme
+        self.encode_threshold = encode_threshold
+
+    def request(self, host, handler, request_body, verbose=0):
+        """
+        Send an XML RPC request and parse the response.
+
+        Args:
+            host:           The host to send the request to.
+            handler:        The path to send the request to.
+            request_body:   The XML RPC request body string.
+            verbose:        Ignored.
+
+        Returns:
+            A tuple of the unmarshalled response values.
+
+        Raises:
+            requests.exceptions.RequestException (and subexceptions) in case
+            of requests exceptions, xmlrpclib.ProtocolError in case of
+            unexpected return code, xmlrpclib.Fault in case of XML RPC
+            faults.
+        """
+        headers = {'Content-Type': 'text/xml',
+                   'User-Agent': self.user_agent}
+        if self.encode_threshold is not None and \
+                len(request_body) >= self.encode_threshold:
+            request_body = xmlrpclib.gzip_encode(request_body)
+            headers['Content-Encoding'] = 'gzip'
+
+        url = '%s://%s%s' % (self.scheme, host, handler)
+        response = self.session.post(url, data=request_body,
+                                     headers=headers)
+        if response.status_code != requests.codes.ok:
+            raise xmlrpclib.ProtocolError(url, response.status_code,
+                                          response.reason, response.headers)
+
+        parser, unmarshaller = self.getparser()
+        parser.feed(response.content)
+        parser.close()
+        return unmarshaller.close()
+
+
 class RpcWrapper(object):
     """
     XMLRPC object wrapper removing magic API version which is added by RH
@@ -271,34 +762,128 @@ class RpcWrapper(object):
         """Add the RPC version checking call/return wrappers."""
         return self.__return_unwrapper(self.__wrap_call(self.rpc, name))
 
+    def multicall(self, call_list):
+        """
+        Send a list of RPC calls in a single request, adding the version
+        number to the arguments and checking and removing it from the
+        results. See rpc_multicall().
+        """
+        multicall = xmlrpclib.MultiCall(self.rpc)
+        for name, args in call_list:
+            getattr(multicall, name)(self.version, *args)
+        return [self.__return_check(returned) for returned in multicall()]
+
+
+def rpc_multicall(rpc, call_list):
+    """
+    Send a list of XML RPC calls in a single request, using the
+    "system.multicall" method.
+
+    Args:
+        rpc:        The XML RPC interface (xmlrpclib.ServerProxy or
+                    RpcWrapper) to send the calls to.
+        call_list:  A list of tuples, each containing the name of the method
+                    to call and a tuple of its arguments.
+
+    Returns:
+        A list of the call results, in the order of the calls.
+
+    Raises:
+        xmlrpclib.Fault if the server doesn't support "system.multicall", or
+        if any of the calls failed.
+    """
+    if isinstance(rpc, RpcWrapper):
+        return rpc.multicall(call_list)
+
+    multicall = xmlrpclib.MultiCall(rpc)
+    for name, args in call_list:
+        getattr(multicall, name)(*args)
+    return list(multicall())
+
 
 class PatchworkProject(object):
     """Common code for all major versions and interfaces."""
-    def __init__(self, baseurl, project_name, skip, is_rh_fork=False):
+    # HTTP session shared by all Patchwork interfaces, unless one is
+    # specified when creating an interface
+    session = PatchworkSession()
+
+    def __init__(self, baseurl, project_name, skip, is_rh_fork=False,
+                 workers=DEFAULT_WORKERS, message_cache=None):
         """
         Initialize attributes common for all Patchworks.
 
         Args:
-            baseurl:      URL of the Patchwork instance.
-            project_name: Project's `linkname` in Patchwork.
-            skip:         List of additional regex patterns to skip in patch
-                          names, case insensitive.
-            is_rh_fork:   True if the instance is internal RH fork, False by
-                          default.
+            baseurl:        URL of the Patchwork instance.
+            project_name:   Project's `linkname` in Patchwork.
+            skip:           List of additional regex patterns to skip in
+                            patch names, case insensitive.
+            is_rh_fork:     True if the instance is internal RH fork, False
+                            by default.
+            workers:        Maximum number of threads to retrieve Patchwork
+                            objects with, in parallel.
+            message_cache:  Patch message cache (MessageCache) to share with
+                            other interfaces during a run, or None to use a
+                            new one.
         """
         self.baseurl = baseurl
+        self.workers = workers
+        # Patch message cache, so every patch mbox is retrieved at most once
+        # per run
+        if message_cache is None:
+            message_cache = MessageCache()
+        self.message_cache = message_cache
         self.project_id = self._get_project_id(project_name)
         patterns_to_skip = SKIP_PATTERNS + skip
         logging.debug('Patch subject patterns to skip: %s', patterns_to_skip)
         self.skip = re.compile('|'.join(patterns_to_skip), re.IGNORECASE)
         self.is_rh_fork = is_rh_fork
 
-    def __get_patch_message(self, patch_id):
+    def __get_patch_mbox_url(self, patch_id):
         """
-        Retrieve patch's mbox as email object.
+        Get the mbox URL of a patch.
 
         Args:
-            patch_id: The ID of the patch which mbox should be retrieved.
+            patch_id:   The ID of the patch.
+
+        Returns:
+            The patch mbox URL.
+        """
+        return join_with_slash(self.baseurl,
+                               'patch',
+                               str(patch_id),
+                               self._get_mbox_url_sfx())
+
+    def _get_patch_headers(self, patch_id, header_dict=None):
+        """
+        Get a patch message with headers, either obtained elsewhere, or
+        retrieved from the patch mbox.
+
+        Args:
+            patch_id:       The ID of the patch to get the message for.
+            header_dict:    A dictionary of email objects with patch message
+                            headers obtained elsewhere, by patch ID, or None.
+                            The patch mbox is only retrieved if the patch is
+                            missing from it.
+
+        Returns:
+            Email object with the patch message headers.
+        """
+        mbox_email = (header_dict or {}).get(patch_id)
+        if mbox_email is None:
+            mbox_email = self.__get_patch_message(patch_id)
+        return mbox_email
+
+    def __get_patch_message(self, patch_id, headers_only=True):
+        """
+        Retrieve patch's mbox as email object. The parsed message is kept in
+        the message cache, and served from it on subsequent calls.
+
+        Args:
+            patch_id:       The ID of the patch which mbox should be
+                            retrieved.
+            headers_only:   True if only the message headers should be
+                            retrieved and parsed, leaving the message body
+                            empty, False if the whole message is needed.
 
         Returns:
             Email object created from the mbox file.
@@ -308,29 +893,75 @@ class PatchworkProject(object):
             of requests exceptions, Exception in case of unexpected return code
             (eg. nonexistent patch).
         """
-        mbox_url = join_with_slash(self.baseurl,
-                                   'patch',
-                                   str(patch_id),
-                                   self._get_mbox_url_sfx())
+        mbox_url = self.__get_patch_mbox_url(patch_id)
 
-        try:
-            response = requests.get(mbox_url)
-        except requests.exceptions.RequestException as exc:
-            raise exc
+        mbox_email = self.message_cache.get((mbox_url, headers_only))
+        if mbox_email is not None:
+            return mbox_email
 
-        if response.status_code != requests.codes.ok:
-            raise Exception('Failed to retrieve patch from %s, returned %d' %
-                            (mbox_url, response.status_code))
+        if headers_only:
+            mbox_email = email.parser.HeaderParser().parsestr(
+                self.session.get_mail_headers(mbox_url)
+            )
+        else:
+            try:
+                response = self.session.get(mbox_url,
+                                            cache_mode=CACHE_IMMUTABLE)
+            except requests.exceptions.RequestException as exc:
+                raise exc
+
+            if response.status_code != requests.codes.ok:
+                raise Exception('Failed to retrieve patch from %s, '
+                                'returned %d' %
+                                (mbox_url, response.status_code))
+
+            mbox_email = email.message_from_string(response.content)
+
+        self.message_cache.put((mbox_url, headers_only), mbox_email)
+        return mbox_email
+
+    def get_patches_by_id(self, pid_list):
+        """
+        Retrieve patch objects by patch IDs, using up to self.workers
+        threads.
+
+        Args:
+            pid_list:   List of IDs of the patches to retrieve.
+
+        Returns:
+            The list of patch objects, as returned by get_patch_by_id(), in
+            the order of the IDs.
+        """
+        return parallel_map(self.get_patch_by_id, pid_list, self.workers)
+
+    def _prefetch_messages(self, patch_id_list):
+        """
+        Retrieve mboxes of the specified patches into the message cache,
+        using up to self.workers threads.
+
+        Args:
+            patch_id_list:  List of IDs of the patches to retrieve mboxes for.
+        """
+        parallel_map(self.__get_patch_message, patch_id_list, self.workers)
 
-        return email.message_from_string(response.content)
+    def flush_patch_checks(self):
+        """
+        Wait for all queued patch checks to be posted.
+
+        Returns:
+            Number of patch checks which failed to be posted.
+        """
+        # pylint: disable=no-self-use
+        return 0
 
-    def _get_header_values_all(self, patch_id, *name_tuple):
+    def _get_header_values_all(self, mbox_email, *name_tuple):
         """
         Get all values (or empty strings) for specified headers from a patch
         message.
 
         Args:
-            patch_id:   ID of the patch to retrieve header values for.
+            mbox_email: Email object with the patch message headers, as
+                        returned by _get_patch_headers().
             name_tuple: An n-tuple of names of the headers which values should
                         be retrieved.
 
@@ -339,8 +970,7 @@ class PatchworkProject(object):
             specified headers from the patch message, with a list of a single
             empty string for each missing header.
         """
-        mbox_email = self.__get_patch_message(patch_id)
-
+        # pylint: disable=no-self-use
         value_list_tuple = ()
         for name in name_tuple:
             # Get and unfold header values
@@ -349,13 +979,14 @@ class PatchworkProject(object):
             value_list_tuple += (value_list,)
         return value_list_tuple
 
-    def _get_header_values_first(self, patch_id, *name_tuple):
+    def _get_header_values_first(self, mbox_email, *name_tuple):
         """
         Get first values (or empty strings) of specified headers from a patch
         message.
 
         Args:
-            patch_id:   ID of the patch to retrieve header values for.
+            mbox_email: Email object with the patch message headers, as
+                        returned by _get_patch_headers().
             name_tuple: An n-tuple of names of the headers which first values
                         should be retrieved.
 
@@ -365,28 +996,26 @@ class PatchworkProject(object):
             returned for missing headers.
         """
         return (value_list[0] for value_list in
-                self._get_header_values_all(patch_id, *name_tuple))
+                self._get_header_values_all(mbox_email, *name_tuple))
 
-    def _get_emails(self, pid):
+    def _get_emails(self, mbox_email):
         """
         Get all involved e-mail addresses from patch message headers.
 
         Args:
-            pid:    ID of the patch to get e-mail addresses for.
+            mbox_email: Email object with the patch message headers, as
+                        returned by _get_patch_headers().
 
         Returns:
             A set of e-mail addresses involved with the patch.
         """
         email_set = set()
-        logging.debug("getting emails for patch %d from 'from', 'to', 'cc'",
-                      pid)
         for header_value_list in \
-                self._get_header_values_all(pid, "From", "To", "Cc"):
+                self._get_header_values_all(mbox_email, "From", "To", "Cc"):
             email_set |= set(addr_tuple[1]
                              for addr_tuple
                              in email.utils.getaddresses(header_value_list)
                              if addr_tuple[1])
-        logging.debug("patch=%d; email_set=%s", pid, email_set)
 
         return email_set
 
@@ -436,7 +1065,11 @@ class PatchworkV2Project(PatchworkProject):
     """
     A Patchwork REST interface
     """
-    def __init__(self, baseurl, projectname, lastpatch, apikey=None, skip=[]):
+    def __init__(self, baseurl, projectname, lastpatch, apikey=None, skip=[],
+                 session=None, workers=DEFAULT_WORKERS,
+                 per_page=DEFAULT_PER_PAGE, max_pages=DEFAULT_MAX_PAGES,
+                 discovery=DISCOVERY_PATCHES, series_mbox=False,
+                 check_workers=DEFAULT_CHECK_WORKERS, message_cache=None):
         """
         Initialize a Patchwork REST interface.
 
@@ -448,7 +1081,51 @@ class PatchworkV2Project(PatchworkProject):
             apikey:         Patchwork API authentication token.
             skip:           List of additional regex patterns to skip in patch
                             names, case insensitive.
-        """
+            session:        PatchworkSession to send requests with, or None
+                            to use the session shared by all interfaces.
+            workers:        Maximum number of threads to retrieve series and
+                            patch mboxes with, in parallel.
+            per_page:       Number of objects to request per page of lists.
+            max_pages:      Maximum number of pages to retrieve per list.
+                            Retrieval stops with a warning once reached, and
+                            the rest is left for the next run.
+            discovery:      New series discovery mode: DISCOVERY_PATCHES to
+                            list new patches and retrieve the series they
+                            belong to, or DISCOVERY_SERIES to list new series
+                            directly.
+            series_mbox:    True if patch headers should be retrieved with a
+                            single series mbox per series with multiple
+                            patches, instead of an mbox per patch.
+            check_workers:  Maximum number of threads to post patch checks
+                            with, in parallel.
+            message_cache:  Patch message cache (MessageCache) to share with
+                            other interfaces, or None to use a new one.
+        """
+        if session is not None:
+            self.session = session
+        # Number of objects to request per page of lists
+        self.per_page = per_page
+        # Maximum number of pages to retrieve per list
+        self.max_pages = max_pages
+        # New series discovery mode
+        self.discovery = discovery
+        # True if patch headers are retrieved with series mboxes
+        self.series_mbox = series_mbox
+        # Maximum number of threads posting patch checks
+        self.check_workers = check_workers
+        # Set of IDs of series found incomplete when listed, to be checked
+        # again in the next listing
+        self.incomplete_series = set()
+        # Maximum age of incomplete series remembered, relative to the last
+        # processed patch, and maximum number of them
+        self.series_max_age = SERIES_MAX_AGE
+        self.series_max_count = SERIES_MAX_COUNT
+        # Thread pool posting patch checks, created when first needed
+        self.check_pool = None
+        # List of AsyncResults of queued patch checks
+        self.check_result_list = list()
+        # Lock protecting the check pool and the list of queued checks
+        self.check_lock = threading.Lock()
         # Patchwork API authentication token.
         self.apikey = apikey
         # JSON representation of API URLs retrieved from the Patchwork server
@@ -458,7 +1135,9 @@ class PatchworkV2Project(PatchworkProject):
             self.since = self.get_patch_by_id(lastpatch).get('date')
         else:
             self.since = None
-        super(PatchworkV2Project, self).__init__(baseurl, projectname, skip)
+        super(PatchworkV2Project, self).__init__(baseurl, projectname, skip,
+                                                 workers=workers,
+                                                 message_cache=message_cache)
 
     def _get_project_id(self, project_name):
         """
@@ -470,8 +1149,10 @@ class PatchworkV2Project(PatchworkProject):
         Returns:
             Integer representing project's ID.
         """
-        response = requests.get(join_with_slash(self.apiurls.get("projects"),
-                                                project_name))
+        response = self.session.get(
+            join_with_slash(self.apiurls.get("projects"), project_name),
+            cache_mode=CACHE_REVALIDATE
+        )
         if response.status_code != requests.codes.ok:
             raise Exception("Can't get project data: %s %d" %
                             (project_name, response.status_code))
@@ -485,43 +1166,91 @@ class PatchworkV2Project(PatchworkProject):
         Returns:
             The JSON representation of the API URLs.
         """
-        response = requests.get(join_with_slash(baseurl, "api"))
+        response = self.session.get(join_with_slash(baseurl, "api"),
+                                    cache_mode=CACHE_REVALIDATE)
         if response.status_code != 200:
             raise Exception("Can't get apiurls: %d" % response.status_code)
 
         return response.json()
 
-    def __get_series_from_url(self, url):
+    def __get_pages(self, url, cache_mode=CACHE_NONE):
         """
-        Retrieve a list of applicable series summaries for the specified
-        series URL. Series or patches matching skip patterns (self.skip) are
-        excluded.
+        Retrieve JSON objects from the specified URL page by page, following
+        links to the next pages, up to self.max_pages pages.
+
+        Args:
+            url:        The URL pointing to an object or an object list to
+                        retrieve.
+            cache_mode: The HTTP cache mode to retrieve pages with.
+
+        Returns:
+            A generator of lists of JSON objects, one list per page.
+        """
+        page_count = 0
+        while url:
+            if page_count >= self.max_pages:
+                logging.warning("stopping after %d pages, not retrieving %s",
+                                page_count, url)
+                return
+
+            logging.debug("get_pages %s", url)
+            response = self.session.get(url, cache_mode=cache_mode)
+
+            if response.status_code != 200:
+                raise Exception("Can't get data from url %s (%d)" %
+                                (url, response.status_code))
+            page_count += 1
+
+            data = response.json()
+            # If there is a single object returned we get a dict, not a list
+            # with a single element. Fix this inconsistency for easier
+            # processing.
+            if not isinstance(data, list):
+                data = [data]
+
+            url = None
+            link = response.headers.get("Link")
+            if link:
+                match = re.search('<([^>]*)>; rel="next"', link)
+                if match:
+                    url = match.group(1)
+
+            yield data
+
+    def __get_series_data(self, url):
+        """
+        Retrieve JSON representations of patch series from the specified
+        series URL, following links to any further pages.
 
         Args:
             url:    The patch series, or patch series list URL to retrieve
-                    series summaries for.
+                    series from.
 
         Returns:
-            A list of SeriesSummary objects.
+            A list of JSON representations of patch series.
         """
-        series_list = list()
+        sdata = list()
+        for page in self.__get_pages(url, CACHE_REVALIDATE):
+            sdata += page
+        return sdata
 
-        logging.debug("get_series_from_url %s", url)
-        response = requests.get(url)
+    def __get_applicable_series(self, sdata):
+        """
+        Select patch series which are complete and don't match skip patterns
+        (self.skip), along with their patches which don't match skip
+        patterns.
 
-        if response.status_code != 200:
-            raise Exception("Can't get series from url %s (%d)" %
-                            (url, response.status_code))
+        Args:
+            sdata:  A list of JSON representations of patch series.
 
-        sdata = response.json()
-        # If there is a single series returned we get a dict, not a list with
-        # a single element. Fix this inconsistency for easier processing.
-        if not isinstance(sdata, list):
-            sdata = [sdata]
+        Returns:
+            A list of tuples, each containing a JSON representation of a
+            series, and a list of JSON representations of its applicable
+            patches.
+        """
+        applicable_list = list()
 
         for series in sdata:
-            series_summary = SeriesSummary()
-
             if not series.get("received_all"):
                 logging.info("skipping incomplete series: [%d] %s",
                              series.get("id"), series.get("name"))
@@ -532,104 +1261,282 @@ class PatchworkV2Project(PatchworkProject):
                              series.get("name"))
                 continue
 
-            cover = series.get("cover_letter")
-            if cover:
-                match = re.match("^(.*)/mbox/?$", cover.get("mbox", ""))
-                if match:
-                    series_summary.set_cover_letter(
-                        ObjectSummary(match.group(1),
-                                      self._get_mbox_url_sfx(),
-                                      cover.get("date"))
-                    )
-
-            logging.info("series [%d] %s", series.get("id"),
-                         series.get("name"))
-
+            patch_list = list()
             for patch in series.get("patches"):
-                logging.info("patch [%d] %s", patch.get("id"),
-                             patch.get("name"))
-
                 if self.skip.search(patch.get("name")):
                     logging.info("skipping patch %d: %s",
                                  patch.get("id"),
                                  patch.get("name"))
                     continue
+                patch_list.append(patch)
+
+            applicable_list.append((series, patch_list))
+
+        return applicable_list
+
+    def __summarize_series(self, series, patch_list, header_dict):
+        """
+        Create a summary of a patch series.
 
-                message_id, subject = \
-                    self._get_header_values_first(patch.get("id"),
-                                                  'Message-ID',
-                                                  'Subject')
-                emails = self._get_emails(patch.get("id"))
-                logging.debug("patch [%d] message_id: %s", patch.get("id"),
-                              message_id)
-                logging.debug("patch [%d] subject: %s", patch.get("id"),
-                              subject)
-                logging.debug("patch [%d] emails: %s", patch.get("id"),
-                              emails)
-                series_summary.set_message_id(message_id)
-                series_summary.set_subject(subject)
-                series_summary.merge_email_addr_set(emails)
-                series_summary.add_patch(
-                    ObjectSummary(self._get_patch_url(patch),
+        Args:
+            series:         JSON representation of the series to summarize.
+            patch_list:     List of JSON representations of the series'
+                            patches to include into the summary.
+            header_dict:    A dictionary of email objects with patch message
+                            headers retrieved with series mboxes, by patch
+                            ID.
+
+        Returns:
+            The series summary (SeriesSummary).
+        """
+        series_summary = SeriesSummary()
+
+        cover = series.get("cover_letter")
+        if cover:
+            match = re.match("^(.*)/mbox/?$", cover.get("mbox", ""))
+            if match:
+                series_summary.set_cover_letter(
+                    ObjectSummary(match.group(1),
                                   self._get_mbox_url_sfx(),
-                                  patch.get("date"),
-                                  patch.get("id"))
+                                  cover.get("date"))
                 )
-            logging.info("---")
 
+        logging.info("series [%d] %s", series.get("id"), series.get("name"))
+
+        for patch in patch_list:
+            logging.info("patch [%d] %s", patch.get("id"), patch.get("name"))
+
+            mbox_email = self._get_patch_headers(patch.get("id"),
+                                                 header_dict)
+            message_id, subject = \
+                self._get_header_values_first(mbox_email,
+                                              'Message-ID',
+                                              'Subject')
+            emails = self._get_emails(mbox_email)
+            logging.debug("patch [%d] message_id: %s", patch.get("id"),
+                          message_id)
+            logging.debug("patch [%d] subject: %s", patch.get("id"),
+                          subject)
+            logging.debug("patch [%d] emails: %s", patch.get("id"),
+                          emails)
+            series_summary.set_message_id(message_id)
+            series_summary.set_subject(subject)
+            series_summary.merge_email_addr_set(emails)
+            series_summary.add_patch(
+                ObjectSummary(self._get_patch_url(patch),
+                              self._get_mbox_url_sfx(),
+                              patch.get("date"),
+                              patch.get("id"))
+            )
+        logging.info("---")
+
+        if not series_summary.is_empty():
+            logging.debug("series [%d] message_id: %s", series.get("id"),
+                          series_summary.message_id)
+            logging.debug("series [%d] subject: %s", series.get("id"),
+                          series_summary.subject)
+            logging.debug("series [%d] emails: %s", series.get("id"),
+                          series_summary.email_addr_set)
+
+        return series_summary
+
+    def __get_series_headers(self, series):
+        """
+        Retrieve the mbox of a patch series, and parse the header blocks of
+        its patches. Messages are matched to patches by Message-ID, or by
+        order, if the patches' Message-IDs are unknown and the number of
+        messages matches the number of patches. Patches without a matching
+        message are left to be retrieved separately.
+
+        Args:
+            series: JSON representation of the series.
+
+        Returns:
+            A dictionary of email objects with patch message headers, by
+            patch ID.
+        """
+        mbox_url = series.get("mbox") or \
+            join_with_slash(self.baseurl, 'series', str(series.get("id")),
+                            'mbox/')
+        patch_list = series.get("patches")
+        patch_by_msgid = dict((patch.get("msgid"), patch)
+                              for patch in patch_list
+                              if patch.get("msgid"))
+
+        header_dict = dict()
+        header_block_list = self.session.get_mbox_headers(mbox_url)
+        for index, header_block in enumerate(header_block_list):
+            mbox_email = email.parser.HeaderParser().parsestr(header_block)
+            msgid = mbox_email.get('Message-ID', '').strip()
+            patch = patch_by_msgid.get(msgid)
+            if patch is None and not patch_by_msgid and \
+                    len(header_block_list) == len(patch_list):
+                patch = patch_list[index]
+            if patch is None:
+                logging.debug("no patch matches message %s in %s",
+                              msgid, mbox_url)
+                continue
+            header_dict[patch.get("id")] = mbox_email
+
+        return header_dict
+
+    def __get_series_summaries(self, sdata):
+        """
+        Create summaries of applicable patch series. Series or patches
+        matching skip patterns (self.skip) are excluded. Mboxes of the
+        included patches are retrieved in parallel, using up to self.workers
+        threads.
+
+        Args:
+            sdata:  A list of JSON representations of patch series.
+
+        Returns:
+            A list of SeriesSummary objects, in the order of the series.
+        """
+        series_list = list()
+
+        applicable_list = self.__get_applicable_series(sdata)
+        # Patch message headers retrieved with series mboxes, by patch ID
+        header_dict = dict()
+        if self.series_mbox:
+            # A patch mbox is as cheap as a series mbox for single patches
+            for series_header_dict in parallel_map(
+                    self.__get_series_headers,
+                    [series for series, patch_list in applicable_list
+                     if len(patch_list) > 1],
+                    self.workers
+            ):
+                header_dict.update(series_header_dict)
+        self._prefetch_messages([patch.get("id")
+                                 for _, patch_list in applicable_list
+                                 for patch in patch_list
+                                 if patch.get("id") not in header_dict])
+
+        for series, patch_list in applicable_list:
+            series_summary = self.__summarize_series(series, patch_list,
+                                                     header_dict)
             if not series_summary.is_empty():
-                logging.debug("series [%d] message_id: %s", series.get("id"),
-                              series_summary.message_id)
-                logging.debug("series [%d] subject: %s", series.get("id"),
-                              series_summary.subject)
-                logging.debug("series [%d] emails: %s", series.get("id"),
-                              series_summary.email_addr_set)
                 series_list.append(series_summary)
 
-        link = response.headers.get("Link")
-        if link is not None:
-            match = re.match('<(.*)>; rel="next"', link)
-            if match:
-                next_url = match.group(1)
-                # TODO Limit recursion
-                series_list += self.__get_series_from_url(next_url)
-
         return series_list
 
-    def __set_patch_check(self, patch, payload):
+    def __get_series_data_by_id_list(self, sid_list):
         """
-        Add a patch "check" payload for the specified JSON representation of a
-        patch.
+        Retrieve JSON representations of patch series with the specified
+        IDs. Series are retrieved in parallel, using up to self.workers
+        threads.
 
         Args:
-            patch:      JSON representation of a patch to add the check for.
-            payload:    The "check" payload dictionary to be converted to JSON.
+            sid_list:   List of IDs of the series to retrieve.
+
+        Returns:
+            A list of JSON representations of patch series, in the order of
+            the IDs.
         """
-        response = requests.post(
-            patch.get("checks"),
-            headers={"Authorization": "Token %s" % self.apikey,
-                     "Content-Type": "application/json"},
-            data=json.dumps(payload)
-        )
+        url_list = [join_with_slash(self.apiurls.get("series"), str(sid))
+                    for sid in sid_list]
+        sdata = list()
+        for series_data in parallel_map(self.__get_series_data, url_list,
+                                        self.workers):
+            sdata += series_data
+
+        return sdata
+
+    def _post_patch_check(self, url, payload):
+        """
+        Post a patch "check" payload to the specified URL, retrying with
+        increasing delays only in case of failures which guarantee the check
+        wasn't stored: connection failures, connection timeouts, and "429 Too
+        Many Requests" or "503 Service Unavailable" responses. Other failures
+        are logged.
+
+        Args:
+            url:        URL of the checks of the patch to add the check for.
+            payload:    The "check" payload dictionary to be converted to JSON.
+
+        Returns:
+            True if the check was posted, False otherwise.
+        """
+        delay = CHECK_RETRY_DELAY
+        for attempt in range(CHECK_RETRY_COUNT + 1):
+            if attempt:
+                logging.info("Waiting %ds before retrying", delay)
+                time.sleep(delay)
+                delay *= 2
+
+            try:
+                response = self.session.post(
+                    url,
+                    headers={"Authorization": "Token %s" % self.apikey,
+                             "Content-Type": "application/json"},
+                    data=json.dumps(payload)
+                )
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.ConnectTimeout) as exc:
+                logging.warning("Failed to post patch check to %s: %s",
+                                url, exc)
+                continue
+            except requests.exceptions.RequestException as exc:
+                logging.error("Failed to post patch check to %s: %s",
+                              url, exc)
+                return False
 
-        if response.status_code not in [200, 201]:
-            logging.warning("Failed to post patch check: %d",
-                            response.status_code)
+            if response.status_code in [200, 201]:
+                return True
+
+            logging.warning("Failed to post patch check to %s: %d",
+                            url, response.status_code)
+            if response.status_code not in \
+                    [requests.codes.too_many_requests,
+                     requests.codes.service_unavailable]:
+                return False
+
+        logging.error("Failed to post patch check to %s (retried %d times)",
+                      url, CHECK_RETRY_COUNT)
+        return False
 
     def set_patch_check(self, pid, jurl, result):
         """
-        Add a patch "check" for the specified patch, with the specified
-        Jenkins build URL and result (TestResult). The result cannot be
-        TestResult.ERROR.
+        Queue a patch "check" for the specified patch, with the specified
+        Jenkins build URL and result (TestResult), to be posted in the
+        background, using up to self.check_workers threads. The result cannot
+        be TestResult.ERROR. Call flush_patch_checks() to wait for queued
+        checks to be posted.
 
         Args:
             pid:    The ID of the patch to add the "check" for.
             jurl:   Jenkins build URL for the "check" to reference.
             result: Test result (TestResult) to feature in the "check" state.
         """
+        check = self._get_patch_check(pid, jurl, result)
+        if check is None:
+            return
+
+        with self.check_lock:
+            if self.check_pool is None:
+                self.check_pool = ThreadPool(self.check_workers)
+            self.check_result_list.append(
+                self.check_pool.apply_async(self._post_patch_check, check)
+            )
+
+    def _get_patch_check(self, pid, jurl, result):
+        """
+        Make a patch "check" for the specified patch, with the specified
+        Jenkins build URL and result (TestResult).
+
+        Args:
+            pid:    The ID of the patch to make the "check" for.
+            jurl:   Jenkins build URL for the "check" to reference.
+            result: Test result (TestResult) to feature in the "check" state.
+
+        Returns:
+            A tuple with the URL to post the "check" to, and the "check"
+            payload dictionary, or None if checks can't be posted without an
+            API key.
+        """
         if self.apikey is None:
             logging.debug("No patchwork api key provided, not setting checks")
-            return
+            return None
 
         payload = {'patch': pid,
                    'state': None,
@@ -642,7 +1549,35 @@ class PatchworkV2Project(PatchworkProject):
             payload['state'] = PW_CHECK_CHOICES['fail']
             payload['description'] = str(result)
 
-        self.__set_patch_check(self.get_patch_by_id(pid), payload)
+        url = join_with_slash(self.apiurls.get("patches"), str(pid),
+                              "checks/")
+        return url, payload
+
+    def flush_patch_checks(self):
+        """
+        Wait for all queued patch checks to be posted, and stop the threads
+        posting them.
+
+        Returns:
+            Number of patch checks which failed to be posted.
+        """
+        with self.check_lock:
+            result_list = self.check_result_list
+            self.check_result_list = list()
+            check_pool = self.check_pool
+            self.check_pool = None
+
+        try:
+            failed = len([result for result in result_list
+                          if not result.get()])
+        finally:
+            if check_pool is not None:
+                check_pool.close()
+                check_pool.join()
+        if result_list:
+            logging.info("posted %d patch checks, %d failed",
+                         len(result_list) - failed, failed)
+        return failed
 
     def get_patch_by_id(self, pid):
         """
@@ -656,8 +1591,10 @@ class PatchworkV2Project(PatchworkProject):
             set of supported attributes depends on which API versions are
             supported by a specific Patchwork instance.
         """
-        response = requests.get(join_with_slash(self.apiurls.get("patches"),
-                                                str(pid)))
+        response = self.session.get(
+            join_with_slash(self.apiurls.get("patches"), str(pid)),
+            cache_mode=CACHE_REVALIDATE
+        )
 
         if response.status_code != 200:
             raise Exception("Can't get patch by id %d (%d)" %
@@ -665,65 +1602,154 @@ class PatchworkV2Project(PatchworkProject):
 
         return response.json()
 
-    def __get_patchsets_by_patch(self, url, seen=set()):
+    def __get_patchsets_by_patch(self, url):
         """
-        Retrieve a list of series summaries, which weren't already "seen", and
-        which contain the patch or patches available at the specified URL.
+        Retrieve summaries of series containing the patch or patches
+        available at the specified URL, page by page. Each series is only
+        returned once.
 
         Args:
             url:    The URL pointing to a patch or a patch list to retrieve
                     the list of patch series from.
-            seen:   A set of IDs of patch series which should be ignored, and
-                    which should have patch series IDs added once they're
-                    processed.
 
         Returns:
-            A list of SeriesSummary objects.
+            A generator of SeriesSummary objects.
         """
-        series_list = list()
+        seen = set()
 
         logging.debug("get_patchsets_by_patch %s", url)
-        response = requests.get(url)
+        for pdata in self.__get_pages(url):
+            # Collect IDs of series the patches belong to, in order of
+            # appearance
+            sid_list = list()
+            for patch in pdata:
+                # For each patch series the patch belongs to
+                for series in patch.get("series"):
+                    sid = series.get("id")
+                    if sid not in seen:
+                        sid_list.append(sid)
+                        seen.add(sid)
+
+            for series_summary in self.__get_series_summaries(
+                    self.__get_series_data_by_id_list(sid_list)
+            ):
+                yield series_summary
+
+    def get_incomplete_series(self):
+        """
+        Get IDs of series found incomplete when listed, to be restored with
+        set_incomplete_series(), e.g. in the next run.
 
-        if response.status_code != 200:
-            raise Exception("Can't get series from url %s (%d)" %
-                            (url, response.status_code))
-
-        pdata = response.json()
-        # If there is a single patch returned we get a dict, not a list with
-        # a single element. Fix this inconsistency for easier processing.
-        if not isinstance(pdata, list):
-            pdata = [pdata]
-
-        for patch in pdata:
-            # For each patch series the patch belongs to
-            for series in patch.get("series"):
-                sid = series.get("id")
-                if sid in seen:
-                    continue
-                else:
-                    series_list += self.__get_series_from_url(
-                        join_with_slash(self.apiurls.get("series"), str(sid))
-                    )
-                    seen.add(sid)
+        Returns:
+            A sorted list of series IDs.
+        """
+        return sorted(self.incomplete_series)
 
-        link = response.headers.get("Link")
-        if link:
-            match = re.match('<(.*)>; rel="next"', link)
-            if match:
-                next_url = match.group(1)
-                # TODO Limit recursion
-                series_list += self.__get_patchsets_by_patch(next_url, seen)
+    def set_incomplete_series(self, sid_list):
+        """
+        Restore IDs of series found incomplete when listed, retrieved with
+        get_incomplete_series(), so they're checked again by the next
+        listing.
 
-        return series_list
+        Args:
+            sid_list:   List of series IDs.
+        """
+        self.incomplete_series |= set(sid_list)
+        if sid_list:
+            logging.info("restored %d incomplete series", len(sid_list))
+
+    def __get_incomplete_series_data(self):
+        """
+        Retrieve JSON representations of series found incomplete when
+        listed, and forget about them. Series which don't exist anymore are
+        skipped. Series are retrieved in parallel, using up to self.workers
+        threads.
+
+        Returns:
+            A list of JSON representations of patch series.
+        """
+        def get_series_data(sid):
+            url = join_with_slash(self.apiurls.get("series"), str(sid))
+            response = self.session.get(url, cache_mode=CACHE_REVALIDATE)
+            if response.status_code == requests.codes.not_found:
+                logging.info("incomplete series %d is gone", sid)
+                return None
+            if response.status_code != 200:
+                raise Exception("Can't get data from url %s (%d)" %
+                                (url, response.status_code))
+            return response.json()
+
+        sid_list = self.get_incomplete_series()
+        logging.debug("checking incomplete series again: %s", sid_list)
+        sdata = [series for series in
+                 parallel_map(get_series_data, sid_list, self.workers)
+                 if series is not None]
+        self.incomplete_series.clear()
+        return sdata
+
+    def __remember_incomplete_series(self, sdata):
+        """
+        Remember IDs of incomplete series, to check them again in the next
+        listing. Series older than self.series_max_age relative to the last
+        processed patch are forgotten, and only the newest
+        self.series_max_count series are kept.
+
+        Args:
+            sdata:  A list of JSON representations of patch series.
+        """
+        min_date = dateutil.parser.parse(self.since) - self.series_max_age
+        for series in sdata:
+            if series.get("received_all"):
+                continue
+            if dateutil.parser.parse(series.get("date")) < min_date:
+                logging.info("forgetting incomplete series %d, dated %s",
+                             series.get("id"), series.get("date"))
+                continue
+            self.incomplete_series.add(series.get("id"))
+
+        for sid in sorted(self.incomplete_series)[:-self.series_max_count]:
+            logging.info("forgetting incomplete series %d", sid)
+            self.incomplete_series.discard(sid)
+
+    def __get_series_by_list(self, url):
+        """
+        Retrieve summaries of series found incomplete by the previous
+        listing, and then of series from the specified series list URL, page
+        by page. Each series is only returned once. IDs of series still
+        incomplete are remembered for the next listing.
+
+        Args:
+            url:    The URL pointing to a series list.
+
+        Returns:
+            A generator of SeriesSummary objects.
+        """
+        seen = set()
+
+        logging.debug("get_series_by_list %s", url)
+        for sdata in itertools.chain([self.__get_incomplete_series_data()],
+                                     self.__get_pages(url)):
+            sdata = [series for series in sdata
+                     if series.get("id") not in seen]
+            seen |= set(series.get("id") for series in sdata)
+            self.__remember_incomplete_series(sdata)
+            for series_summary in self.__get_series_summaries(sdata):
+                yield series_summary
 
     def get_new_patchsets(self):
         """
-        Retrieve a list of series summaries. Series and patches which names
-        match one of skip patterns (self.skip) are excluded.
+        Retrieve summaries of series with patches received since the last
+        processed patch. Series and patches which names match one of skip
+        patterns (self.skip) are excluded. Summaries are generated as pages
+        of patches, or series, are retrieved, depending on the discovery mode
+        (self.discovery).
+
+        In the DISCOVERY_SERIES mode series are selected by their own date,
+        and series still incomplete when listed are checked again by the
+        next listing, see get_incomplete_series().
 
         Returns:
-            A list series summaries.
+            A generator of series summaries.
         """
         # Timestamp filtering for 'since' parameter uses '>=' operation so by
         # using unmodified time, we'd get the last series from previous run
@@ -734,13 +1760,64 @@ class PatchworkV2Project(PatchworkProject):
         ) + datetime.timedelta(seconds=1)
 
         logging.debug("get_new_patchsets since %s", nsince.isoformat())
-        new_series = self.__get_patchsets_by_patch(
-            "%s?project=%d&since=%s" % (self.apiurls.get("patches"),
-                                        self.project_id,
-                                        urllib.quote(
-                                            nsince.isoformat()
-                                        )))
-        return new_series
+        if self.discovery == DISCOVERY_SERIES:
+            return self.__get_series_by_list(
+                "%s?project=%d&since=%s&per_page=%d" % (
+                    self.apiurls.get("series"),
+                    self.project_id,
+                    urllib.quote(nsince.isoformat()),
+                    self.per_page
+                )
+            )
+
+        return self.__get_patchsets_by_patch(
+            "%s?project=%d&since=%s&per_page=%d" % (
+                self.apiurls.get("patches"),
+                self.project_id,
+                urllib.quote(nsince.isoformat()),
+                self.per_page
+            )
+        )
+
+    def __get_patches_by_listing(self, pid_list):
+        """
+        Retrieve patch objects by patch IDs from the project's patch list,
+        page by page, between the dates of the patches with the lowest and
+        the highest ID. Listing stops once all patches are found, or once it
+        took as many pages as looking up the patches left to find one by one
+        would take requests.
+
+        Args:
+            pid_list:   List of IDs of the patches to retrieve.
+
+        Returns:
+            A dictionary of patch objects, by patch ID, missing the patches
+            which weren't found.
+        """
+        first, last = self.get_patches_by_id([min(pid_list), max(pid_list)])
+        patch_dict = dict((patch.get("id"), patch) for patch in (first, last))
+        date_list = sorted(dateutil.parser.parse(patch.get("date"))
+                           for patch in (first, last))
+        # The "before" filter is exclusive, unlike "since"
+        url = "%s?project=%d&since=%s&before=%s&per_page=%d" % (
+            self.apiurls.get("patches"),
+            self.project_id,
+            urllib.quote(date_list[0].isoformat()),
+            urllib.quote((date_list[1] +
+                          datetime.timedelta(seconds=1)).isoformat()),
+            self.per_page
+        )
+
+        wanted = set(pid_list)
+        for page_count, pdata in enumerate(self.__get_pages(url), 1):
+            for patch in pdata:
+                if patch.get("id") in wanted:
+                    patch_dict[patch.get("id")] = patch
+            if len(patch_dict) == len(wanted) or \
+                    page_count >= len(wanted) - len(patch_dict):
+                break
+
+        return patch_dict
 
     def get_patchsets(self, patchlist):
         """
@@ -748,6 +1825,11 @@ class PatchworkV2Project(PatchworkProject):
         list of patch IDs. Patches which names match one of skip patterns
         (self.skip) are excluded from the series.
 
+        Patches are taken from pages of the project's patch list covering
+        their dates, see __get_patches_by_listing(), and the ones not found
+        there are looked up one by one, using up to self.workers threads.
+        Each series is retrieved only once, in parallel with the others.
+
         Args:
             patchlist:  List of patch IDs to retrieve series summaries for,
                         or skip over.
@@ -755,31 +1837,182 @@ class PatchworkV2Project(PatchworkProject):
         Returns:
             A list of SeriesSummary objects.
         """
-        series_list = list()
-        seen = set()
-
         logging.debug("get_patchsets: %s", patchlist)
-        # For each patch ID
+        # Unique patch IDs, in order
+        pid_list = list()
         for pid in patchlist:
-            patch = self.get_patch_by_id(pid)
-            # For each series the patch belongs to
-            for series in patch.get("series"):
-                sid = series.get("id")
-                if sid not in seen:
-                    series_list += self.__get_series_from_url(
-                        join_with_slash(self.apiurls.get("series"),
-                                        str(sid))
-                    )
-                    seen.add(sid)
+            if pid not in pid_list:
+                pid_list.append(pid)
 
-        return series_list
+        # Patch lists are only worth it for more than the first and last
+        if len(pid_list) > 2:
+            patch_dict = self.__get_patches_by_listing(pid_list)
+        else:
+            patch_dict = dict()
+        missing_list = [pid for pid in pid_list if pid not in patch_dict]
+        if missing_list:
+            logging.debug("looking up patches missing from lists: %s",
+                          missing_list)
+        patch_dict.update(zip(missing_list,
+                              self.get_patches_by_id(missing_list)))
+
+        # IDs of series the patches belong to, in order of appearance
+        sid_list = list()
+        for pid in pid_list:
+            for series in patch_dict[pid].get("series"):
+                if series.get("id") not in sid_list:
+                    sid_list.append(series.get("id"))
+
+        return self.__get_series_summaries(
+            self.__get_series_data_by_id_list(sid_list)
+        )
+
+
+class PatchworkExecutor(object):
+    """
+    An executor of Patchwork interface calls, shared by interfaces of many
+    projects, so they all progress concurrently on a single thread pool. The
+    number of calls submitted and not yet completed is capped with a
+    semaphore: submitting more waits for some to complete. Calls executed by
+    the executor must not submit calls to it themselves.
+    """
+
+    def __init__(self, workers=DEFAULT_EXECUTOR_WORKERS,
+                 limit=DEFAULT_EXECUTOR_LIMIT):
+        """
+        Initialize an executor and start its threads.
+
+        Args:
+            workers:    Number of threads to execute calls with.
+            limit:      Maximum number of calls submitted and not yet
+                        completed.
+        """
+        self.pool = ThreadPool(workers)
+        self.semaphore = threading.BoundedSemaphore(limit)
+
+    def submit(self, func, *args):
+        """
+        Submit a call for execution, waiting for other submitted calls to
+        complete first, if there are too many of them.
+
+        Args:
+            func:   The function to call.
+            *args:  The arguments to call the function with.
+
+        Returns:
+            An AsyncResult object (see multiprocessing.pool), which get()
+            method waits for the call to complete and returns its result, or
+            raises its exception.
+        """
+        def call():
+            try:
+                return func(*args)
+            finally:
+                self.semaphore.release()
+
+        self.semaphore.acquire()
+        try:
+            return self.pool.apply_async(call)
+        except Exception:
+            self.semaphore.release()
+            raise
+
+    def close(self):
+        """
+        Wait for the submitted calls to complete, and stop the threads.
+        """
+        self.pool.close()
+        self.pool.join()
+
+
+class AsyncPatchworkV2Project(PatchworkV2Project):
+    """
+    A Patchwork REST interface with non-blocking variants of its calls,
+    executed by a PatchworkExecutor, which can be shared by interfaces of
+    many projects. Each of them returns an AsyncResult object (see
+    multiprocessing.pool) for the result of the corresponding blocking call.
+    Calls retrieving series update the interface state, so only one of them
+    should be in progress at a time for an interface.
+    """
+
+    def __init__(self, executor, *args, **kwargs):
+        """
+        Initialize a non-blocking Patchwork REST interface.
+
+        Args:
+            executor:   The PatchworkExecutor to execute calls with.
+            *args:      Positional arguments for PatchworkV2Project.
+            **kwargs:   Keyword arguments for PatchworkV2Project.
+        """
+        self.executor = executor
+        super(AsyncPatchworkV2Project, self).__init__(*args, **kwargs)
+
+    def get_new_patchsets_async(self):
+        """
+        Start retrieving summaries of new series, see get_new_patchsets().
+
+        Returns:
+            An AsyncResult for a list of SeriesSummary objects.
+        """
+        return self.executor.submit(
+            lambda: list(self.get_new_patchsets())
+        )
+
+    def get_patchsets_async(self, patchlist):
+        """
+        Start retrieving summaries of series with the specified patches, see
+        get_patchsets().
+
+        Args:
+            patchlist:  List of patch IDs to retrieve series summaries for,
+                        or skip over.
+
+        Returns:
+            An AsyncResult for a list of SeriesSummary objects.
+        """
+        return self.executor.submit(self.get_patchsets, patchlist)
+
+    def get_patch_by_id_async(self, pid):
+        """
+        Start retrieving a patch object by patch ID, see get_patch_by_id().
+
+        Args:
+            pid:    ID of the patch to retrieve.
+
+        Returns:
+            An AsyncResult for the patch object.
+        """
+        return self.executor.submit(self.get_patch_by_id, pid)
+
+    def set_patch_check_async(self, pid, jurl, result):
+        """
+        Start posting a patch "check" for the specified patch, with the
+        specified Jenkins build URL and result (TestResult), see
+        set_patch_check(). The check is posted by the executor directly,
+        without queueing it for flush_patch_checks().
+
+        Args:
+            pid:    The ID of the patch to add the "check" for.
+            jurl:   Jenkins build URL for the "check" to reference.
+            result: Test result (TestResult) to feature in the "check" state.
+
+        Returns:
+            An AsyncResult for True if the check was posted, or False
+            otherwise, including when there is no API key to post it with.
+        """
+        check = self._get_patch_check(pid, jurl, result)
+        if check is None:
+            return self.executor.submit(lambda: False)
+        return self.executor.submit(self._post_patch_check, *check)
 
 
 class PatchworkV1Project(PatchworkProject):
     """
     A Patchwork XML RPC interface
     """
-    def __init__(self, baseurl, projectname, lastpatch, skip=[]):
+    def __init__(self, baseurl, projectname, lastpatch, skip=[],
+                 session=None, workers=DEFAULT_WORKERS,
+                 encode_threshold=None, message_cache=None):
         """
         Initialize a Patchwork XML RPC interface.
 
@@ -789,29 +2022,55 @@ class PatchworkV1Project(PatchworkProject):
             lastpatch:      Maximum processed patch ID to start with.
             skip:           List of additional regex patterns to skip in patch
                             names, case insensitive.
-        """
+            session:        PatchworkSession to send XML RPC requests and
+                            retrieve patch mboxes with, or None to use the
+                            session shared by all interfaces.
+            workers:        Maximum number of threads to retrieve patch
+                            mboxes of a completed series with, in parallel.
+            encode_threshold:   Minimum size of XML RPC request bodies to
+                                gzip, in bytes, or None to never gzip
+                                requests.
+            message_cache:  Patch message cache (MessageCache) to share with
+                            other interfaces, or None to use a new one.
+        """
+        if session is not None:
+            self.session = session
         # A list of patch object fields to request from RH fork of Patchwork
         # Only set if it's a RH fork.
         self.fields = None
+        # Minimum size of XML RPC request bodies to gzip, or None
+        self.encode_threshold = encode_threshold
         # XML RPC interface to Patchwork
         self.rpc = self.__get_rpc(baseurl)
+        # True if the XML RPC interface is assumed to support multicalls
+        self.multicall = True
         # Maximum processed patch ID
         self.lastpatch = lastpatch
         # A dictionary of patch series identified by a "series ID".
         # Series ID is an opaque string generated from patch properties
         # (such as message ID, submitter ID, etc.) and representing (not
         # necessarily uniquely) a patch series. Each patch series is a
-        # dictionary of XML RPC patch objects identified by the patch's
+        # dictionary of patch records (PatchRecord) identified by the patch's
         # position in the series (extracted from the message subject).
         self.series = dict()
-        # A dictionary of series cover letter patch objects identified by
+        # A dictionary of series cover letter patch records identified by
         # "series IDs", the same ones used in "series' above.
         self.covers = dict()
+        # Date of the latest patch seen
+        self.last_date = ''
+        # Maximum age of incomplete series kept, relative to the date of the
+        # latest patch seen, and maximum number of them
+        self.series_max_age = SERIES_MAX_AGE
+        self.series_max_count = SERIES_MAX_COUNT
+        # Number of incomplete series evicted
+        self.evicted_series = 0
         super(PatchworkV1Project, self).__init__(
             baseurl,
             projectname,
             skip,
-            is_rh_fork=True if self.fields else False
+            is_rh_fork=True if self.fields else False,
+            workers=workers,
+            message_cache=message_cache
         )
 
     # FIXME Just move this into __init__
@@ -826,7 +2085,12 @@ class PatchworkV1Project(PatchworkProject):
         Returns:
             The XML RPC interface for the Patchwork
         """
-        rpc = xmlrpclib.ServerProxy(join_with_slash(baseurl, "xmlrpc/"))
+        url = join_with_slash(baseurl, "xmlrpc/")
+        rpc = xmlrpclib.ServerProxy(
+            url,
+            SessionTransport(self.session, urlparse.urlsplit(url)[0],
+                             self.encode_threshold)
+        )
         try:
             ver = rpc.pw_rpc_version()
             # check for normal patchwork1 xmlrpc version numbers
@@ -913,6 +2177,170 @@ class PatchworkV1Project(PatchworkProject):
 
         return patch
 
+    def get_partial_series(self):
+        """
+        Get the patches of partially assembled series, to be restored with
+        set_partial_series(), e.g. in the next run. All of them are
+        included, as the next run resumes after the last patch seen, and
+        won't see their patches again.
+
+        Returns:
+            List of tuples, each containing a series ID, a patch position in
+            the series (zero for cover letters), and a patch record
+            dictionary (see PatchRecord.to_dict()).
+        """
+        partial_series = list()
+        for seriesid, patch_dict in self.series.items():
+            for position, patch in patch_dict.items():
+                partial_series.append((seriesid, position, patch.to_dict()))
+        for seriesid, cover in self.covers.items():
+            partial_series.append((seriesid, 0, cover.to_dict()))
+
+        return partial_series
+
+    def set_partial_series(self, partial_series):
+        """
+        Restore patches of partially assembled series, retrieved with
+        get_partial_series().
+
+        Args:
+            partial_series: List of tuples, each containing a series ID, a
+                            patch position in the series (zero for cover
+                            letters), and a patch record dictionary.
+        """
+        for (seriesid, position, patch) in partial_series:
+            if position == 0:
+                self.covers[seriesid] = PatchRecord(patch)
+            else:
+                self.series.setdefault(seriesid, dict())[position] = \
+                    PatchRecord(patch)
+            self.last_date = max(self.last_date, patch.get("date"))
+        if partial_series:
+            logging.info("restored %d patches of %d partial series",
+                         len(partial_series),
+                         len(set(seriesid
+                                 for (seriesid, _, _) in partial_series)))
+
+    def __get_root_comment_headers(self, patch_list):
+        """
+        Parse the original e-mail headers of patches, provided by the RH
+        fork, so header values are taken from them instead of the patch
+        mboxes.
+
+        Args:
+            patch_list: A list of XML RPC patch objects or patch records
+                        (PatchRecord).
+
+        Returns:
+            A dictionary of email objects with patch message headers, by
+            patch ID, for the patches which have the headers provided.
+        """
+        header_dict = dict()
+        for patch in patch_list:
+            headers = patch.get("headers") or \
+                patch.get("root_comment", {}).get("headers")
+            if headers:
+                header_dict[patch.get("id")] = \
+                    email.parser.HeaderParser().parsestr(headers)
+        return header_dict
+
+    def __evict_series(self):
+        """
+        Evict incomplete series with the last patch older than
+        self.series_max_age relative to the latest patch seen, and then the
+        oldest series over the self.series_max_count limit.
+        """
+        # Dates of the latest patches of series, by series ID
+        date_dict = dict()
+        for seriesid, patch_dict in self.series.items():
+            date_dict[seriesid] = max(patch.get("date")
+                                      for patch in patch_dict.values())
+        for seriesid, cover in self.covers.items():
+            date_dict[seriesid] = max(date_dict.get(seriesid, ''),
+                                      cover.get("date"))
+
+        evict_list = list()
+        keep_list = sorted(date_dict.items(), key=lambda item: item[1],
+                           reverse=True)
+        if self.last_date:
+            min_date = dateutil.parser.parse(self.last_date) - \
+                self.series_max_age
+            evict_list = [item for item in keep_list
+                          if dateutil.parser.parse(item[1]) < min_date]
+            keep_list = [item for item in keep_list
+                         if item not in evict_list]
+        evict_list += keep_list[self.series_max_count:]
+
+        for seriesid, date in evict_list:
+            logging.info("evicting incomplete series %s, last patch dated %s",
+                         seriesid, date)
+            self.series.pop(seriesid, None)
+            self.covers.pop(seriesid, None)
+        if evict_list:
+            self.evicted_series += len(evict_list)
+            logging.info("evicted %d incomplete series, %d in total, "
+                         "%d left", len(evict_list), self.evicted_series,
+                         len(date_dict) - len(evict_list))
+
+    def __call_batch(self, call_list):
+        """
+        Send a list of XML RPC calls in a single request, if the server
+        supports multicalls, or separately otherwise.
+
+        Args:
+            call_list:  A list of tuples, each containing the name of the
+                        method to call and a tuple of its arguments.
+
+        Returns:
+            A list of the call results, in the order of the calls.
+        """
+        if self.multicall:
+            try:
+                return rpc_multicall(self.rpc, call_list)
+            except xmlrpclib.Fault as err:
+                if 'system.multicall' not in err.faultString:
+                    raise
+                logging.info("%s doesn't support XML RPC multicalls, "
+                             "sending calls separately", self.baseurl)
+                self.multicall = False
+
+        return [getattr(self.rpc, name)(*args) for name, args in call_list]
+
+    def get_patches_by_id(self, pid_list):
+        """
+        Retrieve patch objects by patch IDs, sending up to PATCH_BATCH_SIZE
+        lookups in a single XML RPC request. Each patch is looked up once,
+        even if its ID is repeated.
+
+        Args:
+            pid_list:   List of IDs of the patches to retrieve.
+
+        Returns:
+            The list of patch objects as returned by XML RPC, in the order of
+            the IDs.
+
+        Raises:
+            Exception if any of the patches is not found.
+        """
+        if not self.is_rh_fork:
+            extra_args = ()
+        else:
+            # internal RH only: special hook to get original subject line
+            extra_args = (self.fields,)
+
+        patch_dict = dict()
+        unique_pid_list = sorted(set(pid_list))
+        for start in range(0, len(unique_pid_list), PATCH_BATCH_SIZE):
+            batch = unique_pid_list[start:start + PATCH_BATCH_SIZE]
+            for pid, patch in zip(batch, self.__call_batch(
+                    [('patch_get', (pid,) + extra_args) for pid in batch]
+            )):
+                if patch is None or patch == {}:
+                    raise Exception('Can\'t get patch by id %d' % pid)
+                patch_dict[pid] = self.__update_patch_name(patch)
+
+        return [patch_dict[pid] for pid in pid_list]
+
     def __get_patch_list(self, filt):
         """
         Get a list of patch XML RPC objects, filtered according to the
@@ -996,6 +2424,7 @@ class PatchworkV1Project(PatchworkProject):
         pid = patch.get("id")
         pname = patch.get("name")
         result = None
+        self.last_date = max(self.last_date, patch.get("date"))
 
         if self.skip.search(pname):
             logging.info("skipping patch %d: %s", pid, pname)
@@ -1036,8 +2465,8 @@ class PatchworkV1Project(PatchworkProject):
 
             # If it's a cover letter
             if cpatch == 0:
-                # Remember the cover letter object
-                self.covers[seriesid] = patch
+                # Remember the cover letter record
+                self.covers[seriesid] = PatchRecord(patch)
             # Else, if it's a patch
             elif cpatch >= 1 and cpatch <= mpatch:
                 #
@@ -1053,8 +2482,8 @@ class PatchworkV1Project(PatchworkProject):
                     # Skip it
                     return result
 
-                # Add it to the series
-                self.series[seriesid][cpatch] = patch
+                # Add its record to the series
+                self.series[seriesid][cpatch] = PatchRecord(patch)
 
                 #
                 # Output completed series
@@ -1076,15 +2505,25 @@ class PatchworkV1Project(PatchworkProject):
                                           cover.get("id"))
                         )
 
+                    header_dict = self.__get_root_comment_headers(
+                        self.series[seriesid].values()
+                    )
+                    self._prefetch_messages(
+                        [spatch.get("id")
+                         for spatch in self.series[seriesid].values()
+                         if spatch.get("id") not in header_dict]
+                    )
                     # For each patch position in series in order
                     for cpatch in sorted(self.series[seriesid].keys()):
                         patch = self.series[seriesid].get(cpatch)
                         pid = patch.get("id")
+                        mbox_email = self._get_patch_headers(pid,
+                                                             header_dict)
                         message_id, subject = \
-                            self._get_header_values_first(pid,
+                            self._get_header_values_first(mbox_email,
                                                           'Message-ID',
                                                           'Subject')
-                        emails = self._get_emails(pid)
+                        emails = self._get_emails(mbox_email)
                         self.__log_patch(pid, patch.get("name"),
                                          message_id, emails)
                         result.set_message_id(message_id)
@@ -1101,6 +2540,10 @@ class PatchworkV1Project(PatchworkProject):
                     logging.info("subject: %s", result.subject)
                     logging.info("emails: %s", result.email_addr_set)
                     logging.info("---")
+
+                    # Forget the completed series
+                    del self.series[seriesid]
+                    self.covers.pop(seriesid, None)
             # Otherwise the patch message position is out of range
             else:
                 logging.info("skipping patch %d: %s", pid, pname)
@@ -1109,10 +2552,13 @@ class PatchworkV1Project(PatchworkProject):
                 return result
         # Else, it's a single patch
         else:
-            message_id, subject = self._get_header_values_first(pid,
+            mbox_email = self._get_patch_headers(
+                pid, self.__get_root_comment_headers([patch])
+            )
+            message_id, subject = self._get_header_values_first(mbox_email,
                                                                 'Message-ID',
                                                                 'Subject')
-            emails = self._get_emails(pid)
+            emails = self._get_emails(mbox_email)
             self.__log_patch(pid, pname, message_id, emails)
             result = SeriesSummary()
             result.set_message_id(message_id)
@@ -1130,24 +2576,98 @@ class PatchworkV1Project(PatchworkProject):
 
         return result
 
-    def get_new_patchsets(self):
+    def __get_new_patches(self):
         """
-        Retrieve a list of summaries for any completed series comprised
-        of patches with ID greater than the maximum seen patch ID
-        (self.lastpatch). Update the maximum seen patch ID (self.lastpatch).
+        Retrieve patch XML RPC objects with ID greater than the maximum seen
+        patch ID (self.lastpatch), in windows of up to PATCH_BATCH_SIZE
+        patches. Patchwork orders patch lists by date, so each window after
+        the first starts after the date of the last patch of the previous
+        one. All patches with that date are retrieved separately, in windows
+        as well, so none are missed, whichever of them ended up in the
+        previous window.
 
         Returns:
-            A list of SeriesSummary objects.
+            A generator of patch XML RPC objects, in the order of their
+            dates.
+        """
+        filt = {'project_id': self.project_id,
+                'id__gt': self.lastpatch}
+        while True:
+            patch_list = self.__get_patch_list(
+                dict(filt, max_count=PATCH_BATCH_SIZE)
+            )
+            for patch in patch_list:
+                yield patch
+
+            if len(patch_list) < PATCH_BATCH_SIZE:
+                return
+
+            date = patch_list[-1].get("date")
+            seen = set(patch.get("id") for patch in patch_list)
+            for patch in self.__get_dated_patches(dict(filt, date=date)):
+                if patch.get("id") not in seen:
+                    yield patch
+            filt['date__gt'] = date
+
+    def __get_dated_patches(self, filt):
         """
-        series_list = list()
+        Retrieve patch XML RPC objects matching a filter for patches with a
+        particular date, in windows of up to PATCH_BATCH_SIZE patches.
+        Patchwork doesn't order patches with the same date, so windows are
+        taken from ranges of patch IDs. A range with more patches than fit a
+        window is split in two, and both are retrieved instead: an
+        unbounded range at the maximum ID returned, and a bounded one in the
+        middle.
 
+        Args:
+            filt:   The filter dictionary, with "id__gt" and "date" keys.
+
+        Returns:
+            A generator of patch XML RPC objects, in the order of their IDs.
+        """
+        # Stack of ranges of patch IDs to retrieve, exclusive, the next on
+        # top, with None for no upper limit
+        range_list = [(filt['id__gt'], None)]
+        while range_list:
+            low, high = range_list.pop()
+            range_filt = dict(filt, id__gt=low, max_count=PATCH_BATCH_SIZE)
+            if high is not None:
+                range_filt['id__lt'] = high
+            patch_list = self.__get_patch_list(range_filt)
+            if len(patch_list) < PATCH_BATCH_SIZE or \
+                    (high is not None and high - low - 1 <= PATCH_BATCH_SIZE):
+                for patch in sorted(patch_list,
+                                    key=lambda patch: patch.get("id")):
+                    yield patch
+                continue
+
+            if high is None:
+                split = max(patch.get("id") for patch in patch_list)
+            else:
+                split = (low + high) // 2
+            logging.debug("more than %d patches dated %s with IDs from %d, "
+                          "splitting at %d", PATCH_BATCH_SIZE,
+                          filt.get("date"), low + 1, split)
+            range_list.append((split, high))
+            range_list.append((low, split + 1))
+
+    def get_new_patchsets(self):
+        """
+        Retrieve summaries for any completed series comprised of patches
+        with ID greater than the maximum seen patch ID (self.lastpatch).
+        Update the maximum seen patch ID (self.lastpatch) as the summaries
+        are retrieved. Patches are retrieved in windows, so only a window is
+        kept in memory at a time.
+
+        Returns:
+            A generator of SeriesSummary objects.
+        """
         logging.debug("get_new_patchsets: %d", self.lastpatch)
-        for patch in self.__get_patch_list({'project_id': self.project_id,
-                                            'id__gt': self.lastpatch}):
+        for patch in self.__get_new_patches():
             pset = self.__parse_patch(patch)
             if pset:
-                series_list.append(pset)
-        return series_list
+                yield pset
+        self.__evict_series()
 
     def get_patchsets(self, patchlist):
         """
@@ -1165,9 +2685,9 @@ class PatchworkV1Project(PatchworkProject):
         series_list = list()
 
         logging.debug("get_patchsets: %s", patchlist)
-        for pid in patchlist:
-            patch = self.get_patch_by_id(pid)
+        for patch in self.get_patches_by_id(patchlist):
             pset = self.__parse_patch(patch)
             if pset:
                 series_list.append(pset)
+        self.__evict_series()
         return series_list
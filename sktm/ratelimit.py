@@ -0,0 +1,272 @@
+# Copyright (c) 2018 Red Hat, Inc. All rights reserved. This copyrighted
+# material is made available to anyone wishing to use, modify, copy, or
+# redistribute it subject to the terms and conditions of the GNU General
+# Public License v.2 or later.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import logging
+import threading
+import time
+
+# Default sustained request rate per host, requests per second
+DEFAULT_RATE = 10.0
+# Default maximum number of requests per host to send in a burst
+DEFAULT_BURST = 20
+# Default maximum number of concurrent requests per host
+DEFAULT_MAX_CONCURRENCY = 10
+
+# Factor to multiply the concurrency limit by on overload
+DECREASE_FACTOR = 0.5
+# Minimum interval between concurrency limit decreases, in seconds, so a
+# single overload episode seen by many concurrent requests only counts once
+DECREASE_INTERVAL = 1.0
+# A response is considered a latency spike if it took this many times longer
+# than the average
+LATENCY_SPIKE_FACTOR = 4.0
+# Weight of the latest latency in the average
+LATENCY_WEIGHT = 0.2
+# Number of responses to average latency over before detecting spikes
+LATENCY_WARMUP = 5
+
+
+class HostLimit(object):
+    """
+    Request rate and concurrency limits of a single host. The rate is
+    limited with a token bucket, unless disabled, and the concurrency limit
+    is adjusted with additive increase and multiplicative decrease (AIMD):
+    it grows by about one request per window of successful requests, and
+    halves on "429 Too Many Requests" and server error responses, failed
+    requests, and latency spikes. No requests are sent until the period
+    requested with a "Retry-After" header ends.
+    """
+
+    def __init__(self, host, rate, burst, max_concurrency):
+        """
+        Initialize host limits.
+
+        Args:
+            host:               Name of the host, for logging.
+            rate:               Sustained request rate, requests per second,
+                                or zero to not limit the rate.
+            burst:              Maximum number of requests to send in a
+                                burst.
+            max_concurrency:    Maximum number of concurrent requests.
+        """
+        self.host = host
+        self.rate = float(rate)
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        # Current concurrency limit, starting low and growing on success
+        self.concurrency = 1.0
+        # Number of requests in flight
+        self.in_flight = 0
+        # Number of tokens in the bucket
+        self.tokens = float(burst)
+        # Time the bucket was last refilled, or the time it's blocked until
+        self.refill_time = time.time()
+        # Time no requests should be sent until, as requested by the host
+        self.retry_time = 0
+        # Time the concurrency limit was last decreased
+        self.decrease_time = 0
+        # Average response latency in seconds, and the number of responses
+        # it's calculated from
+        self.latency = 0.0
+        self.latency_count = 0
+        # Statistics
+        self.requests = 0
+        self.overloads = 0
+        self.decreases = 0
+        self.wait_time = 0.0
+        # Condition signalled when a request completes
+        self.cond = threading.Condition()
+
+    def __refill(self, now):
+        """
+        Add tokens accumulated since the last refill to the bucket. Must be
+        called with the condition lock held.
+
+        Args:
+            now:    Current time.
+        """
+        if now > self.refill_time:
+            self.tokens = min(float(self.burst),
+                              self.tokens +
+                              (now - self.refill_time) * self.rate)
+            self.refill_time = now
+
+    def acquire(self):
+        """
+        Wait until a request can be sent within the limits, and account for
+        it. Every call must be followed by a release() call.
+        """
+        start = time.time()
+        with self.cond:
+            while True:
+                now = time.time()
+                self.__refill(now)
+                if self.in_flight >= int(self.concurrency):
+                    self.cond.wait()
+                elif now < self.retry_time:
+                    self.cond.wait(self.retry_time - now)
+                elif self.rate and self.tokens < 1:
+                    self.cond.wait(max(self.refill_time - now, 0) +
+                                   (1 - self.tokens) / self.rate)
+                else:
+                    break
+            if self.rate:
+                self.tokens -= 1
+            self.in_flight += 1
+            self.requests += 1
+            self.wait_time += time.time() - start
+
+    def release(self, status_code, latency, retry_after=None):
+        """
+        Account for a completed request and adjust the concurrency limit
+        according to its outcome.
+
+        Args:
+            status_code:    Response status code, or None if the request
+                            failed without a response.
+            latency:        Time the request took, in seconds.
+            retry_after:    Number of seconds the server asked to wait
+                            before sending more requests, or None.
+        """
+        with self.cond:
+            self.in_flight -= 1
+            now = time.time()
+
+            spike = self.latency_count >= LATENCY_WARMUP and \
+                latency > self.latency * LATENCY_SPIKE_FACTOR
+            self.latency += (latency - self.latency) * \
+                (LATENCY_WEIGHT if self.latency_count else 1)
+            self.latency_count += 1
+
+            if status_code is None or status_code == 429 or \
+                    status_code >= 500 or spike:
+                self.overloads += 1
+                if retry_after:
+                    # Stop sending requests until the server is ready, and
+                    # don't send a burst right after
+                    self.retry_time = max(self.retry_time, now + retry_after)
+                    self.tokens = 0
+                    self.refill_time = max(self.refill_time, self.retry_time)
+                if now - self.decrease_time >= DECREASE_INTERVAL:
+                    self.decrease_time = now
+                    self.__set_concurrency(self.concurrency * DECREASE_FACTOR)
+            else:
+                self.__set_concurrency(self.concurrency +
+                                       1 / self.concurrency)
+
+            self.cond.notify_all()
+
+    def __set_concurrency(self, concurrency):
+        """
+        Set the concurrency limit, clamped to the allowed range, logging
+        changes of its integer value. Must be called with the condition lock
+        held.
+
+        Args:
+            concurrency:    The new concurrency limit.
+        """
+        concurrency = max(1.0, min(float(self.max_concurrency), concurrency))
+        if int(concurrency) < int(self.concurrency):
+            self.decreases += 1
+            logging.info("decreasing %s concurrency limit to %d",
+                         self.host, int(concurrency))
+        elif int(concurrency) > int(self.concurrency):
+            logging.debug("increasing %s concurrency limit to %d",
+                          self.host, int(concurrency))
+        self.concurrency = concurrency
+
+    def get_stats(self):
+        """
+        Get current limits and statistics of the host.
+
+        Returns:
+            A dictionary with the current concurrency limit, the rate limit,
+            the average latency in seconds, numbers of requests, overloads
+            and concurrency limit decreases, and the total time requests
+            waited for the limits, in seconds.
+        """
+        with self.cond:
+            return {'concurrency': int(self.concurrency),
+                    'rate': self.rate,
+                    'latency': self.latency,
+                    'requests': self.requests,
+                    'overloads': self.overloads,
+                    'decreases': self.decreases,
+                    'wait_time': self.wait_time}
+
+
+class RateLimiter(object):
+    """
+    A set of per-host request rate and concurrency limits (HostLimit), safe
+    to share between threads.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        Initialize a rate limiter.
+
+        Args:
+            rate:               Sustained request rate per host, requests
+                                per second, or zero to not limit the rate.
+            burst:              Maximum number of requests per host to send
+                                in a burst.
+            max_concurrency:    Maximum number of concurrent requests per
+                                host.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        # Dictionary of host limits, by host name
+        self.host_limits = dict()
+        # Lock protecting the dictionary of host limits
+        self.lock = threading.Lock()
+
+    def get_host_limit(self, host):
+        """
+        Get the limits of a host, creating them, if necessary.
+
+        Args:
+            host:   The host name (with port, if any).
+
+        Returns:
+            The host limits (HostLimit).
+        """
+        with self.lock:
+            host_limit = self.host_limits.get(host)
+            if host_limit is None:
+                host_limit = HostLimit(host, self.rate, self.burst,
+                                       self.max_concurrency)
+                self.host_limits[host] = host_limit
+                if self.rate:
+                    logging.info("limiting %s to %.1f requests/s, "
+                                 "%d concurrent requests",
+                                 host, self.rate, self.max_concurrency)
+                else:
+                    logging.info("limiting %s to %d concurrent requests",
+                                 host, self.max_concurrency)
+            return host_limit
+
+    def get_stats(self):
+        """
+        Get current limits and statistics of all hosts.
+
+        Returns:
+            A dictionary of statistics dictionaries (see
+            HostLimit.get_stats()), by host name.
+        """
+        with self.lock:
+            host_limits = dict(self.host_limits)
+        return dict((host, host_limit.get_stats())
+                    for host, host_limit in host_limits.items())
@@ -488,3 +488,49 @@ class TestDb(unittest.TestCase):  # pylint: disable=too-many-public-methods
         result = testdb.get_last_checked_baseline('git://example.com/repo')
 
         self.assertEqual(result, None)
+
+    def test_partial_series(self):
+        """Ensure partial series are saved, replaced, and retrieved."""
+        testdb = SktDb(self.database_file)
+        baseurl = 'http://pw.example.com'
+        self.assertEqual([], testdb.get_partial_series(baseurl, 1))
+        self.assertIsNone(testdb.get_last_seen_patch(baseurl, 1))
+
+        testdb.set_partial_series(baseurl, 1, 10,
+                                  [('a', 1, {'id': 5}), ('b', 0, {'id': 6})])
+        testdb.set_partial_series(baseurl, 1, 12,
+                                  [('b', 0, {'id': 6}), ('b', 2, {'id': 8})])
+        testdb.set_partial_series(baseurl, 2, 20, [('c', 1, {'id': 9})])
+
+        self.assertEqual([('b', 0, {'id': 6}), ('b', 2, {'id': 8})],
+                         testdb.get_partial_series(baseurl, 1))
+        self.assertEqual(12, testdb.get_last_seen_patch(baseurl, 1))
+        self.assertEqual(20, testdb.get_last_seen_patch(baseurl, 2))
+
+    def test_series_tables_old_db(self):
+        """Ensure series tables are created in existing databases."""
+        SktDb(self.database_file)
+        conn = sqlite3.connect(self.database_file)
+        conn.executescript('DROP TABLE partialseries; '
+                           'DROP TABLE lastseenpatch; '
+                           'DROP TABLE incompleteseries;')
+        conn.close()
+
+        testdb = SktDb(self.database_file)
+        baseurl = 'http://pw.example.com'
+        self.assertEqual([], testdb.get_partial_series(baseurl, 1))
+        self.assertIsNone(testdb.get_last_seen_patch(baseurl, 1))
+        self.assertEqual([], testdb.get_incomplete_series(baseurl, 1))
+
+    def test_incomplete_series(self):
+        """Ensure incomplete series IDs are saved, replaced, and retrieved."""
+        testdb = SktDb(self.database_file)
+        baseurl = 'http://pw.example.com'
+        self.assertEqual([], testdb.get_incomplete_series(baseurl, 1))
+
+        testdb.set_incomplete_series(baseurl, 1, [5, 3])
+        testdb.set_incomplete_series(baseurl, 1, [7, 3])
+        testdb.set_incomplete_series(baseurl, 2, [9])
+
+        self.assertEqual([3, 7], testdb.get_incomplete_series(baseurl, 1))
+        self.assertEqual([9], testdb.get_incomplete_series(baseurl, 2))
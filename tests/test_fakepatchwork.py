@@ -0,0 +1,118 @@
+# Copyright (c) 2018 Red Hat, Inc. All rights reserved. This copyrighted
+# material is made available to anyone wishing to use, modify, copy, or
+# redistribute it subject to the terms and conditions of the GNU General Public
+# License v.2 or later.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+"""Tests for the fakepatchwork module."""
+import unittest
+
+import mock
+
+from sktm import fakepatchwork
+from sktm import patchwork
+
+
+class TestFakePatchwork(unittest.TestCase):
+    """Test cases for the FakePatchwork class."""
+
+    def setUp(self):
+        """Start a fake Patchwork with two projects."""
+        self.server = fakepatchwork.FakePatchwork(projects=2, series=3,
+                                                  patches=2, patch_size=512)
+        self.session = patchwork.PatchworkSession()
+
+    def tearDown(self):
+        """Stop the fake Patchwork."""
+        self.server.stop()
+
+    def __make_v2(self, **kwargs):
+        """Create a REST interface retrieving all patches of project2."""
+        project = patchwork.PatchworkV2Project(self.server.baseurl,
+                                               'project2', None,
+                                               session=self.session,
+                                               **kwargs)
+        project.since = self.server.epoch
+        return project
+
+    def __check_series(self, series_list):
+        """Ensure series are the ones of project2, with their patches."""
+        self.assertEqual(
+            [[url.rsplit('/', 1)[-1]
+              for url in series.get_patch_url_list()]
+             for series in series_list],
+            [['3', '4'], ['7', '8'], ['11', '12']]
+        )
+        self.assertIn('Series 2 of project2', series_list[0].subject)
+        self.assertIn('submitter3@example.com',
+                      series_list[0].email_addr_set)
+
+    def test_v2_new_patchsets(self):
+        """Ensure new series are found with the REST API."""
+        project = self.__make_v2(per_page=3)
+        self.assertEqual(project.project_id, 2)
+        self.__check_series(list(project.get_new_patchsets()))
+
+    def test_v2_new_series(self):
+        """Ensure new series are listed with the REST API."""
+        project = self.__make_v2(discovery=patchwork.DISCOVERY_SERIES,
+                                 series_mbox=True)
+        self.__check_series(list(project.get_new_patchsets()))
+
+    def test_v2_patchsets(self):
+        """Ensure series are found by patch IDs with the REST API."""
+        project = self.__make_v2()
+        self.__check_series(project.get_patchsets([3, 4, 7, 8, 11, 12]))
+
+    @mock.patch('sktm.patchwork.PATCH_BATCH_SIZE', 2)
+    def test_v1_new_patchsets(self):
+        """Ensure new series are found with XML RPC, in windows."""
+        project = patchwork.PatchworkV1Project(self.server.baseurl,
+                                               'project2', 0,
+                                               session=self.session)
+        self.assertEqual(project.project_id, 2)
+        self.__check_series(list(project.get_new_patchsets()))
+        self.assertEqual(project.lastpatch, 12)
+
+    def test_v1_patchsets(self):
+        """Ensure series are found by patch IDs with XML RPC."""
+        project = patchwork.PatchworkV1Project(self.server.baseurl,
+                                               'project2', 0,
+                                               session=self.session)
+        self.__check_series(project.get_patchsets([3, 4, 7, 8, 11, 12]))
+
+    def test_stats(self):
+        """Ensure requests and bytes are counted, and errors injected."""
+        self.server.error_rate = 1
+        with self.assertRaises(Exception):
+            self.__make_v2()
+        stats = self.server.get_stats()
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['errors'], 1)
+        self.assertGreater(stats['response_bytes'], 0)
+
+        self.server.reset_stats()
+        self.assertEqual(self.server.get_stats()['requests'], 0)
+
+    def test_benchmark(self):
+        """Ensure the benchmark measures both phases for all projects."""
+        def make_interface(project):
+            """Create a Patchwork interface for the project."""
+            return patchwork.PatchworkV1Project(self.server.baseurl, project,
+                                                0, session=self.session)
+
+        result_list = fakepatchwork.benchmark(self.server, make_interface)
+        self.assertEqual([result['phase'] for result in result_list],
+                         fakepatchwork.PHASES)
+        for result in result_list:
+            self.assertEqual(result['series'], 6)
+            self.assertEqual(result['failures'], 0)
+            self.assertGreater(result['requests'], 0)
+            self.assertGreater(result['process_peak_memory'], 0)
@@ -0,0 +1,79 @@
+# Copyright (c) 2018 Red Hat, Inc. All rights reserved. This copyrighted
+# material is made available to anyone wishing to use, modify, copy, or
+# redistribute it subject to the terms and conditions of the GNU General Public
+# License v.2 or later.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+"""Tests for the httpcache module."""
+import shutil
+import tempfile
+import unittest
+
+from sktm.httpcache import HttpCache
+
+
+class TestHttpCache(unittest.TestCase):
+    """Test cases for the HttpCache class."""
+
+    def setUp(self):
+        """Test fixtures for testing HttpCache."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_file = "{}/cache.sqlite".format(self.cache_dir)
+
+    def tearDown(self):
+        """Destroy test fixtures when testing is complete."""
+        shutil.rmtree(self.cache_dir)
+
+    def test_get_miss(self):
+        """Ensure get() returns None for responses not cached."""
+        cache = HttpCache(self.cache_file)
+        self.assertIsNone(cache.get('http://example.com/a'))
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_put_get(self):
+        """Ensure put() stores the body and selected headers only."""
+        cache = HttpCache(self.cache_file)
+        cache.put('http://example.com/a', 'body\x00',
+                  {'ETag': '"1"', 'Server': 'test'})
+        self.assertEqual(('body\x00', {'ETag': '"1"'}),
+                         cache.get('http://example.com/a'))
+        self.assertEqual((1, 0), (cache.hits, cache.misses))
+
+    def test_persistence(self):
+        """Ensure cached responses are kept between cache instances."""
+        HttpCache(self.cache_file).put('http://example.com/a', 'body', {})
+        cache = HttpCache(self.cache_file)
+        self.assertEqual(('body', {}), cache.get('http://example.com/a'))
+
+    def test_eviction(self):
+        """Ensure the least recently used responses are evicted."""
+        cache = HttpCache(self.cache_file, max_size=10)
+        cache.put('http://example.com/a', 'a' * 4, {})
+        cache.put('http://example.com/b', 'b' * 4, {})
+        cache.get('http://example.com/a')
+        cache.put('http://example.com/c', 'c' * 4, {})
+
+        self.assertIsNotNone(cache.get('http://example.com/a'))
+        self.assertIsNone(cache.get('http://example.com/b'))
+        self.assertIsNotNone(cache.get('http://example.com/c'))
+
+    def test_atime_batched(self):
+        """Ensure access times are updated on close, not on every hit."""
+        cache = HttpCache(self.cache_file, max_size=10)
+        cache.put('http://example.com/a', 'a' * 4, {})
+        cache.put('http://example.com/b', 'b' * 4, {})
+        cache.get('http://example.com/a')
+        self.assertEqual(1, len(cache.pending_atimes))
+        cache.close()
+
+        cache = HttpCache(self.cache_file, max_size=10)
+        cache.put('http://example.com/c', 'c' * 4, {})
+        self.assertIsNotNone(cache.get('http://example.com/a'))
+        self.assertIsNone(cache.get('http://example.com/b'))
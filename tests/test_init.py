@@ -13,6 +13,7 @@
 # Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 """Tests for the __init__.py."""
 import tempfile
+import threading
 import unittest
 
 import mock
@@ -135,3 +136,206 @@ class TestInit(unittest.TestCase):
             makeopts=None,
             ref='deadcode',
         )
+
+    @mock.patch('sktm.patchwork.PatchworkV2Project')
+    def test_add_pw_incomplete_series(self, mock_project):
+        """Ensure incomplete series are only restored in series discovery."""
+        self.watcher_obj.db = Mock()
+        self.watcher_obj.db.get_incomplete_series.return_value = [5]
+
+        self.watcher_obj.add_pw('http://example.com', 'project', 1, True)
+        self.watcher_obj.db.get_incomplete_series.assert_not_called()
+
+        self.watcher_obj.add_pw('http://example.com', 'project', 1, True,
+                                discovery=sktm.patchwork.DISCOVERY_SERIES)
+        self.watcher_obj.db.get_incomplete_series.assert_called_once()
+        project = mock_project.return_value
+        project.set_incomplete_series.assert_called_once_with([5])
+
+    def test_check_patchwork_concurrent(self):
+        """
+        Ensure Patchwork projects are checked in parallel, so a slow project
+        doesn't delay submitting series of the others.
+        """
+        self.watcher_obj.db = Mock()
+        self.watcher_obj.db.get_stable.return_value = 'c0de4bee4'
+        self.watcher_obj.db.get_expired_pending_patches.return_value = [7]
+        self.watcher_obj.jk = Mock()
+        self.watcher_obj.jk.build.return_value = 5
+        submitted = threading.Event()
+
+        def get_new_patchsets():
+            """Only succeed if the other project is submitted meanwhile."""
+            if not submitted.wait(10):
+                raise Exception('not checked in parallel')
+            return []
+
+        slow = Mock(baseurl='http://a.example.com', project_id=1)
+        slow.get_new_patchsets.side_effect = get_new_patchsets
+        slow.get_patchsets.return_value = []
+        series = Mock(message_id='<1@example.com>', subject='subject',
+                      email_addr_set=set(), cover_letter=None)
+        fast = Mock(baseurl='http://b.example.com', project_id=2)
+        fast.get_new_patchsets.return_value = [series]
+        fast.get_patchsets.return_value = []
+        self.watcher_obj.db.set_patchset_pending.side_effect = \
+            lambda *args: submitted.set()
+        self.watcher_obj.pw = [slow, fast]
+
+        self.assertEqual([], self.watcher_obj.check_patchwork())
+        self.assertEqual([(sktm.misc.JobType.PATCHWORK, 5, fast)],
+                         self.watcher_obj.pj)
+        for project in (slow, fast):
+            project.get_patchsets.assert_called_once_with([7])
+
+    @mock.patch('logging.exception')
+    def test_check_patchwork_isolated(self, mock_exception):
+        """
+        Ensure a failing Patchwork project doesn't stop checking others, or
+        processing their builds, and is reported after they're checked.
+        """
+        self.watcher_obj.db = Mock()
+        self.watcher_obj.db.get_stable.return_value = 'c0de4bee4'
+        self.watcher_obj.jk = Mock()
+        self.watcher_obj.jk.build.return_value = 5
+
+        failing = Mock(baseurl='http://a.example.com', project_id=1)
+        failing.get_new_patchsets.side_effect = Exception('failure')
+        series = Mock(message_id='<1@example.com>', subject='subject',
+                      email_addr_set=set(), cover_letter=None)
+        series.get_patch_url_list.return_value = ['http://b.example.com/'
+                                                  'patch/1']
+        working = Mock(baseurl='http://b.example.com', project_id=2)
+        working.get_new_patchsets.return_value = [series]
+        working.get_patchsets.return_value = []
+        self.watcher_obj.pw = [failing, working]
+
+        failed_list = self.watcher_obj.check_patchwork()
+
+        self.assertEqual(['http://a.example.com project 1'], failed_list)
+        self.assertEqual(failed_list, self.watcher_obj.failed_pw)
+        self.assertEqual([(sktm.misc.JobType.PATCHWORK, 5, working)],
+                         self.watcher_obj.pj)
+        self.watcher_obj.db.set_patchset_pending.assert_called_once()
+        mock_exception.assert_called_once()
+
+        # The build submitted for the working project is still processed
+        self.watcher_obj.jk.get_build_completion.return_value = {5: True}
+        self.watcher_obj.jk.get_result.return_value = \
+            sktm.misc.TestResult.SUCCESS
+        self.watcher_obj.jk.get_patch_url_list.return_value = \
+            ['http://b.example.com/patch/1']
+        working.get_patches_by_id.return_value = [
+            {'name': 'subject', 'project_id': '2',
+             'date': '2018-06-04 10:00:00'}
+        ]
+
+        self.watcher_obj.wait_for_pending()
+
+        self.assertEqual([], self.watcher_obj.pj)
+        self.watcher_obj.jk.get_result.assert_called_once_with(5)
+        self.watcher_obj.db.commit_tested.assert_called_once_with(
+            [(1, 'subject', 'http://b.example.com/patch/1',
+              'http://b.example.com', 2, '2018-06-04T10:00:00')]
+        )
+        working.flush_patch_checks.assert_called_once()
+        failing.flush_patch_checks.assert_called_once()
+
+    def test_check_pending(self):
+        """Ensure only builds found complete in a batch are processed."""
+        self.watcher_obj.db = Mock()
+        self.watcher_obj.jk.get_build_completion.return_value = {1: True,
+                                                                 2: False}
+        self.watcher_obj.jk.get_result.return_value = \
+            sktm.misc.TestResult.SUCCESS
+        self.watcher_obj.pj = [(sktm.misc.JobType.BASELINE, 1, None),
+                               (sktm.misc.JobType.BASELINE, 2, None)]
+
+        self.watcher_obj.check_pending()
+
+        self.watcher_obj.jk.get_build_completion.assert_called_once_with(
+            [1, 2]
+        )
+        self.watcher_obj.jk.get_result.assert_called_once_with(1)
+        self.watcher_obj.jk.is_build_complete.assert_not_called()
+        self.watcher_obj.db.update_baseline.assert_called_once()
+        self.assertEqual([(sktm.misc.JobType.BASELINE, 2, None)],
+                         self.watcher_obj.pj)
+
+    def test_check_pending_notified(self):
+        """Ensure notified builds are confirmed complete with Jenkins."""
+        self.watcher_obj.db = Mock()
+        self.watcher_obj.jk = Mock()
+        self.watcher_obj.jk.get_build_completion.return_value = {2: True,
+                                                                 3: False}
+        self.watcher_obj.jk.get_result.return_value = \
+            sktm.misc.TestResult.SUCCESS
+        self.watcher_obj.pj = [(sktm.misc.JobType.BASELINE, 1, None),
+                               (sktm.misc.JobType.BASELINE, 2, None),
+                               (sktm.misc.JobType.BASELINE, 3, None)]
+
+        self.watcher_obj.check_pending(set([2, 3, 7]))
+
+        self.watcher_obj.jk.get_build_completion.assert_called_once_with(
+            [2, 3]
+        )
+        self.watcher_obj.jk.get_result.assert_called_once_with(2)
+        self.assertEqual([(sktm.misc.JobType.BASELINE, 1, None),
+                          (sktm.misc.JobType.BASELINE, 3, None)],
+                         self.watcher_obj.pj)
+
+    def test_check_patchwork_submit_failure(self):
+        """Ensure only successfully submitted builds are registered."""
+        self.watcher_obj.db = Mock()
+        self.watcher_obj.db.get_stable.return_value = 'c0de4bee4'
+        self.watcher_obj.build_workers = 2
+        self.watcher_obj.jk = Mock()
+        self.watcher_obj.jk.build.side_effect = \
+            lambda **kwargs: {'<1@example.com>': 5}[kwargs['message_id']]
+
+        series_list = list()
+        for index in (1, 2):
+            series = Mock(message_id='<%d@example.com>' % index,
+                          subject='subject', email_addr_set=set(),
+                          cover_letter=None)
+            series.get_patch_url_list.return_value = [
+                'http://a.example.com/patch/%d' % index
+            ]
+            series_list.append(series)
+        cpw = Mock(baseurl='http://a.example.com', project_id=1)
+        cpw.get_new_patchsets.return_value = series_list
+        cpw.get_patchsets.return_value = []
+        self.watcher_obj.pw = [cpw]
+
+        with mock.patch('logging.exception') as mock_exception:
+            self.watcher_obj.check_patchwork()
+
+        self.assertEqual([(sktm.misc.JobType.PATCHWORK, 5, cpw)],
+                         self.watcher_obj.pj)
+        self.assertEqual(self.watcher_obj.jk.build.call_count, 2)
+        # Both series are left pending, the failed one to be retried
+        self.assertEqual(
+            self.watcher_obj.db.set_patchset_pending.call_count, 2
+        )
+        mock_exception.assert_called_once()
+
+    @mock.patch('logging.info', Mock())
+    def test_wait_for_pending_notified(self):
+        """Ensure notified builds are processed without polling all."""
+        self.watcher_obj.pj = [(sktm.misc.JobType.BASELINE, 1, None)]
+        self.watcher_obj.listener = Mock()
+        self.watcher_obj.listener.wait.return_value = set([1])
+        self.watcher_obj.poll_interval = 3600
+
+        def check_pending(finished_set=None):
+            """Drop pending jobs once the notified builds are checked."""
+            if finished_set:
+                self.watcher_obj.pj = []
+
+        with mock.patch.object(self.watcher_obj, 'check_pending',
+                               side_effect=check_pending) as mock_check:
+            self.watcher_obj.wait_for_pending()
+
+        self.assertEqual([mock.call(), mock.call(set([1]))],
+                         mock_check.call_args_list)
+        self.assertIsNone(self.watcher_obj.listener)
@@ -0,0 +1,253 @@
+# Copyright (c) 2018 Red Hat, Inc. All rights reserved. This copyrighted
+# material is made available to anyone wishing to use, modify, copy, or
+# redistribute it subject to the terms and conditions of the GNU General Public
+# License v.2 or later.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+"""Tests for the jenkins module."""
+import json
+import threading
+import time
+import unittest
+
+import mock
+
+from sktm import jenkins
+from sktm import misc
+
+
+class FakeStepResult(object):  # pylint: disable=too-few-public-methods
+    """A resultset step result, as returned by jenkinsapi."""
+
+    def __init__(self, status, stdout=''):
+        self.status = status
+        self.stdout = stdout
+
+
+def make_build(status, resultset=None):
+    """
+    Make a fake jenkinsapi build with the specified status, and resultset
+    dictionary of step results, if any.
+    """
+    build = mock.Mock()
+    build.baseurl = 'http://jenkins/job/job/10'
+    build.get_status.return_value = status
+    build.has_resultset.return_value = resultset is not None
+    build.get_resultset.return_value = resultset
+    return build
+
+
+class TestJenkinsProject(unittest.TestCase):
+    """Test cases for the JenkinsProject class."""
+
+    def setUp(self):
+        """Create a project with a fake Jenkins server."""
+        patcher = mock.patch('jenkinsapi.jenkins.Jenkins')
+        self.mock_jenkins = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = self.mock_jenkins.return_value
+        self.job = self.server.get_job.return_value
+        self.project = jenkins.JenkinsProject('job', 'http://jenkins', 'user',
+                                              'password', 3)
+
+    def test_snapshot(self):
+        """Ensure a completed build is retrieved once for all accessors."""
+        merge_output = json.dumps({
+            'basehead': 'abcdef',
+            'commitdate': '1500000000',
+            'merge_queue': [['pw', 'http://pw/patch/1'],
+                            ['pw', 'http://pw/patch/2']],
+        })
+        build = make_build('UNSTABLE', {
+            'skt.cmd_merge': FakeStepResult('PASSED', merge_output),
+            'skt.cmd_build': FakeStepResult('PASSED'),
+            'skt.cmd_run': FakeStepResult('FAILED'),
+        })
+        self.job.get_build.return_value = build
+
+        self.assertEqual(self.project.get_result(10),
+                         misc.TestResult.TEST_FAILURE)
+        self.assertEqual(self.project.get_base_hash(10), 'abcdef')
+        self.assertEqual(self.project.get_base_commitdate(10), '1500000000')
+        self.assertEqual(self.project.get_patch_url_list(10),
+                         ['http://pw/patch/1', 'http://pw/patch/2'])
+        self.assertEqual(self.project.get_result_url(10),
+                         'http://jenkins/job/job/10')
+
+        self.server.get_job.assert_called_once_with('job')
+        self.job.get_build.assert_called_once_with(10)
+        build.get_resultset.assert_called_once_with()
+        build.block_until_complete.assert_not_called()
+
+    def test_snapshot_copies(self):
+        """Ensure modifying parsed step outputs doesn't affect a snapshot."""
+        merge_output = json.dumps({'basehead': 'abcdef'})
+        snapshot = jenkins.BuildSnapshot(10, 'http://jenkins/job/job/10',
+                                         'SUCCESS',
+                                         [('skt.cmd_merge',
+                                           {'stdout': merge_output})])
+
+        snapshot.get_cfg_list('skt.cmd_merge')[0]['basehead'] = '012345'
+        self.assertEqual(snapshot.get_cfg_list('skt.cmd_merge'),
+                         [{'basehead': 'abcdef'}])
+
+    def test_snapshot_running(self):
+        """Ensure a running build is waited for and retrieved again."""
+        running_build = make_build(None)
+        build = make_build('SUCCESS')
+        self.job.get_build.side_effect = [running_build, build]
+
+        self.assertEqual(self.project.get_result(10), misc.TestResult.SUCCESS)
+        self.assertEqual(self.project.get_result(10), misc.TestResult.SUCCESS)
+        running_build.block_until_complete.assert_called_once_with(delay=60)
+        self.assertEqual(self.job.get_build.call_count, 2)
+
+    def test_snapshot_no_results(self):
+        """Ensure missing results of a completed build are reported."""
+        self.job.get_build.return_value = make_build('FAILURE')
+
+        self.assertEqual(self.project.get_result(10), misc.TestResult.ERROR)
+        with self.assertRaises(Exception):
+            self.project.get_base_hash(10)
+
+    @mock.patch('sktm.jenkins.SNAPSHOT_CACHE_SIZE', 1)
+    def test_snapshot_eviction(self):
+        """Ensure the oldest snapshots are evicted over the limit."""
+        self.job.get_build.side_effect = lambda buildid: make_build('SUCCESS')
+
+        self.project.get_result(1)
+        self.project.get_result(2)
+        self.project.get_result(1)
+        self.assertEqual(self.job.get_build.call_count, 3)
+
+    def test_build_completion(self):
+        """Ensure completion of recent builds is checked with one request."""
+        self.server.base_server_url.return_value = 'http://jenkins'
+        requester = self.server.requester
+        requester.get_and_confirm_status.return_value.json.return_value = {
+            'nextBuildNumber': 13,
+            'builds': [{'number': 12, 'building': True, 'result': None},
+                       {'number': 11, 'building': False, 'result': 'SUCCESS'},
+                       {'number': 10, 'building': False, 'result': 'FAILURE'}],
+        }
+        self.job.get_build.return_value.get_status.return_value = None
+
+        self.assertEqual(self.project.get_build_completion([10, 12, 5]),
+                         {10: True, 12: False, 5: False})
+        requester.get_and_confirm_status.assert_called_once_with(
+            'http://jenkins/job/job/api/json',
+            {'tree': 'nextBuildNumber,builds[number,building,result]{0,100}'}
+        )
+        # Only the build missing from the recent ones is checked separately
+        self.job.get_build.assert_called_once_with(5)
+
+    @mock.patch('sktm.jenkins.POLL_WINDOW_MIN', 2)
+    def test_build_completion_window(self):
+        """Ensure the window is extended to reach the oldest build."""
+        self.server.base_server_url.return_value = 'http://jenkins'
+        requester = self.server.requester
+        requester.get_and_confirm_status.return_value.json.side_effect = [
+            {'nextBuildNumber': 13,
+             'builds': [{'number': 12, 'building': False},
+                        {'number': 11, 'building': False}]},
+            {'nextBuildNumber': 13,
+             'builds': [{'number': 12, 'building': False},
+                        {'number': 11, 'building': False},
+                        {'number': 10, 'building': True}]},
+        ]
+
+        self.assertEqual(self.project.get_build_completion([10, 12]),
+                         {10: False, 12: True})
+        self.assertEqual(
+            requester.get_and_confirm_status.call_args[0][1],
+            {'tree': 'nextBuildNumber,builds[number,building,result]{0,3}'}
+        )
+        self.assertEqual(self.project.next_build_number, 13)
+
+    def test_build_completion_all_builds(self):
+        """Ensure windows over the "builds" property limit use "allBuilds"."""
+        self.server.base_server_url.return_value = 'http://jenkins'
+        self.project.next_build_number = 300
+        requester = self.server.requester
+        requester.get_and_confirm_status.return_value.json.return_value = {
+            'nextBuildNumber': 300,
+            'allBuilds': [{'number': number, 'building': number == 290}
+                          for number in range(299, 149, -1)],
+        }
+
+        self.assertEqual(self.project.get_build_completion([150, 290]),
+                         {150: True, 290: False})
+        requester.get_and_confirm_status.assert_called_once_with(
+            'http://jenkins/job/job/api/json',
+            {'tree':
+             'nextBuildNumber,allBuilds[number,building,result]{0,150}'}
+        )
+        self.job.get_build.assert_not_called()
+
+    @mock.patch('time.sleep')
+    def test_build(self, mock_sleep):
+        """Ensure the build number is taken from the triggered queue item."""
+        queue_item = self.job.invoke.return_value
+        queue_item.poll.side_effect = [
+            {'why': 'Waiting for next available executor'},
+            {'executable': {'number': 42}},
+        ]
+
+        self.assertEqual(self.project.build(baserepo='git://repo', ref='abc',
+                                            patch_url_list=['http://pw/1',
+                                                            'http://pw/2']),
+                         42)
+        self.job.invoke.assert_called_once_with(
+            None, False, {'baserepo': 'git://repo', 'ref': 'abc',
+                          'patchwork': 'http://pw/1 http://pw/2'}
+        )
+        self.assertEqual(queue_item.poll.call_count, 2)
+        mock_sleep.assert_called_once_with(jenkins.QUEUE_POLL_INTERVAL)
+        self.job.get_build_ids.assert_not_called()
+
+    def test_build_concurrent(self):
+        """Ensure job lookups of builds submitted in parallel don't overlap."""
+        lock = threading.Lock()
+        overlap_list = list()
+
+        def get_job(_name):
+            """Look up the job, recording overlapping lookups."""
+            # Record if another lookup is in progress
+            acquired = lock.acquire(False)
+            overlap_list.append(not acquired)
+            time.sleep(0.01)
+            if acquired:
+                lock.release()
+            return self.job
+
+        def invoke(_block, _skip_if_running, params):
+            """Queue a build numbered after the submitted ref."""
+            queue_item = mock.Mock()
+            queue_item.poll.return_value = {
+                'executable': {'number': int(params['ref'])}
+            }
+            return queue_item
+
+        self.server.get_job.side_effect = get_job
+        self.job.invoke.side_effect = invoke
+
+        self.assertEqual(
+            misc.parallel_map(lambda ref: self.project.build(ref=str(ref)),
+                              range(8), 4),
+            range(8)
+        )
+        self.assertEqual(overlap_list, [False] * 8)
+
+    def test_build_cancelled(self):
+        """Ensure cancelled queued builds are reported."""
+        self.job.invoke.return_value.poll.return_value = {'cancelled': True}
+
+        with self.assertRaises(Exception):
+            self.project.build(baserepo='git://repo', ref='abc')
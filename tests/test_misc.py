@@ -48,3 +48,22 @@ class TestIndependent(unittest.TestCase):
         suffix = "part"
         self.assertEqual("http://url.com/part",
                          sktm.misc.join_with_slash(base, suffix))
+
+    def test_parallel_map(self):
+        """Ensure parallel_map returns results in the order of the items."""
+        items = range(20)
+        for workers in (1, 4):
+            self.assertEqual([item * 2 for item in items],
+                             sktm.misc.parallel_map(lambda x: x * 2, items,
+                                                    workers))
+
+    def test_parallel_map_exception(self):
+        """Ensure parallel_map raises exceptions raised by the function."""
+        def fail(item):
+            """Fail for one of the items."""
+            if item == 3:
+                raise ValueError(item)
+            return item
+
+        with self.assertRaises(ValueError):
+            sktm.misc.parallel_map(fail, range(5), 2)
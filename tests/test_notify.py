@@ -0,0 +1,79 @@
+# Copyright (c) 2018 Red Hat, Inc. All rights reserved. This copyrighted
+# material is made available to anyone wishing to use, modify, copy, or
+# redistribute it subject to the terms and conditions of the GNU General Public
+# License v.2 or later.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+"""Tests for the notify module."""
+import json
+import threading
+import time
+import unittest
+
+import requests
+
+from sktm import notify
+
+
+class TestNotificationListener(unittest.TestCase):
+    """Test cases for the NotificationListener class."""
+
+    def setUp(self):
+        """Start a listener for the "job" job on a free local port."""
+        self.listener = notify.NotificationListener(0, 'job', '127.0.0.1')
+        self.url = 'http://127.0.0.1:%d/' % self.listener.port
+
+    def tearDown(self):
+        """Stop the listener."""
+        self.listener.stop()
+
+    def __post(self, data):
+        """Post a notification, returning the response status code."""
+        return requests.post(self.url, data=json.dumps(data)).status_code
+
+    def test_plugin_format(self):
+        """Ensure Notification plugin finished phases are accepted."""
+        self.assertEqual(self.__post({'name': 'job',
+                                      'build': {'number': 1,
+                                                'phase': 'STARTED'}}),
+                         200)
+        self.assertEqual(self.__post({'name': 'other',
+                                      'build': {'number': 2,
+                                                'phase': 'FINALIZED'}}),
+                         200)
+        self.assertEqual(self.__post({'name': 'job',
+                                      'build': {'number': 3,
+                                                'phase': 'COMPLETED',
+                                                'status': 'SUCCESS'}}),
+                         200)
+        self.assertEqual(self.listener.wait(0), set([3]))
+        self.assertEqual(self.listener.wait(0), set())
+
+    def test_simple_format(self):
+        """Ensure simple notifications are accepted."""
+        self.assertEqual(self.__post({'number': 4}), 200)
+        self.assertEqual(self.__post({'number': '5', 'name': 'job'}), 200)
+        self.assertEqual(self.listener.wait(0), set([4, 5]))
+
+    def test_invalid(self):
+        """Ensure invalid notifications are rejected."""
+        self.assertEqual(requests.post(self.url, data='{').status_code, 400)
+        self.assertEqual(self.__post({'build': {}}), 400)
+        self.assertEqual(self.__post([1]), 400)
+        self.assertEqual(self.listener.wait(0), set())
+
+    def test_wait_wakeup(self):
+        """Ensure waiting is interrupted by a notification."""
+        poster = threading.Timer(0.2, self.__post, [{'number': 6}])
+        poster.start()
+        start = time.time()
+        self.assertEqual(self.listener.wait(30), set([6]))
+        self.assertLess(time.time() - start, 10)
+        poster.join()
@@ -13,14 +13,123 @@
 # this program; if not, write to the Free Software Foundation, Inc., 51
 # Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 """Tests for the patchwork module."""
+import json
 import logging
+import types
 import unittest
 
+import mock
+import requests
+
 from sktm import patchwork
 
 LOGGER = logging.getLogger()
 LOGGER.setLevel(logging.DEBUG)
 
+BASEURL = 'http://pw.example.com'
+APIURL = BASEURL + '/api'
+
+
+class FakeResponse(object):
+    """A stand-in for requests.Response with canned content."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, data=None, content='', headers=None, status_code=200):
+        """Initialize a fake response."""
+        self.data = data
+        self.content = content
+        self.headers = headers or {}
+        self.status_code = status_code
+
+    def json(self):
+        """Return the canned JSON data."""
+        return self.data
+
+
+class FakeSession(object):
+    """A stand-in for PatchworkSession serving canned responses by URL."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, responses):
+        """Initialize a fake session with a dictionary of responses."""
+        self.responses = responses
+        self.requested = []
+        # Lists of status codes to return, or exceptions to raise, for
+        # posts, by URL, 201 if none
+        self.post_statuses = {}
+        self.posted = []
+
+    def get(self, url, **kwargs):
+        """Return the canned response for a URL and record the request."""
+        # pylint: disable=unused-argument
+        self.requested.append(url)
+        return self.responses[url]
+
+    def post(self, url, **kwargs):
+        """Return a response with the next canned status for a URL."""
+        self.posted.append((url, json.loads(kwargs['data'])))
+        statuses = self.post_statuses.get(url)
+        status = statuses.pop(0) if statuses else 201
+        if isinstance(status, Exception):
+            raise status
+        return FakeResponse(status_code=status)
+
+    def get_mail_headers(self, url):
+        """Return the header block of a canned message."""
+        return self.get(url).content.split('\n\n')[0] + '\n'
+
+    def get_mbox_headers(self, url):
+        """Return the header blocks of a canned mbox."""
+        return list(patchwork.iter_mbox_headers(
+            self.get(url).content.split('\n')
+        ))
+
+
+def make_mbox(patch_id):
+    """Make mbox contents for a patch with the specified ID."""
+    return ('Message-ID: <{0}@example.com>\n'
+            'Subject: [PATCH] patch {0}\n'
+            'From: author{0}@example.com\n\n'
+            'diff\n').format(patch_id)
+
+
+def make_v2_responses(series_patches, baseurl=BASEURL):
+    """
+    Make canned Patchwork REST responses for a dictionary of series IDs and
+    lists of IDs of the patches comprising them.
+    """
+    apiurl = baseurl + '/api'
+    responses = {
+        apiurl: FakeResponse({'projects': apiurl + '/projects',
+                              'patches': apiurl + '/patches',
+                              'series': apiurl + '/series'}),
+        apiurl + '/projects/project': FakeResponse({'id': 1}),
+    }
+    # Patch list covering the date of all patches
+    patch_list = list()
+    responses[apiurl + '/patches?project=1&since=2018-06-04T00%3A00%3A00&'
+              'before=2018-06-04T00%3A00%3A01&per_page=100'] = \
+        FakeResponse(patch_list)
+    for sid, patch_id_list in series_patches.items():
+        responses['{}/series/{}'.format(apiurl, sid)] = FakeResponse({
+            'id': sid, 'name': 'series {}'.format(sid), 'received_all': True,
+            'cover_letter': None,
+            'patches': [{'id': patch_id, 'name': 'patch {}'.format(patch_id),
+                         'date': '2018-06-04T00:00:00'}
+                        for patch_id in patch_id_list],
+        })
+        for patch_id in patch_id_list:
+            patch = {'id': patch_id, 'date': '2018-06-04T00:00:00',
+                     'series': [{'id': sid}]}
+            patch_list.append(patch)
+            responses['{}/patches/{}'.format(apiurl, patch_id)] = \
+                FakeResponse(patch)
+            responses['{}/patch/{}/mbox'.format(baseurl, patch_id)] = \
+                FakeResponse(content=make_mbox(patch_id))
+    return responses
+
 
 class TestPatchworkFunctions(unittest.TestCase):
     """Test cases for functions in patchwork.py."""
@@ -37,6 +146,30 @@ class TestPatchworkFunctions(unittest.TestCase):
         self.assertEqual('\xe2\x98\x83', patchwork.stringify(unicode_string))
 
 
+class TestIterMboxHeaders(unittest.TestCase):
+    """Test cases for iter_mbox_headers()."""
+
+    def test_split(self):
+        """Ensure header blocks are extracted and bodies are skipped."""
+        mbox = ('From 1 Mon Sep 17 00:00:00 2001\n' + make_mbox(1) +
+                '>From escaped line\n'
+                'From: not a separator\n'
+                '\n'
+                'From 2 Mon Sep 17 00:00:00 2001\n' + make_mbox(2))
+        self.assertEqual(
+            [make_mbox(1).split('\n\n')[0] + '\n',
+             make_mbox(2).split('\n\n')[0] + '\n'],
+            list(patchwork.iter_mbox_headers(mbox.split('\n')))
+        )
+
+    def test_no_separator(self):
+        """Ensure a single message without a "From " line is handled."""
+        self.assertEqual(
+            [make_mbox(1).split('\n\n')[0] + '\n'],
+            list(patchwork.iter_mbox_headers(make_mbox(1).split('\n')))
+        )
+
+
 class TestObjectSummary(unittest.TestCase):
     """Test cases for the ObjectSummary class."""
 
@@ -163,3 +296,479 @@ class TestSeriesSummary(unittest.TestCase):
         result = self.testobj.get_patch_mbox_url_list()
 
         self.assertEqual(['url/mbox'], result)
+
+
+class TestMessageCache(unittest.TestCase):
+    """Test cases for the MessageCache class."""
+
+    def setUp(self):
+        """Test fixtures for testing MessageCache."""
+        self.cache = patchwork.MessageCache(max_size=2)
+
+    def test_get_miss(self):
+        """Ensure get() returns None and counts a miss for unknown URLs."""
+        self.assertIsNone(self.cache.get('url1'))
+        self.assertEqual((0, 1), (self.cache.hits, self.cache.misses))
+
+    def test_get_hit(self):
+        """Ensure get() returns cached messages and counts a hit."""
+        self.cache.put('url1', 'message1')
+        self.assertEqual('message1', self.cache.get('url1'))
+        self.assertEqual((1, 0), (self.cache.hits, self.cache.misses))
+
+    def test_put_evicts_least_recently_used(self):
+        """Ensure put() evicts the least recently used message."""
+        self.cache.put('url1', 'message1')
+        self.cache.put('url2', 'message2')
+        self.cache.get('url1')
+        self.cache.put('url3', 'message3')
+        self.assertEqual(['url1', 'url3'], list(self.cache.messages))
+
+    def test_clear(self):
+        """Ensure clear() drops messages and resets counters."""
+        self.cache.put('url1', 'message1')
+        self.cache.get('url1')
+        self.cache.clear()
+        self.assertEqual((0, 0), (self.cache.hits, self.cache.misses))
+        self.assertFalse(self.cache.messages)
+
+
+class TestPatchworkSession(unittest.TestCase):
+    """Test cases for the PatchworkSession class."""
+
+    @mock.patch('requests.Session.request')
+    def test_default_timeout(self, mock_request):
+        """Ensure requests without a timeout get the default one."""
+        session = patchwork.PatchworkSession(pool_size=2, timeout=5)
+        session.get('http://example.com/api')
+        self.assertEqual(5, mock_request.call_args[1]['timeout'])
+
+    @mock.patch('requests.Session.request')
+    def test_explicit_timeout(self, mock_request):
+        """Ensure an explicitly specified timeout is kept."""
+        session = patchwork.PatchworkSession(pool_size=2, timeout=5)
+        session.get('http://example.com/api', timeout=1)
+        self.assertEqual(1, mock_request.call_args[1]['timeout'])
+
+    @mock.patch('requests.Session.request')
+    def test_limiter(self, mock_request):
+        """Ensure requests are passed through the limiter of their host."""
+        mock_request.return_value = FakeResponse(status_code=503)
+        limiter = mock.Mock()
+        session = patchwork.PatchworkSession(limiter=limiter)
+        session.get('http://example.com:8080/api')
+        limiter.get_host_limit.assert_called_once_with('example.com:8080')
+        host_limit = limiter.get_host_limit.return_value
+        host_limit.acquire.assert_called_once_with()
+        self.assertEqual((503, None),
+                         (host_limit.release.call_args[0][0],
+                          host_limit.release.call_args[0][2]))
+
+    @mock.patch('requests.Session.get')
+    def test_cache_immutable(self, mock_get):
+        """Ensure immutable cached responses are served directly."""
+        cache = mock.Mock()
+        cache.get.return_value = ('body', {'Content-Type': 'text/plain'})
+        session = patchwork.PatchworkSession(cache=cache)
+
+        response = session.get('http://example.com/mbox',
+                               cache_mode=patchwork.CACHE_IMMUTABLE)
+
+        mock_get.assert_not_called()
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('body', response.content)
+        self.assertEqual('text/plain', response.headers['content-type'])
+
+    @mock.patch('requests.Session.get')
+    def test_cache_revalidate_not_modified(self, mock_get):
+        """Ensure cached responses are revalidated with the server."""
+        cache = mock.Mock()
+        cache.get.return_value = ('{"id": 1}', {'ETag': '"1"'})
+        mock_get.return_value = mock.Mock(status_code=304)
+        session = patchwork.PatchworkSession(cache=cache)
+
+        response = session.get('http://example.com/api/series/1',
+                               cache_mode=patchwork.CACHE_REVALIDATE)
+
+        self.assertEqual({'If-None-Match': '"1"'},
+                         mock_get.call_args[1]['headers'])
+        self.assertEqual({'id': 1}, response.json())
+        cache.put.assert_not_called()
+
+    @mock.patch('requests.Session.get')
+    def test_cache_revalidate_modified(self, mock_get):
+        """Ensure changed responses replace cached ones."""
+        cache = mock.Mock()
+        cache.get.return_value = None
+        mock_get.return_value = mock.Mock(status_code=200, content='new',
+                                          headers={'Last-Modified': 'now'})
+        session = patchwork.PatchworkSession(cache=cache)
+
+        response = session.get('http://example.com/api/series/1',
+                               cache_mode=patchwork.CACHE_REVALIDATE)
+
+        self.assertIs(mock_get.return_value, response)
+        cache.put.assert_called_once_with('http://example.com/api/series/1',
+                                          'new', {'Last-Modified': 'now'})
+
+    @mock.patch('requests.Session.get')
+    def test_cache_none(self, mock_get):
+        """Ensure the cache is bypassed without a cache mode."""
+        cache = mock.Mock()
+        session = patchwork.PatchworkSession(cache=cache)
+
+        session.get('http://example.com/api/patches?page=2')
+
+        self.assertEqual([mock.call('http://example.com/api/patches?page=2')],
+                         mock_get.call_args_list)
+        self.assertEqual([], cache.method_calls)
+
+    def test_pool_size(self):
+        """Ensure the per-host connection pool size is applied."""
+        session = patchwork.PatchworkSession(pool_size=3)
+        # pylint: disable=protected-access
+        adapter = session.get_adapter('https://example.com')
+        self.assertEqual(3, adapter._pool_maxsize)
+
+
+class DummyProject(patchwork.PatchworkProject):
+    """A Patchwork interface not requiring a server to be created."""
+
+    def _get_project_id(self, project_name):
+        """Return a fixed project ID."""
+        return 1
+
+
+class TestPatchworkProject(unittest.TestCase):
+    """Test cases for the PatchworkProject class."""
+
+    def setUp(self):
+        """Test fixtures for testing PatchworkProject."""
+        self.project = DummyProject('http://example.com', 'project', [])
+        self.project.session = mock.Mock()
+
+    def test_message_cache(self):
+        """Ensure interfaces only share a message cache if specified."""
+        message_cache = patchwork.MessageCache()
+        project = DummyProject('http://example.com', 'project', [],
+                               message_cache=message_cache)
+        other_project = DummyProject('http://example.com', 'project', [],
+                                     message_cache=message_cache)
+        self.assertIs(message_cache, project.message_cache)
+        self.assertIs(message_cache, other_project.message_cache)
+        self.assertIsNot(message_cache, self.project.message_cache)
+
+
+class TestPatchworkV2Project(unittest.TestCase):
+    """Test cases for the PatchworkV2Project class."""
+
+    def setUp(self):
+        """Test fixtures for testing PatchworkV2Project."""
+        self.session = FakeSession(make_v2_responses({10: [1, 2, 3],
+                                                      20: [4],
+                                                      30: [5, 6]}))
+
+    def make_project(self, workers=1):
+        """Create a project interface using the fake session."""
+        project = patchwork.PatchworkV2Project(BASEURL, 'project', None,
+                                               session=self.session,
+                                               workers=workers)
+        return project
+
+    def test_get_patchsets_order(self):
+        """Ensure get_patchsets() keeps series order with many workers."""
+        for workers in (1, 4):
+            project = self.make_project(workers)
+            series_list = project.get_patchsets([5, 1, 2, 4])
+            self.assertEqual(
+                [[5, 6], [1, 2, 3], [4]],
+                [[patch_id for patch_id, _ in series.get_patch_info_list()]
+                 for series in series_list]
+            )
+            self.assertEqual('<4@example.com>', series_list[2].message_id)
+
+    def test_get_patchsets_mbox_once(self):
+        """Ensure get_patchsets() retrieves each patch mbox once."""
+        project = self.make_project(4)
+        project.get_patchsets([1, 4, 5])
+        mbox_urls = [url for url in self.session.requested
+                     if url.endswith('/mbox')]
+        self.assertEqual(6, len(mbox_urls))
+        self.assertEqual(6, len(set(mbox_urls)))
+
+    def test_get_patchsets_series_mbox(self):
+        """Ensure patch headers are taken from series mboxes."""
+        # Message order differs from patch order, and isn't relied upon
+        self.session.responses[BASEURL + '/series/10/mbox/'] = FakeResponse(
+            content=''.join('From {} Mon Sep 17 00:00:00 2001\n{}\n'.format(
+                patch_id, make_mbox(patch_id)
+            ) for patch_id in (3, 1, 2))
+        )
+        for patch in self.session.responses[APIURL + '/series/10'].json()[
+                'patches']:
+            patch['msgid'] = '<{}@example.com>'.format(patch['id'])
+        project = self.make_project()
+        project.series_mbox = True
+        # Series mbox headers must not depend on a cache other interfaces
+        # can evict from
+        project.message_cache = patchwork.MessageCache(max_size=1)
+
+        series_list = project.get_patchsets([1, 4])
+
+        self.assertEqual(['<3@example.com>', '<4@example.com>'],
+                         [series.message_id for series in series_list])
+        self.assertEqual(set(['author1@example.com', 'author2@example.com',
+                              'author3@example.com']),
+                         series_list[0].email_addr_set)
+        self.assertEqual(
+            [BASEURL + '/series/10/mbox/', BASEURL + '/patch/4/mbox'],
+            [url for url in self.session.requested if 'mbox' in url]
+        )
+
+    def api_requests(self):
+        """Get URLs of API requests, except the project ones."""
+        return [url for url in self.session.requested
+                if url.startswith(APIURL + '/') and
+                not url.startswith(APIURL + '/projects')]
+
+    def test_get_patchsets_listed(self):
+        """Ensure patches are taken from a patch list, series once."""
+        project = self.make_project()
+        series_list = project.get_patchsets([1, 2, 3, 4, 3])
+
+        self.assertEqual(2, len(series_list))
+        self.assertEqual(
+            [APIURL + '/patches/1', APIURL + '/patches/4',
+             APIURL + '/patches?project=1&since=2018-06-04T00%3A00%3A00&'
+             'before=2018-06-04T00%3A00%3A01&per_page=100',
+             APIURL + '/series/10', APIURL + '/series/20'],
+            self.api_requests()
+        )
+
+    def test_get_patchsets_unlisted(self):
+        """Ensure patches missing from the patch list are looked up."""
+        list_url = (APIURL + '/patches?project=1&'
+                    'since=2018-06-04T00%3A00%3A00&'
+                    'before=2018-06-04T00%3A00%3A01&per_page=100')
+        patch_list = self.session.responses[list_url].json()
+        patch_list[:] = [patch for patch in patch_list if patch['id'] != 4]
+        project = self.make_project()
+        series_list = project.get_patchsets([1, 5, 6, 4])
+
+        self.assertEqual([[1, 2, 3], [5, 6], [4]],
+                         [[patch_id for patch_id, _ in
+                           series.get_patch_info_list()]
+                          for series in series_list])
+        self.assertEqual(
+            [APIURL + '/patches/1', APIURL + '/patches/6', list_url,
+             APIURL + '/patches/4'],
+            self.api_requests()[:4]
+        )
+
+    def add_patch_pages(self):
+        """
+        Add two pages of new patches to the fake session, and return the URL
+        of the first one.
+        """
+        first_url = (APIURL + '/patches?project=1&'
+                     'since=2018-06-04T00%3A00%3A01&per_page=2')
+        second_url = APIURL + '/patches?page=2'
+        self.session.responses[first_url] = FakeResponse(
+            [{'id': 1, 'series': [{'id': 10}]},
+             {'id': 2, 'series': [{'id': 10}]}],
+            headers={'Link': '<{}>; rel="next"'.format(second_url)}
+        )
+        self.session.responses[second_url] = FakeResponse(
+            [{'id': 5, 'series': [{'id': 30}]},
+             {'id': 4, 'series': [{'id': 20}]}],
+            headers={'Link': '<{}>; rel="prev"'.format(first_url)}
+        )
+        return first_url
+
+    def test_get_new_patchsets_pages(self):
+        """Ensure get_new_patchsets() streams series from all pages."""
+        self.add_patch_pages()
+        project = self.make_project()
+        project.since = '2018-06-04T00:00:00'
+        project.per_page = 2
+
+        series_gen = project.get_new_patchsets()
+        self.assertIsInstance(series_gen, types.GeneratorType)
+        self.assertEqual(
+            ['<3@example.com>', '<6@example.com>', '<4@example.com>'],
+            [series.message_id for series in series_gen]
+        )
+
+    def test_get_new_patchsets_series_discovery(self):
+        """Ensure new series can be listed directly."""
+        series_url = (APIURL + '/series?project=1&'
+                      'since=2018-06-04T00%3A00%3A01&per_page=100')
+        self.session.responses[series_url] = FakeResponse(
+            [self.session.responses[APIURL + '/series/20'].data,
+             self.session.responses[APIURL + '/series/10'].data]
+        )
+        project = self.make_project()
+        project.since = '2018-06-04T00:00:00'
+        project.discovery = patchwork.DISCOVERY_SERIES
+
+        self.assertEqual(['<4@example.com>', '<3@example.com>'],
+                         [series.message_id
+                          for series in project.get_new_patchsets()])
+        self.assertFalse([url for url in self.session.requested
+                          if url.startswith(APIURL + '/patches') or
+                          url.startswith(APIURL + '/series/')])
+
+    def test_get_new_patchsets_series_incomplete(self):
+        """Ensure series listed incomplete are listed again once complete."""
+        series_url = (APIURL + '/series?project=1&'
+                      'since=2018-06-04T00%3A00%3A01&per_page=100')
+        incomplete = dict(self.session.responses[APIURL + '/series/30'].data,
+                          received_all=False, date='2018-06-04T00:00:00')
+        self.session.responses[APIURL + '/series/30'] = \
+            FakeResponse(incomplete)
+        self.session.responses[series_url] = FakeResponse(
+            [incomplete, self.session.responses[APIURL + '/series/10'].data]
+        )
+        project = self.make_project()
+        project.since = '2018-06-04T00:00:00'
+        project.discovery = patchwork.DISCOVERY_SERIES
+
+        self.assertEqual(['<3@example.com>'],
+                         [series.message_id
+                          for series in project.get_new_patchsets()])
+        self.assertEqual([30], project.get_incomplete_series())
+
+        # Still incomplete in the next run
+        self.session.responses[series_url] = FakeResponse([])
+        next_project = self.make_project()
+        next_project.since = '2018-06-04T00:00:00'
+        next_project.discovery = patchwork.DISCOVERY_SERIES
+        next_project.set_incomplete_series(project.get_incomplete_series())
+        self.assertEqual([], list(next_project.get_new_patchsets()))
+        self.assertEqual([30], next_project.get_incomplete_series())
+
+        # Complete in the run after that, and not listed by date anymore
+        self.session.responses[APIURL + '/series/30'] = \
+            FakeResponse(dict(incomplete, received_all=True))
+        self.assertEqual(['<6@example.com>'],
+                         [series.message_id
+                          for series in next_project.get_new_patchsets()])
+        self.assertEqual([], next_project.get_incomplete_series())
+
+    def test_get_new_patchsets_series_incomplete_forgotten(self):
+        """Ensure gone or old incomplete series are forgotten."""
+        series_url = (APIURL + '/series?project=1&'
+                      'since=2018-06-20T00%3A00%3A01&per_page=100')
+        self.session.responses[series_url] = FakeResponse([])
+        self.session.responses[APIURL + '/series/30'] = FakeResponse(
+            dict(self.session.responses[APIURL + '/series/30'].data,
+                 received_all=False, date='2018-06-04T00:00:00')
+        )
+        self.session.responses[APIURL + '/series/40'] = \
+            FakeResponse(status_code=404)
+        project = self.make_project()
+        project.since = '2018-06-20T00:00:00'
+        project.discovery = patchwork.DISCOVERY_SERIES
+        project.set_incomplete_series([30, 40])
+
+        self.assertEqual([], list(project.get_new_patchsets()))
+        self.assertIn(APIURL + '/series/30', self.session.requested)
+        self.assertEqual([], project.get_incomplete_series())
+
+    def test_get_new_patchsets_max_pages(self):
+        """Ensure get_new_patchsets() stops after the maximum of pages."""
+        first_url = self.add_patch_pages()
+        project = self.make_project()
+        project.since = '2018-06-04T00:00:00'
+        project.per_page = 2
+        project.max_pages = 1
+
+        self.assertEqual(1, len(list(project.get_new_patchsets())))
+        self.assertIn(first_url, self.session.requested)
+        self.assertNotIn(APIURL + '/patches?page=2', self.session.requested)
+
+    def test_set_patch_check_queued(self):
+        """Ensure checks are posted without retrieving the patches."""
+        project = self.make_project()
+        project.apikey = 'token'
+        del self.session.requested[:]
+
+        for pid in range(1, 7):
+            project.set_patch_check(pid, 'http://jenkins/1',
+                                    patchwork.TestResult.SUCCESS)
+
+        self.assertEqual(0, project.flush_patch_checks())
+        self.assertEqual([], self.session.requested)
+        self.assertEqual(
+            ['{}/patches/{}/checks/'.format(APIURL, pid)
+             for pid in range(1, 7)],
+            sorted(url for url, _ in self.session.posted)
+        )
+        self.assertEqual(set([patchwork.PW_CHECK_CHOICES['success']]),
+                         set(payload['state']
+                             for _, payload in self.session.posted))
+
+    @mock.patch('sktm.patchwork.time')
+    def test_set_patch_check_retry(self, mock_time):
+        """Ensure transient failures are retried, and others are not."""
+        project = self.make_project()
+        project.apikey = 'token'
+        self.session.post_statuses = {
+            APIURL + '/patches/1/checks/': [503, 429, 201],
+            APIURL + '/patches/2/checks/': [400],
+        }
+
+        project.set_patch_check(1, 'http://jenkins/1',
+                                patchwork.TestResult.SUCCESS)
+        project.set_patch_check(2, 'http://jenkins/1',
+                                patchwork.TestResult.BUILD_FAILURE)
+
+        self.assertEqual(1, project.flush_patch_checks())
+        self.assertEqual(4, len(self.session.posted))
+        self.assertEqual([mock.call(1), mock.call(2)],
+                         mock_time.sleep.call_args_list)
+
+    @mock.patch('sktm.patchwork.time')
+    def test_set_patch_check_not_retried(self, mock_time):
+        """Ensure failures after a check could be stored are not retried."""
+        project = self.make_project()
+        project.apikey = 'token'
+        self.session.post_statuses = {
+            APIURL + '/patches/1/checks/': [
+                requests.exceptions.ConnectTimeout(), 201
+            ],
+            APIURL + '/patches/2/checks/': [500],
+            APIURL + '/patches/3/checks/': [
+                requests.exceptions.ReadTimeout()
+            ],
+            APIURL + '/patches/4/checks/': [
+                requests.exceptions.ChunkedEncodingError()
+            ],
+        }
+
+        for pid in range(1, 5):
+            project.set_patch_check(pid, 'http://jenkins/1',
+                                    patchwork.TestResult.SUCCESS)
+
+        self.assertEqual(3, project.flush_patch_checks())
+        self.assertEqual(5, len(self.session.posted))
+        self.assertEqual([mock.call(1)], mock_time.sleep.call_args_list)
+        self.assertIsNone(project.check_pool)
+
+    def test_flush_patch_checks_error(self):
+        """Ensure check threads are stopped if posting raises an error."""
+        project = self.make_project()
+        project.apikey = 'token'
+        self.session.post_statuses = {
+            APIURL + '/patches/1/checks/': [ValueError('unexpected')],
+        }
+        project.set_patch_check(1, 'http://jenkins/1',
+                                patchwork.TestResult.SUCCESS)
+        check_pool = project.check_pool
+
+        with mock.patch.object(check_pool, 'join',
+                               wraps=check_pool.join) as mock_join:
+            with self.assertRaises(ValueError):
+                project.flush_patch_checks()
+        self.assertIsNone(project.check_pool)
+        mock_join.assert_called_once_with()
@@ -0,0 +1,733 @@
+# coding=utf-8
+# Copyright (c) 2018 Red Hat, Inc. All rights reserved. This copyrighted
+# material is made available to anyone wishing to use, modify, copy, or
+# redistribute it subject to the terms and conditions of the GNU General Public
+# License v.2 or later.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+"""Tests for the patchwork module's XML RPC interface, and with servers."""
+import BaseHTTPServer
+import json
+import SimpleXMLRPCServer
+import SocketServer
+import threading
+import unittest
+import xmlrpclib
+
+import mock
+
+from sktm import misc
+from sktm import patchwork
+from sktm.misc import parallel_map
+from tests.test_patchwork import BASEURL, FakeResponse, FakeSession, \
+    make_v2_responses
+
+
+class StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """A request handler serving canned responses of a stand-in server."""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve a canned response, or a 404 error."""
+        response = self.server.responses.get(self.server.baseurl + self.path)
+        if response is None:
+            self.send_error(404)
+            return
+
+        if response.data is not None:
+            content = json.dumps(response.data)
+        else:
+            content = response.content
+        self.send_response(response.status_code)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Record posted JSON data, and respond with "201 Created"."""
+        content = self.rfile.read(int(self.headers.get('Content-Length')))
+        self.server.posted.append((self.server.baseurl + self.path,
+                                   json.loads(content)))
+        self.send_response(201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Don't log requests."""
+        pass
+
+
+class StandInServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """A local HTTP server serving canned responses, in a thread."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        """Start serving on a free local port."""
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+                                           StandInHandler)
+        self.baseurl = 'http://127.0.0.1:{}'.format(self.server_port)
+        self.responses = {}
+        # List of tuples of URLs and JSON data posted to them
+        self.posted = []
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self.shutdown()
+        self.server_close()
+
+
+class StandInXMLRPCServer(SocketServer.ThreadingMixIn,
+                          SimpleXMLRPCServer.SimpleXMLRPCServer):
+    """A local XML RPC server counting requests, in a thread."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        """Start serving on a free local port, supporting multicalls."""
+        server = self
+
+        class CountingHandler(SimpleXMLRPCServer.SimpleXMLRPCRequestHandler):
+            """A request handler counting requests."""
+            rpc_paths = ('/xmlrpc/',)
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                """Count and handle a request."""
+                server.request_count += 1
+                server.client_ports.add(self.client_address[1])
+                server.encodings.append(self.headers.get('Content-Encoding'))
+                SimpleXMLRPCServer.SimpleXMLRPCRequestHandler.do_POST(self)
+
+            def log_message(self, format, *args):
+                # pylint: disable=redefined-builtin
+                """Don't log requests."""
+                pass
+
+        SimpleXMLRPCServer.SimpleXMLRPCServer.__init__(
+            self, ('127.0.0.1', 0), CountingHandler, logRequests=False,
+            allow_none=True
+        )
+        self.register_multicall_functions()
+        self.baseurl = 'http://127.0.0.1:{}'.format(self.server_address[1])
+        self.request_count = 0
+        # Set of client ports requests came from
+        self.client_ports = set()
+        # List of request Content-Encoding header values
+        self.encodings = []
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def disable_multicall(self):
+        """Stop supporting multicalls."""
+        del self.funcs['system.multicall']
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self.shutdown()
+        self.server_close()
+
+
+class TestPatchworkV2ProjectServer(unittest.TestCase):
+    """Test cases for PatchworkV2Project talking to a stand-in server."""
+
+    def setUp(self):
+        """Start a stand-in Patchwork server."""
+        self.server = StandInServer()
+        self.server.responses = make_v2_responses({10: [1, 2, 3],
+                                                   20: [4]},
+                                                  self.server.baseurl)
+
+    def tearDown(self):
+        """Stop the stand-in server."""
+        self.server.stop()
+
+    def make_project(self):
+        """Create an interface to the stand-in server."""
+        return patchwork.PatchworkV2Project(
+            self.server.baseurl, 'project', None,
+            session=patchwork.PatchworkSession()
+        )
+
+    def test_get_patchsets(self):
+        """Ensure concurrent calls on many interfaces return summaries."""
+        result_list = parallel_map(
+            lambda project: project.get_patchsets([4, 1]),
+            [self.make_project() for _ in range(3)], 3
+        )
+
+        for series_list in result_list:
+            self.assertEqual(['<4@example.com>', '<3@example.com>'],
+                             [series.message_id for series in series_list])
+            self.assertEqual(
+                [self.server.baseurl + '/patch/1',
+                 self.server.baseurl + '/patch/2',
+                 self.server.baseurl + '/patch/3'],
+                series_list[1].get_patch_url_list()
+            )
+
+    def test_get_new_patchsets(self):
+        """Ensure new series summaries are retrieved."""
+        project = self.make_project()
+        project.since = '2018-06-04T00:00:00'
+        self.server.responses[
+            self.server.baseurl + '/api/patches?project=1&'
+            'since=2018-06-04T00%3A00%3A01&per_page=100'
+        ] = FakeResponse([{'id': 4, 'series': [{'id': 20}]}])
+
+        series_list = list(project.get_new_patchsets())
+
+        self.assertEqual(['<4@example.com>'],
+                         [series.message_id for series in series_list])
+
+    def test_get_patch_by_id_error(self):
+        """Ensure missing patches raise an exception."""
+        with self.assertRaises(Exception):
+            self.make_project().get_patch_by_id(100)
+
+
+class TestAsyncPatchworkV2Project(unittest.TestCase):
+    """Test cases for the AsyncPatchworkV2Project class."""
+
+    def setUp(self):
+        """Start a stand-in Patchwork server and an executor."""
+        self.server = StandInServer()
+        self.server.responses = make_v2_responses({10: [1, 2, 3],
+                                                   20: [4]},
+                                                  self.server.baseurl)
+        self.executor = patchwork.PatchworkExecutor(workers=4, limit=4)
+
+    def tearDown(self):
+        """Stop the executor and the stand-in server."""
+        self.executor.close()
+        self.server.stop()
+
+    def make_project(self, apikey=None):
+        """Create a non-blocking interface to the stand-in server."""
+        return patchwork.AsyncPatchworkV2Project(
+            self.executor, self.server.baseurl, 'project', None,
+            apikey=apikey, session=patchwork.PatchworkSession()
+        )
+
+    def test_get_patchsets_async(self):
+        """Ensure calls on many interfaces return the same summaries."""
+        project_list = [self.make_project() for _ in range(6)]
+        result_list = [project.get_patchsets_async([4, 1])
+                       for project in project_list]
+        expected_list = project_list[0].get_patchsets([4, 1])
+
+        for result in result_list:
+            series_list = result.get()
+            self.assertEqual(
+                [series.message_id for series in expected_list],
+                [series.message_id for series in series_list]
+            )
+            self.assertEqual(
+                [series.get_patch_url_list() for series in expected_list],
+                [series.get_patch_url_list() for series in series_list]
+            )
+
+    def test_get_new_patchsets_async(self):
+        """Ensure new series summaries are retrieved."""
+        project = self.make_project()
+        project.since = '2018-06-04T00:00:00'
+        self.server.responses[
+            self.server.baseurl + '/api/patches?project=1&'
+            'since=2018-06-04T00%3A00%3A01&per_page=100'
+        ] = FakeResponse([{'id': 4, 'series': [{'id': 20}]}])
+
+        series_list = project.get_new_patchsets_async().get()
+
+        self.assertEqual(['<4@example.com>'],
+                         [series.message_id for series in series_list])
+
+    def test_get_patch_by_id_async(self):
+        """Ensure patches are retrieved, and errors raised by get()."""
+        project = self.make_project()
+
+        self.assertEqual(4, project.get_patch_by_id_async(4).get()['id'])
+        with self.assertRaises(Exception):
+            project.get_patch_by_id_async(100).get()
+
+    def test_set_patch_check_async(self):
+        """Ensure checks are posted only with an API key."""
+        self.assertFalse(self.make_project().set_patch_check_async(
+            4, 'http://jenkins/job/1', misc.TestResult.SUCCESS
+        ).get())
+        self.assertEqual([], self.server.posted)
+
+        self.assertTrue(self.make_project('key').set_patch_check_async(
+            4, 'http://jenkins/job/1', misc.TestResult.SUCCESS
+        ).get())
+        self.assertEqual(
+            [(self.server.baseurl + '/api/patches/4/checks/',
+              {'patch': 4, 'state': 1,
+               'target_url': 'http://jenkins/job/1',
+               'context': 'Kernel CI', 'description': 'Kernel CI testing'})],
+            self.server.posted
+        )
+
+    def test_executor_limit(self):
+        """Ensure submitting calls over the limit waits for others."""
+        release = threading.Event()
+        submitted = threading.Event()
+        result_list = [self.executor.submit(release.wait)
+                       for _ in range(4)]
+
+        def submit():
+            """Submit a call over the limit and signal it."""
+            result_list.append(self.executor.submit(lambda: True))
+            submitted.set()
+
+        thread = threading.Thread(target=submit)
+        thread.start()
+        self.assertFalse(submitted.wait(0.1))
+        release.set()
+        self.assertTrue(submitted.wait(5))
+        thread.join()
+        self.assertTrue(all(result.get(5) for result in result_list))
+
+
+def make_v1_patch(patch_id, name):
+    """Make a Patchwork XML RPC patch object."""
+    return {'id': patch_id, 'name': name, 'project_id': 1,
+            'msgid': '<{}@example.com>'.format(patch_id),
+            'submitter_id': 1, 'date': '2018-06-04 00:00:00'}
+
+
+class TestPatchworkV1Project(unittest.TestCase):
+    """Test cases for the PatchworkV1Project class."""
+
+    def setUp(self):
+        """Test fixtures for testing PatchworkV1Project."""
+        self.rpc = mock.Mock()
+        self.rpc.pw_rpc_version.return_value = 1
+        self.rpc.project_list.return_value = [{'linkname': 'project',
+                                               'id': 1}]
+        self.session = FakeSession(make_v2_responses({10: [1, 2, 3]}))
+
+    def make_project(self):
+        """Create a project interface using the mock XML RPC interface."""
+        with mock.patch('xmlrpclib.ServerProxy',
+                        mock.Mock(return_value=self.rpc)):
+            project = patchwork.PatchworkV1Project(BASEURL, 'project', 0,
+                                                   session=self.session)
+        # The mock interface can't serve multicalls
+        project.multicall = False
+        return project
+
+    def serve_patches(self, patch_list):
+        """Make the mock XML RPC interface serve the specified patches."""
+        patch_dict = dict((patch['id'], patch) for patch in patch_list)
+        self.rpc.patch_get.side_effect = \
+            lambda pid, *args: patch_dict.get(pid, {})
+
+    def test_get_patchsets_once(self):
+        """Ensure get_patchsets() looks each patch up once, in order."""
+        self.serve_patches([make_v1_patch(1, '[PATCH] one'),
+                            make_v1_patch(3, '[PATCH 1/2] three'),
+                            make_v1_patch(2, '[PATCH] two')])
+        project = self.make_project()
+
+        series_list = project.get_patchsets([3, 2, 1, 2])
+
+        self.assertEqual([mock.call(1), mock.call(2), mock.call(3)],
+                         self.rpc.patch_get.call_args_list)
+        self.assertEqual(['<2@example.com>', '<1@example.com>',
+                          '<2@example.com>'],
+                         [series.message_id for series in series_list])
+        self.assertEqual(3, project.lastpatch)
+
+    def test_message_retrieved_once(self):
+        """Ensure a patch mbox is only retrieved once for all headers."""
+        self.serve_patches([make_v1_patch(1, '[PATCH] test')])
+        project = self.make_project()
+        project.session = mock.Mock()
+        mock_get = project.session.get_mail_headers
+        mock_get.return_value = ('Message-ID: <1@example.com>\n'
+                                 'Subject: [PATCH] test\n'
+                                 'From: A <a@example.com>\n'
+                                 'To: b@example.com\n')
+
+        series_list = project.get_patchsets([1]) + project.get_patchsets([1])
+
+        mock_get.assert_called_once_with(BASEURL + '/patch/1/mbox')
+        for series in series_list:
+            self.assertEqual('<1@example.com>', series.message_id)
+            self.assertEqual('[PATCH] test', series.subject)
+            self.assertEqual(set(['a@example.com', 'b@example.com']),
+                             series.email_addr_set)
+        self.assertEqual(1, project.message_cache.hits)
+
+    def test_partial_series(self):
+        """Ensure partial series are saved and restored."""
+        patch_list = [make_v1_patch(1, '[PATCH 1/2] one'),
+                      make_v1_patch(2, '[PATCH 2/2] two')]
+        for patch in patch_list:
+            patch['msgid'] = '<1528070400.1000.{}@example.com>'.format(
+                patch['id']
+            )
+        patch_list[0]['content'] = 'diff'
+        self.serve_patches(patch_list)
+        project = self.make_project()
+        self.assertEqual([], project.get_patchsets([1]))
+
+        partial_series = project.get_partial_series()
+        record = dict(patch_list[0])
+        del record['project_id']
+        del record['content']
+        self.assertEqual([('1528070400.1000', 1, record)], partial_series)
+
+        project = self.make_project()
+        project.set_partial_series(partial_series)
+        series_list = project.get_patchsets([2])
+
+        self.assertEqual([[1, 2]],
+                         [[patch_id for patch_id, _
+                           in series.get_patch_info_list()]
+                          for series in series_list])
+        self.assertEqual([], project.get_partial_series())
+
+    def test_partial_series_unidentified(self):
+        """
+        Ensure series without message ID based IDs are saved too, and
+        completed in the next run, resuming after their patches.
+        """
+        self.serve_patches([make_v1_patch(1, '[PATCH 0/2] cover'),
+                            make_v1_patch(2, '[PATCH 1/2] one'),
+                            make_v1_patch(3, '[PATCH 2/2] two')])
+        project = self.make_project()
+        self.assertEqual([], project.get_patchsets([1, 2]))
+        self.assertEqual(2, project.lastpatch)
+
+        partial_series = project.get_partial_series()
+        self.assertEqual([('1_2', 0, 1), ('1_2', 1, 2)],
+                         sorted((seriesid, position, patch['id'])
+                                for seriesid, position, patch
+                                in partial_series))
+
+        project = self.make_project()
+        project.lastpatch = 2
+        project.set_partial_series(partial_series)
+        series_list = project.get_patchsets([3])
+
+        self.assertEqual([[2, 3]],
+                         [[patch_id for patch_id, _
+                           in series.get_patch_info_list()]
+                          for series in series_list])
+        self.assertEqual([BASEURL + '/patch/1'],
+                         [series.cover_letter.url
+                          for series in series_list])
+        self.assertEqual([], project.get_partial_series())
+
+    def test_evict_series(self):
+        """Ensure old incomplete series are evicted, and the oldest ones."""
+        patch_list = [make_v1_patch(1, '[PATCH 1/2] one'),
+                      make_v1_patch(2, '[PATCH 1/3] two'),
+                      make_v1_patch(3, '[PATCH 1/4] three'),
+                      make_v1_patch(4, '[PATCH 1/5] four')]
+        for patch, date in zip(patch_list, ['2018-05-01', '2018-06-02',
+                                            '2018-06-03', '2018-06-04']):
+            patch['date'] = date + ' 00:00:00'
+        self.serve_patches(patch_list)
+        project = self.make_project()
+        project.series_max_count = 2
+
+        self.assertEqual([], project.get_patchsets([1, 2, 3, 4]))
+
+        self.assertEqual(['1_4', '1_5'], sorted(project.series.keys()))
+        self.assertEqual(2, project.evicted_series)
+
+    def test_patch_record(self):
+        """Ensure patch records keep only the needed fields."""
+        patch = make_v1_patch(1, '[PATCH] one')
+        patch['content'] = 'diff'
+        patch['root_comment'] = {'headers': 'Subject: one\n'}
+        record = patchwork.PatchRecord(patch)
+        self.assertEqual(1, record.get('id'))
+        self.assertEqual('Subject: one\n', record.get('headers'))
+        self.assertIsNone(record.get('content'))
+        self.assertEqual('none', record.get('content', 'none'))
+        self.assertEqual(record.to_dict(),
+                         patchwork.PatchRecord(record.to_dict()).to_dict())
+
+    def test_root_comment_headers(self):
+        """Ensure RH fork e-mail headers are used instead of mboxes."""
+        patch_list = [make_v1_patch(1, '[PATCH] one'),
+                      make_v1_patch(2, '[PATCH 1/2] two'),
+                      make_v1_patch(3, '[PATCH 2/2] three')]
+        for patch in patch_list:
+            patch['root_comment'] = {
+                'headers': 'Message-ID: <rh{0}@example.com>\n'
+                           'Subject: {1}\n'
+                           'From: a{0}@example.com\n'
+                           'Cc: b@example.com,\n c@example.com\n'.format(
+                               patch['id'], patch['name'])
+            }
+        self.serve_patches(patch_list)
+        self.session.responses = {}
+        project = self.make_project()
+        # Headers must not depend on a cache other interfaces can evict from
+        project.message_cache = patchwork.MessageCache(max_size=0)
+
+        series_list = project.get_patchsets([1, 2, 3])
+
+        self.assertEqual([], self.session.requested)
+        self.assertEqual(['<rh1@example.com>', '<rh3@example.com>'],
+                         [series.message_id for series in series_list])
+        self.assertEqual(set(['a2@example.com', 'a3@example.com',
+                              'b@example.com', 'c@example.com']),
+                         series_list[1].email_addr_set)
+
+    def test_get_patchsets_missing(self):
+        """Ensure get_patchsets() fails if a patch is not found."""
+        self.serve_patches([make_v1_patch(1, '[PATCH] one')])
+        project = self.make_project()
+
+        with self.assertRaises(Exception):
+            project.get_patchsets([1, 2])
+
+
+class TestPatchworkSessionServer(unittest.TestCase):
+    """Test cases for PatchworkSession using a stand-in server."""
+
+    def setUp(self):
+        """Start a stand-in server."""
+        self.server = StandInServer()
+        self.session = patchwork.PatchworkSession()
+
+    def tearDown(self):
+        """Stop the stand-in server."""
+        self.server.stop()
+
+    def test_get_mail_headers(self):
+        """Ensure only the header block of a message is returned."""
+        url = self.server.baseurl + '/patch/1/mbox'
+        self.server.responses[url] = FakeResponse(
+            content='From: a@example.com\r\nSubject: long\r\n\tsubject\r\n'
+                    '\r\n' + 'diff\r\n' * 100000
+        )
+
+        self.assertEqual('From: a@example.com\nSubject: long\n\tsubject\n',
+                         self.session.get_mail_headers(url))
+
+    def test_get_mail_headers_error(self):
+        """Ensure an exception is raised for missing messages."""
+        with self.assertRaises(Exception):
+            self.session.get_mail_headers(self.server.baseurl + '/none')
+
+    def test_get_mail_headers_cached(self):
+        """Ensure header blocks are stored in and served from the cache."""
+        url = self.server.baseurl + '/patch/1/mbox'
+        self.session.cache = mock.Mock()
+        self.session.cache.get.return_value = None
+        self.server.responses[url] = FakeResponse(
+            content='Subject: test\n\ndiff\n'
+        )
+
+        self.assertEqual('Subject: test\n',
+                         self.session.get_mail_headers(url))
+        self.session.cache.put.assert_called_once_with(url + '#headers',
+                                                       'Subject: test\n', {})
+
+        self.session.cache.get.return_value = ('Subject: cached\n', {})
+        self.assertEqual('Subject: cached\n',
+                         self.session.get_mail_headers(url))
+
+
+class TestPatchworkV1ProjectServer(unittest.TestCase):
+    """Test cases for PatchworkV1Project using a stand-in XML RPC server."""
+
+    def setUp(self):
+        """Start a stand-in XML RPC server with Patchwork methods."""
+        self.server = StandInXMLRPCServer()
+        self.server.register_function(lambda: 1, 'pw_rpc_version')
+        self.server.register_function(
+            lambda name: [{'linkname': name, 'id': 1}], 'project_list'
+        )
+        self.server.register_function(
+            lambda pid: make_v1_patch(pid, 'patch {}'.format(pid))
+            if pid < 100 else {},
+            'patch_get'
+        )
+
+    def tearDown(self):
+        """Stop the stand-in server."""
+        self.server.stop()
+
+    def make_project(self, encode_threshold=None):
+        """Create an interface to the stand-in server."""
+        return patchwork.PatchworkV1Project(
+            self.server.baseurl, 'project', 0,
+            session=patchwork.PatchworkSession(),
+            encode_threshold=encode_threshold
+        )
+
+    def test_keep_alive(self):
+        """Ensure XML RPC calls reuse a single connection."""
+        self.server.disable_multicall()
+        project = self.make_project()
+        project.get_patches_by_id([1, 2, 3])
+        self.assertEqual(6, self.server.request_count)
+        self.assertEqual(1, len(self.server.client_ports))
+
+    def test_gzip(self):
+        """Ensure requests over the threshold are gzipped."""
+        project = self.make_project(encode_threshold=1000)
+        del self.server.encodings[:]
+        project.get_patches_by_id([1])
+        project.get_patches_by_id(range(1, 21))
+        self.assertEqual([None, 'gzip'], self.server.encodings)
+
+    def test_get_patches_by_id_multicall(self):
+        """Ensure patches are looked up with a single request."""
+        project = self.make_project()
+        count = self.server.request_count
+
+        patch_list = project.get_patches_by_id([3, 1, 2])
+
+        self.assertEqual([3, 1, 2], [patch['id'] for patch in patch_list])
+        self.assertEqual(count + 1, self.server.request_count)
+
+    def test_get_patches_by_id_no_multicall(self):
+        """Ensure patches are looked up separately without multicalls."""
+        self.server.disable_multicall()
+        project = self.make_project()
+        count = self.server.request_count
+
+        patch_list = project.get_patches_by_id([3, 1, 2])
+
+        self.assertEqual([3, 1, 2], [patch['id'] for patch in patch_list])
+        self.assertEqual(count + 4, self.server.request_count)
+        self.assertFalse(project.multicall)
+
+    def test_get_patchsets_multicall(self):
+        """Ensure get_patchsets() looks patches up with a single request."""
+        def patch_get(pid):
+            """Get a patch with e-mail headers, not needing an mbox."""
+            patch = make_v1_patch(pid, 'patch {}'.format(pid))
+            patch['root_comment'] = {'headers': 'Subject: {}\n'.format(
+                patch['name']
+            )}
+            return patch
+
+        self.server.register_function(patch_get, 'patch_get')
+        project = self.make_project()
+        count = self.server.request_count
+
+        series_list = project.get_patchsets([3, 1, 2, 1])
+
+        self.assertEqual(count + 1, self.server.request_count)
+        self.assertEqual([[3], [1], [2], [1]],
+                         [[patch_id for patch_id, _ in
+                           series.get_patch_info_list()]
+                          for series in series_list])
+
+    def test_get_patches_by_id_missing(self):
+        """Ensure an exception is raised for missing patches."""
+        project = self.make_project()
+        with self.assertRaises(Exception):
+            project.get_patches_by_id([1, 100])
+
+    @mock.patch('sktm.patchwork.PATCH_BATCH_SIZE', 3)
+    def test_get_new_patches_windows(self):
+        """Ensure new patches are listed in windows, ordered by date."""
+        # Patch IDs and dates, with IDs out of date order, and date ties
+        # crossing windows
+        patch_list = [make_v1_patch(pid, 'patch {}'.format(pid))
+                      for pid in range(1, 10)]
+        for patch, day in zip(patch_list, [1, 2, 2, 2, 3, 4, 4, 6, 5]):
+            patch['date'] = '2018-06-0{} 00:00:00'.format(day)
+            # Provide e-mail headers, so patch mboxes are not needed
+            patch['root_comment'] = {'headers': 'Subject: {}\n'.format(
+                patch['name']
+            )}
+        patch_list.sort(key=lambda patch: patch['date'])
+        filt_list = []
+
+        def patch_list_method(filt):
+            """List patches like Patchwork does."""
+            filt_list.append(filt)
+            return [patch for patch in patch_list
+                    if filt['id__gt'] < patch['id'] <
+                    filt.get('id__lt', patch['id'] + 1) and
+                    patch['date'] > filt.get('date__gt', '') and
+                    patch['date'] == filt.get('date', patch['date'])][
+                        :filt.get('max_count')]
+
+        project = self.make_project()
+        self.server.register_function(patch_list_method, 'patch_list')
+        project.lastpatch = 1
+
+        self.assertEqual(
+            [[2], [3], [4], [5], [6], [7], [9], [8]],
+            [[patch_id for patch_id, _ in series.get_patch_info_list()]
+             for series in project.get_new_patchsets()]
+        )
+        self.assertEqual(9, project.lastpatch)
+        # Three windows, with the date ties of the first two listed in
+        # windows as well, the first ones filling a window
+        self.assertEqual(7, len(filt_list))
+        self.assertEqual(set([1]),
+                         set(filt['id__gt'] for filt in filt_list
+                             if 'date' not in filt))
+
+    @mock.patch('sktm.patchwork.PATCH_BATCH_SIZE', 3)
+    def test_get_new_patches_date_burst(self):
+        """Ensure patches with the same date are listed in windows too."""
+        # Patches with the same date, listed in no particular ID order
+        patch_list = [make_v1_patch(pid, 'patch {}'.format(pid))
+                      for pid in [7, 2, 11, 5, 9, 3, 12, 8, 4, 10, 6]]
+        for patch in patch_list:
+            patch['root_comment'] = {'headers': 'Subject: {}\n'.format(
+                patch['name']
+            )}
+        filt_list = []
+
+        def patch_list_method(filt):
+            """List patches like Patchwork does."""
+            filt_list.append(filt)
+            return [patch for patch in patch_list
+                    if filt['id__gt'] < patch['id'] <
+                    filt.get('id__lt', patch['id'] + 1) and
+                    patch['date'] > filt.get('date__gt', '') and
+                    patch['date'] == filt.get('date', patch['date'])][
+                        :filt.get('max_count')]
+
+        project = self.make_project()
+        self.server.register_function(patch_list_method, 'patch_list')
+        project.lastpatch = 1
+
+        id_list = [patch_id for series in project.get_new_patchsets()
+                   for patch_id, _ in series.get_patch_info_list()]
+
+        self.assertEqual(range(2, 13), sorted(id_list))
+        self.assertEqual(len(id_list), len(set(id_list)))
+        self.assertEqual([3] * len(filt_list),
+                         [filt.get('max_count') for filt in filt_list])
+
+    def test_rpc_wrapper_multicall(self):
+        """Ensure multicalls add and check the RH fork API version."""
+        self.server.register_function(
+            lambda version, pid: [version, {'id': pid}], 'patch_get'
+        )
+        rpc = patchwork.RpcWrapper(xmlrpclib.ServerProxy(
+            self.server.baseurl + '/xmlrpc/'
+        ))
+
+        self.assertEqual(
+            [{'id': 1}, {'id': 2}],
+            patchwork.rpc_multicall(rpc, [('patch_get', (1,)),
+                                          ('patch_get', (2,))])
+        )
+        self.assertEqual(1, self.server.request_count)
@@ -0,0 +1,129 @@
+# Copyright (c) 2018 Red Hat, Inc. All rights reserved. This copyrighted
+# material is made available to anyone wishing to use, modify, copy, or
+# redistribute it subject to the terms and conditions of the GNU General Public
+# License v.2 or later.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+"""Tests for the ratelimit module."""
+import threading
+import time
+import unittest
+
+from sktm import ratelimit
+
+
+class TestHostLimit(unittest.TestCase):
+    """Test cases for the HostLimit class."""
+
+    def test_increase_on_success(self):
+        """Ensure the concurrency limit grows on success, up to maximum."""
+        host_limit = ratelimit.HostLimit('host', 1000, 1000, 4)
+        for _ in range(100):
+            host_limit.acquire()
+            host_limit.release(200, 0.01)
+        self.assertEqual(4, host_limit.get_stats()['concurrency'])
+
+    def test_decrease_on_overload(self):
+        """Ensure the concurrency limit halves once per overload episode."""
+        host_limit = ratelimit.HostLimit('host', 1000, 1000, 8)
+        host_limit.concurrency = 8.0
+        for status_code in (429, 503, None):
+            host_limit.acquire()
+            host_limit.release(status_code, 0.01)
+        stats = host_limit.get_stats()
+        self.assertEqual(4, stats['concurrency'])
+        self.assertEqual(3, stats['overloads'])
+        self.assertEqual(1, stats['decreases'])
+
+    def test_decrease_on_latency_spike(self):
+        """Ensure the concurrency limit halves on a latency spike."""
+        host_limit = ratelimit.HostLimit('host', 1000, 1000, 8)
+        host_limit.concurrency = 8.0
+        for latency in [0.01] * ratelimit.LATENCY_WARMUP + [1]:
+            host_limit.acquire()
+            host_limit.release(200, latency)
+        self.assertEqual(4, host_limit.get_stats()['concurrency'])
+
+    def test_concurrency_wait(self):
+        """Ensure requests over the concurrency limit wait for others."""
+        host_limit = ratelimit.HostLimit('host', 1000, 1000, 1)
+        host_limit.acquire()
+        acquired = threading.Event()
+
+        def acquire():
+            """Acquire the limit and signal it."""
+            host_limit.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        host_limit.release(200, 0.01)
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+
+    def test_rate_wait(self):
+        """Ensure requests over the burst wait for the rate."""
+        host_limit = ratelimit.HostLimit('host', 20, 1, 10)
+        start = time.time()
+        for _ in range(3):
+            host_limit.acquire()
+            host_limit.release(200, 0.01)
+        self.assertGreaterEqual(time.time() - start, 0.09)
+
+    def test_retry_after(self):
+        """Ensure no requests are sent before a Retry-After period ends."""
+        host_limit = ratelimit.HostLimit('host', 1000, 1000, 10)
+        host_limit.acquire()
+        host_limit.release(429, 0.01, 1)
+        start = time.time()
+        host_limit.acquire()
+        self.assertGreaterEqual(time.time() - start, 0.9)
+
+    def test_no_rate(self):
+        """Ensure concurrency is limited and adapted without a rate limit."""
+        host_limit = ratelimit.HostLimit('host', 0, 0, 4)
+        start = time.time()
+        for _ in range(100):
+            host_limit.acquire()
+            host_limit.release(200, 0.01)
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(4, host_limit.get_stats()['concurrency'])
+
+        host_limit.acquire()
+        host_limit.release(429, 0.01, 1)
+        self.assertEqual(2, host_limit.get_stats()['concurrency'])
+        start = time.time()
+        host_limit.acquire()
+        self.assertGreaterEqual(time.time() - start, 0.9)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the RateLimiter class."""
+
+    def test_get_host_limit(self):
+        """Ensure limits are kept per host."""
+        limiter = ratelimit.RateLimiter(5, 10, 3)
+        host_limit = limiter.get_host_limit('a')
+        self.assertIs(host_limit, limiter.get_host_limit('a'))
+        self.assertIsNot(host_limit, limiter.get_host_limit('b'))
+        self.assertEqual((5, 10, 3), (host_limit.rate, host_limit.burst,
+                                      host_limit.max_concurrency))
+
+    def test_get_stats(self):
+        """Ensure statistics are reported for every host."""
+        limiter = ratelimit.RateLimiter()
+        host_limit = limiter.get_host_limit('a')
+        host_limit.acquire()
+        host_limit.release(200, 0.5)
+        stats = limiter.get_stats()
+        self.assertEqual(['a'], stats.keys())
+        self.assertEqual(1, stats['a']['requests'])
+        self.assertEqual(0.5, stats['a']['latency'])